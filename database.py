@@ -24,12 +24,21 @@ coding_question_collection = db["coding_question_session"]
 
 concept_collection = db["concept"]
 concept_question_collection = db["concept_question_session"]
+combined_feedback_collection = db["combined_feedback"]
 
 contest_collection = db["contest"]
 contest_candidate_collection = db["candidate_response"]
 contest_resume_fs = gridfs.GridFS(db, collection="contest_resume")
 contest_audio_fs = gridfs.GridFS(db, collection="contest_audio")
 contest_leaderboard = db["contest_leaderboard"]
+round_scores_collection = db["round_scores"]
+round_stats_collection = db["round_stats"]
+
+file_artifacts_collection = db["file_artifacts"]
+
+llm_cache_collection = db["llm_cache"]
+github_http_cache_collection = db["github_http_cache"]
+scheduled_jobs_collection = db["scheduled_jobs"]
 
 
 audio_interview_collection = db["audio"]
@@ -1,7 +1,16 @@
 from fastapi import FastAPI
 from routes import auth,admin, candidate, concept, resume, github, coding, dev, constants, contest
 from fastapi.middleware.cors import CORSMiddleware
-from utils.reader import Frontend
+from utils.reader import Frontend, JOB_WORKER
+from utils.scheduler import run_worker
+from utils.jobs import JOB_HANDLERS, JOB_LIMITS
+from utils.contest_cache import watch_contests
+from utils.broadcast import watch_leaderboards
+from utils.question_index import watch_question_index
+from utils.indexes import ensure_indexes
+from utils.github import GITHUB_CLIENT
+from contextlib import asynccontextmanager
+import asyncio
 import os
 import certifi
 from fastapi import FastAPI
@@ -13,7 +22,30 @@ from pathlib import Path
 os.environ["SSL_CERT_FILE"] = certifi.where()
 
 
-app = FastAPI(docs_url=None)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+
+    await asyncio.to_thread(ensure_indexes)
+
+    stop = asyncio.Event()
+    tasks = [
+        asyncio.create_task(watch_contests(stop)),
+        asyncio.create_task(watch_leaderboards(stop)),
+        asyncio.create_task(watch_question_index(stop))
+    ]
+
+    # every process can run a worker; leases keep them from double-running jobs
+    if JOB_WORKER:
+        tasks.append(asyncio.create_task(run_worker(JOB_HANDLERS, stop, JOB_LIMITS)))
+
+    yield
+
+    stop.set()
+    await asyncio.gather(*tasks)
+    await GITHUB_CLIENT.aclose()
+
+
+app = FastAPI(docs_url=None, lifespan=lifespan)
 
 
 
@@ -0,0 +1,97 @@
+from pymongo import UpdateOne
+from database import contest_collection, contest_candidate_collection
+from utils.indexes import ensure_indexes
+from utils.time import generate_timestamp
+
+
+# One-off migration: moves contest.registered_candidates into candidate_response.
+#   python migrate_registrations.py
+# Safe to re-run.
+
+
+
+
+def drop_duplicate_registrations():
+
+    duplicates = contest_candidate_collection.aggregate([
+        {
+            "$group": {
+                "_id": {"contest_id": "$contest_id", "candidate_id": "$candidate_id"},
+                "ids": {"$push": "$_id"},
+                "count": {"$sum": 1}
+            }
+        },
+        {"$match": {"count": {"$gt": 1}}}
+    ], allowDiskUse=True)
+
+    removed = 0
+
+    for group in duplicates:
+        docs = list(contest_candidate_collection.find({"_id": {"$in": group["ids"]}}))
+
+        # keep the copy that carries the most round data
+        docs.sort(key=lambda doc: (len(doc), doc["_id"].generation_time), reverse=True)
+        extra = [doc["_id"] for doc in docs[1:]]
+
+        removed += contest_candidate_collection.delete_many({"_id": {"$in": extra}}).deleted_count
+
+    return removed
+
+
+
+
+def migrate_contest(contest: dict):
+
+    contest_id = contest["_id"]
+    timestamp = generate_timestamp()
+
+    requests = [
+        UpdateOne(
+            {"contest_id": contest_id, "candidate_id": candidate_id},
+            {
+                "$setOnInsert": {
+                    "contest_id": contest_id,
+                    "candidate_id": candidate_id,
+                    "created_on": timestamp
+                }
+            },
+            upsert=True
+        )
+        for candidate_id in contest.get("registered_candidates", [])
+    ]
+
+    inserted = 0
+
+    if requests:
+        inserted = contest_candidate_collection.bulk_write(requests, ordered=False).upserted_count
+
+    count = contest_candidate_collection.count_documents({"contest_id": contest_id})
+
+    contest_collection.update_one(
+        {"_id": contest_id},
+        {
+            "$set": {"candidate_count": count},
+            "$unset": {"registered_candidates": ""}
+        }
+    )
+
+    return inserted, count
+
+
+
+
+if __name__ == "__main__":
+
+    removed = drop_duplicate_registrations()
+    print(f"removed {removed} duplicate registrations")
+
+    print(ensure_indexes(["candidate_response"]))
+
+    contests = contest_collection.find(
+        {"registered_candidates": {"$exists": True}},
+        {"registered_candidates": 1}
+    )
+
+    for contest in contests:
+        inserted, count = migrate_contest(contest)
+        print(f"{contest['_id']}: {inserted} registrations added, {count} registered")
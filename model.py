@@ -1,58 +1,182 @@
-from openai import OpenAI
-from utils.reader import OPENAI_API_KEY
+from openai import OpenAI, AsyncOpenAI, APIStatusError, APITimeoutError, APIConnectionError
+from utils.reader import OPENAI_API_KEY, LLM_BACKEND, LLM_MODEL, LLM_MAX_CONCURRENCY, LLM_ROUTE_CONCURRENCY
+from utils.reader import LLM_TIMEOUT, LLM_MAX_RETRIES, LLM_FAKE_LATENCY, LLM_FAKE_ERROR_RATE
+from utils.llm_cache import cache_key, should_cache, cached_response, lookup, store, record
 #import whisper
 #from faster_whisper import WhisperModel
 import wave
+import io
+import asyncio
+import random
+import json
+import time
+import httpx
+from types import SimpleNamespace
 
 
 CHATGPT = OpenAI(api_key=OPENAI_API_KEY)
 
-def call_chatgpt(prompt: str, content: str, temperature: float, response_format: dict):
-
-    response = CHATGPT.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": prompt},
-            {"role": "user", "content": content}
-        ],
-        response_format=response_format,
-        temperature=temperature
+# One pooled async client shared by every prompt module. Retries are done
+# here (with jitter) instead of inside the SDK so that a retrying call does
+# not hold a concurrency slot while it sleeps.
+ASYNC_CHATGPT = AsyncOpenAI(
+    api_key=OPENAI_API_KEY,
+    max_retries=0,
+    timeout=httpx.Timeout(LLM_TIMEOUT, connect=10.0),
+    http_client=httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=LLM_MAX_CONCURRENCY,
+            max_keepalive_connections=LLM_MAX_CONCURRENCY
+        ),
+        timeout=httpx.Timeout(LLM_TIMEOUT, connect=10.0)
     )
+)
+
+LLM_SEMAPHORE = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+ROUTE_SEMAPHORES = {}
+
+RETRY_BASE_SECONDS = 0.5
+RETRY_MAX_SECONDS = 20.0
+
+
+class FakeRateLimit(Exception):
+    pass
 
-    return response
 
+def get_route_semaphore(route: str) -> asyncio.Semaphore:
+    semaphore = ROUTE_SEMAPHORES.get(route)
 
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(LLM_ROUTE_CONCURRENCY)
+        ROUTE_SEMAPHORES[route] = semaphore
 
+    return semaphore
 
 
+def is_retryable(error: Exception) -> bool:
 
+    if isinstance(error, (APITimeoutError, APIConnectionError, FakeRateLimit)):
+        return True
 
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
 
+    return False
 
 
+def retry_delay(error: Exception, attempt: int) -> float:
 
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
 
+    if retry_after:
+        try:
+            return min(float(retry_after), RETRY_MAX_SECONDS)
+        except ValueError:
+            pass
 
+    # full jitter: uniform in [0, base * 2^attempt]
+    return random.uniform(0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** attempt))
 
 
+def fake_value(schema: dict):
 
+    schema_type = schema.get("type")
+
+    if schema_type == "object":
+        return {
+            key: fake_value(value)
+            for key, value in schema.get("properties", {}).items()
+        }
+    if schema_type == "array":
+        return [fake_value(schema.get("items", {})) for _ in range(3)]
+    if schema_type == "string":
+        return "lorem ipsum"
+    if schema_type == "integer":
+        return random.randint(0, 10)
+    if schema_type == "number":
+        return round(random.uniform(0, 10), 1)
+    if schema_type == "boolean":
+        return True
+
+    return None
 
 
+async def fake_chat_completion(response_format: dict):
 
+    await asyncio.sleep(LLM_FAKE_LATENCY * random.lognormvariate(0, 0.5))
 
+    if random.random() < LLM_FAKE_ERROR_RATE:
+        raise FakeRateLimit("fake 429")
 
+    schema = response_format.get("json_schema", {}).get("schema", {})
+
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(fake_value(schema))))]
+    )
 
 
+async def chat_completion(prompt: str, content: str, temperature: float, response_format: dict):
 
+    if LLM_BACKEND == "fake":
+        return await fake_chat_completion(response_format)
 
+    return await ASYNC_CHATGPT.chat.completions.create(
+        model=LLM_MODEL,
+        messages=[
+            {"role": "system", "content": prompt},
+            {"role": "user", "content": content}
+        ],
+        response_format=response_format,
+        temperature=temperature
+    )
 
 
+async def call_chatgpt_uncached(prompt: str, content: str, temperature: float, response_format: dict, route: str):
 
+    attempt = 0
 
+    while True:
+        # route slot first, so a saturated route never sits on global slots
+        async with get_route_semaphore(route), LLM_SEMAPHORE:
+            try:
+                return await chat_completion(prompt, content, temperature, response_format)
+            except Exception as e:
+                if not is_retryable(e) or attempt >= LLM_MAX_RETRIES:
+                    raise
+                error = e
 
+        await asyncio.sleep(retry_delay(error, attempt))
+        attempt += 1
 
 
+async def call_chatgpt(
+    prompt: str,
+    content: str,
+    temperature: float,
+    response_format: dict,
+    route: str = "default",
+    cache: bool = None
+):
 
+    if not should_cache(temperature, cache):
+        record("bypassed")
+        return await call_chatgpt_uncached(prompt, content, temperature, response_format, route)
+
+    # backend is part of the key so fake completions never answer real calls
+    key = cache_key(f"{LLM_BACKEND}:{LLM_MODEL}", prompt, content, temperature, response_format)
+
+    cached_content = await lookup(key)
+
+    if cached_content is not None:
+        return cached_response(cached_content)
+
+    start = time.perf_counter()
+    response = await call_chatgpt_uncached(prompt, content, temperature, response_format, route)
+
+    await store(key, response.choices[0].message.content, time.perf_counter() - start)
+
+    return response
 
 
 
@@ -65,19 +189,29 @@ def call_chatgpt(prompt: str, content: str, temperature: float, response_format:
 
 ###############################################
 
-def call_audio_model_1(wav_path):
-
-    with open(wav_path, "rb") as f:
+def call_audio_model_1(wav_path, filename="answer.wav"):
 
+    # wav_path may also be the uploaded bytes, transcribed without a temp file
+    if isinstance(wav_path, bytes):
         resp = CHATGPT.audio.transcriptions.create(
             model="gpt-4o-mini-transcribe",
-            file=f
+            file=(filename, wav_path)
         )
+        wav_source = io.BytesIO(wav_path)
+
+    else:
+        with open(wav_path, "rb") as f:
+
+            resp = CHATGPT.audio.transcriptions.create(
+                model="gpt-4o-mini-transcribe",
+                file=f
+            )
+        wav_source = wav_path
 
     transcript = resp.text
 
     # compute duration
-    with wave.open(wav_path, "rb") as wf:
+    with wave.open(wav_source, "rb") as wf:
         frames = wf.getnframes()
         rate = wf.getframerate()
         duration = frames / float(rate)
@@ -333,4 +467,50 @@ def call_audio_model_5(wav_path):
     transcript = transcript.strip()
 
     return segmented_data, transcript
-'''
\ No newline at end of file
+'''
+
+
+
+if __name__ == "__main__":
+
+    # Offline gateway benchmark:
+    #   LLM_BACKEND=fake LLM_FAKE_LATENCY=0.5 python model.py 2000
+    import sys
+
+    if LLM_BACKEND != "fake":
+        print("Set LLM_BACKEND=fake to benchmark without calling OpenAI")
+        sys.exit(1)
+
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    routes = ["resume", "github", "coding", "concept", "contest", "admin"]
+    response_format = {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "bench",
+            "schema": {
+                "type": "object",
+                "properties": {"summary": {"type": "string"}},
+                "required": ["summary"]
+            }
+        }
+    }
+
+    async def timed_call(i):
+        start = time.perf_counter()
+        await call_chatgpt("bench", str(i), 0.2, response_format, route=routes[i % len(routes)], cache=False)
+        return time.perf_counter() - start
+
+    async def bench():
+        start = time.perf_counter()
+        latencies = sorted(await asyncio.gather(*(timed_call(i) for i in range(total))))
+        elapsed = time.perf_counter() - start
+
+        def pct(p):
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        print(f"requests:   {total}")
+        print(f"wall time:  {elapsed:.2f}s")
+        print(f"throughput: {total / elapsed:.1f} req/s")
+        print(f"p50 {pct(0.50):.3f}s  p95 {pct(0.95):.3f}s  p99 {pct(0.99):.3f}s")
+
+    asyncio.run(bench())
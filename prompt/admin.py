@@ -2,10 +2,9 @@ import json
 from typing import List
 from fastapi import HTTPException
 from model import call_chatgpt
-from database import leetcode 
-import random
+from utils.question_index import sample_coding_ids
 
-def validate_role_skills(role: str, skills: List[str]) -> bool:
+async def validate_role_skills(role: str, skills: List[str], cache: bool = None) -> bool:
 
     prompt = """
     You are an expert technical recruiter.
@@ -39,7 +38,7 @@ def validate_role_skills(role: str, skills: List[str]) -> bool:
         }
     }
 
-    response = call_chatgpt(prompt, content, 0.4, response_format)
+    response = await call_chatgpt(prompt, content, 0, response_format, route="admin", cache=cache)
 
     try:
         response_content = response.choices[0].message.content
@@ -64,7 +63,7 @@ def validate_role_skills(role: str, skills: List[str]) -> bool:
 
 
 
-def generate_resume_questions(company: str ,role: str, skills: List[str], question_count: int) -> List[str]:
+async def generate_resume_questions(company: str ,role: str, skills: List[str], question_count: int, cache: bool = True) -> List[str]:
 
     prompt = """
 You are an expert technical recruiter designing automated resume screening for a company.
@@ -120,7 +119,7 @@ Number of questions: {question_count}
         }
     }
 
-    response = call_chatgpt(prompt, content, 0.7, response_format)
+    response = await call_chatgpt(prompt, content, 0.7, response_format, route="admin", cache=cache)
 
     try:
         response_content = response.choices[0].message.content
@@ -140,43 +139,15 @@ Number of questions: {question_count}
     return questions
 
 
-def generate_coding_ids(company:str, coding_question_count: int) -> List:
-    total_count = leetcode.count_documents({
-        "companies": company
-    })
+def generate_coding_ids(company:str, coding_question_count: int, ratios: dict = None) -> List:
 
+    # drawn from the in-memory question index: no count or $sample round trips
+    return sample_coding_ids(company, coding_question_count, ratios) 
 
-    if total_count < coding_question_count:
-        raise HTTPException(status_code=400, detail=f"Not enough coding questions, only {total_count} available.")
 
 
-    easy_questions = list(leetcode.aggregate([
-        {"$match": {"companies": company, "difficulty": "Easy"}},
-        {"$sample": {"size": coding_question_count}}
-    ]))
 
-    medium_questions = list(leetcode.aggregate([
-        {"$match": {"companies": company, "difficulty": "Medium"}},
-        {"$sample": {"size": coding_question_count}}
-    ]))
-
-    hard_questions = list(leetcode.aggregate([
-        {"$match": {"companies": company, "difficulty": "Hard"}},
-        {"$sample": {"size": coding_question_count}}
-    ]))
-
-    coding_pool = easy_questions + medium_questions + hard_questions
-
-    final_coding = random.sample(coding_pool, coding_question_count)
-
-    coding_ids = [str(q["question_id"]) for q in final_coding]
-
-    return coding_ids 
-
-
-
-
-def generate_concept_questions(role: str, skills: List[str], question_count: int) -> List[str]:
+async def generate_concept_questions(role: str, skills: List[str], question_count: int, cache: bool = True) -> List[str]:
 
     prompt = """
 You are a senior technical interviewer.
@@ -214,7 +185,7 @@ Number of questions: {question_count}
         }
     }
 
-    response = call_chatgpt(prompt, content, 0.7, response_format)
+    response = await call_chatgpt(prompt, content, 0.7, response_format, route="admin", cache=cache)
 
     try:
         response_content = response.choices[0].message.content
@@ -235,7 +206,7 @@ Number of questions: {question_count}
 
 
 
-def generate_hr_questions(role: str, question_count: int) -> List[str]:
+async def generate_hr_questions(role: str, question_count: int, cache: bool = True) -> List[str]:
 
     prompt = """
 You are an HR interviewer.
@@ -275,7 +246,7 @@ Number of questions: {question_count}
         }
     }
 
-    response = call_chatgpt(prompt, content, 0.7, response_format)
+    response = await call_chatgpt(prompt, content, 0.7, response_format, route="admin", cache=cache)
 
     try:
         response_content = response.choices[0].message.content
@@ -3,7 +3,7 @@ from fastapi import HTTPException
 from model import call_chatgpt
 
 
-def evaluate_coding_answers(questions: list):
+async def evaluate_coding_answers(questions: list):
 
     prompt = """
     You are a senior technical coding interviewer.
@@ -82,7 +82,7 @@ def evaluate_coding_answers(questions: list):
         }
     }
 
-    response = call_chatgpt(prompt, content, 0.2, response_format)
+    response = await call_chatgpt(prompt, content, 0.2, response_format, route="coding")
 
     try:
         response_content = response.choices[0].message.content
@@ -100,7 +100,7 @@ def evaluate_coding_answers(questions: list):
     return response_json
 
 
-def generate_coding_combined_diff_session_feedback(session_data: dict):
+async def generate_coding_combined_diff_session_feedback(session_data: dict):
 
     prompt = """
 You are a senior coding interview evaluator.
@@ -184,7 +184,7 @@ Session wise Coding Attempts:
         }
     }
 
-    response = call_chatgpt(prompt, content, 0.2, response_format)
+    response = await call_chatgpt(prompt, content, 0.2, response_format, route="coding")
 
     try:
         content = response.choices[0].message.content
@@ -197,7 +197,7 @@ Session wise Coding Attempts:
         )
     
 
-def generate_coding_combined_same_session_feedback(session_data: dict):
+async def generate_coding_combined_same_session_feedback(session_data: dict):
 
     prompt = """
 You are a senior coding interview evaluator.
@@ -280,7 +280,7 @@ Session wise Coding Attempts:
         }
     }
 
-    response = call_chatgpt(prompt, content, 0.2, response_format)
+    response = await call_chatgpt(prompt, content, 0.2, response_format, route="coding")
 
     try:
         content = response.choices[0].message.content
@@ -4,7 +4,7 @@ from fastapi import HTTPException
 from model import call_chatgpt
 
 
-def generate_concept_topic_questions(
+async def generate_concept_topic_questions(
     topics: List[str],
     num_questions: int,
     previous_sessions: list
@@ -97,7 +97,7 @@ def generate_concept_topic_questions(
         }
     }
 
-    response = call_chatgpt(prompt, content, 0.4, response_format)
+    response = await call_chatgpt(prompt, content, 0.4, response_format, route="concept")
 
     try:
         response_content = response.choices[0].message.content
@@ -116,7 +116,7 @@ def generate_concept_topic_questions(
 
 
 
-def evaluate_concept_topic_answers(
+async def evaluate_concept_topic_answers(
     topics: List[str],
     question_bank: List[dict]
 ):
@@ -209,7 +209,7 @@ def evaluate_concept_topic_answers(
         }
     }
 
-    response = call_chatgpt(prompt, content, 0.2, response_format)
+    response = await call_chatgpt(prompt, content, 0.2, response_format, route="concept")
 
     try:
         response_content = response.choices[0].message.content
@@ -228,7 +228,7 @@ def evaluate_concept_topic_answers(
     return response_json
 
 
-def generate_concept_combined_diff_session_feedback(
+async def generate_concept_combined_diff_session_feedback(
     topics: list,
     session_data: dict
 ):
@@ -315,7 +315,7 @@ Session wise Question & Answers:
         }
     }
 
-    response = call_chatgpt(prompt, content, 0.2, response_format)
+    response = await call_chatgpt(prompt, content, 0.2, response_format, route="concept")
 
     try:
         content = response.choices[0].message.content
@@ -329,7 +329,7 @@ Session wise Question & Answers:
     
 
 
-def generate_concept_combined_same_session_feedback(
+async def generate_concept_combined_same_session_feedback(
     topics: list,
     session_data: dict
 ):
@@ -415,7 +415,7 @@ Session wise Question & Answers:
         }
     }
 
-    response = call_chatgpt(prompt, content, 0.2, response_format)
+    response = await call_chatgpt(prompt, content, 0.2, response_format, route="concept")
 
     try:
         content = response.choices[0].message.content
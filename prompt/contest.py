@@ -2,9 +2,17 @@ from model import call_chatgpt
 from typing import List
 import json
 from fastapi import HTTPException
+import asyncio
+from utils.artifacts import get_artifact, store_artifact, summary_field
 
-def generate_summary(resume_text):
+async def generate_summary(resume_text, sha256=None, ocr_mode="N"):
 
+    # same instructions as the /resume/upload summary, so either is reused
+    if sha256:
+        summary = await asyncio.to_thread(get_artifact, sha256, summary_field(ocr_mode))
+
+        if summary is not None:
+            return summary
 
     prompt = f""" 
     You are a professional technical resume analyzer. Analyze the resume and:
@@ -42,7 +50,7 @@ def generate_summary(resume_text):
         }
     }
 
-    response = call_chatgpt(prompt, content, 0.2, response_format)
+    response = await call_chatgpt(prompt, content, 0.2, response_format, route="contest")
 
 
 
@@ -57,6 +65,9 @@ def generate_summary(resume_text):
             detail="Invalid JSON returned by AI"
         )
 
+    if sha256:
+        await asyncio.to_thread(store_artifact, sha256, summary_field(ocr_mode), summary_str)
+
     return summary_str
 
 
@@ -72,7 +83,7 @@ def generate_summary(resume_text):
 
 
 
-def evaluate_resume_score(
+async def evaluate_resume_score(
         resume_text, resume_questions,
         company: str, role: str, skills: List[str]
 ):
@@ -167,7 +178,7 @@ Skills: {", ".join(skills)}
         }
     }
 
-    response = call_chatgpt(prompt, content, 0.2, response_format)
+    response = await call_chatgpt(prompt, content, 0.2, response_format, route="contest")
 
     try:
         response_content = response.choices[0].message.content
@@ -183,7 +194,7 @@ Skills: {", ".join(skills)}
 
 
 
-def evaluate_coding_score(evaluation_input):
+async def evaluate_coding_score(evaluation_input):
 
     prompt = """
 You are a senior coding interviewer.
@@ -255,7 +266,7 @@ IMPORTANT:
         }
     }
 
-    response = call_chatgpt(prompt, content, 0.2, response_format)
+    response = await call_chatgpt(prompt, content, 0.2, response_format, route="contest")
 
     try:
 
@@ -273,7 +284,7 @@ IMPORTANT:
 
 
 
-def evaluate_concept_score(evaluation_input):
+async def evaluate_concept_score(evaluation_input):
 
 
     prompt = """
@@ -349,7 +360,7 @@ IMPORTANT:
         }
     }
 
-    response = call_chatgpt(prompt, content, 0.2, response_format)
+    response = await call_chatgpt(prompt, content, 0.2, response_format, route="contest")
  
     try:
         response_content = response.choices[0].message.content
@@ -364,7 +375,7 @@ IMPORTANT:
         )
 
 
-def evaluate_hr_score(evaluation_input, resume_summary):
+async def evaluate_hr_score(evaluation_input, resume_summary):
 
     prompt = """
 You are a senior HR interviewer evaluating candidate responses.
@@ -474,7 +485,7 @@ IMPORTANT:
         }
     }
 
-    response = call_chatgpt(prompt, content, 0.2, response_format)
+    response = await call_chatgpt(prompt, content, 0.2, response_format, route="contest")
 
     try:
         response_content = response.choices[0].message.content
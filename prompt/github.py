@@ -7,9 +7,9 @@ from utils.github import fetch_repo_details
 
 
 
-def process_repo(selected_repo_link):
+async def process_repo(selected_repo_link):
 
-    details = fetch_repo_details(selected_repo_link)
+    details = await fetch_repo_details(selected_repo_link)
 
 
 
@@ -65,7 +65,7 @@ def process_repo(selected_repo_link):
         }
     }
 
-    response = call_chatgpt(prompt, content, 0.2, response_format)
+    response = await call_chatgpt(prompt, content, 0.2, response_format, route="github")
 
     try:
         response_content = response.choices[0].message.content
@@ -83,7 +83,7 @@ def process_repo(selected_repo_link):
     }
 
 
-def generate_github_question(
+async def generate_github_question(
     repo_summary: str,
     num_questions: int,
     previous_sessions: list
@@ -181,7 +181,7 @@ Previous Sessions:
         }
     }
 
-    response = call_chatgpt(prompt, content, 0.4, response_format)
+    response = await call_chatgpt(prompt, content, 0.4, response_format, route="github")
 
     try:
         response_content = response.choices[0].message.content
@@ -203,7 +203,7 @@ Previous Sessions:
 
 
 
-def evaluate_github_answers(repo_summary: str, question_bank: list):
+async def evaluate_github_answers(repo_summary: str, question_bank: list):
 
     prompt = """
     You are a senior software architect and technical interviewer.
@@ -288,7 +288,7 @@ def evaluate_github_answers(repo_summary: str, question_bank: list):
         }
     }
 
-    response = call_chatgpt(prompt, content, 0.2, response_format)
+    response = await call_chatgpt(prompt, content, 0.2, response_format, route="github")
 
     try:
         response_content = response.choices[0].message.content
@@ -308,7 +308,7 @@ def evaluate_github_answers(repo_summary: str, question_bank: list):
     return response_json
 
 
-def generate_github_combined_diff_session_feedback(repo_summary: str, session_data: dict):
+async def generate_github_combined_diff_session_feedback(repo_summary: str, session_data: dict):
 
     prompt = """
 You are a senior technical interview evaluator.
@@ -392,7 +392,7 @@ Session wise Question & Answers:
         }
     }
 
-    response = call_chatgpt(prompt, content, 0.2, response_format)
+    response = await call_chatgpt(prompt, content, 0.2, response_format, route="github")
 
     try:
         content = response.choices[0].message.content
@@ -406,7 +406,7 @@ Session wise Question & Answers:
 
 
 
-def generate_github_combined_same_session_feedback(repo_summary: str, session_data: dict):
+async def generate_github_combined_same_session_feedback(repo_summary: str, session_data: dict):
 
     prompt = """
 You are a senior technical interview evaluator.
@@ -490,7 +490,7 @@ Session wise Question & Answers:
         }
     }
 
-    response = call_chatgpt(prompt, content, 0.2, response_format)
+    response = await call_chatgpt(prompt, content, 0.2, response_format, route="github")
 
     try:
         content = response.choices[0].message.content
@@ -0,0 +1,47 @@
+from fastapi import HTTPException
+from model import call_chatgpt
+import json
+
+
+async def summarize_session(kind: str, pairs: dict):
+
+    prompt = """You are a senior technical interview evaluator.
+
+You will receive the questions and the candidate's answers from ONE past
+interview session.
+
+Write a compact digest of the session for later progress reviews:
+- What was asked (topics, not full questions)
+- How well each area was answered, with concrete mistakes
+- Overall level shown in this session
+
+Keep it under 120 words. Be factual and do not invent answers.
+Return only one complete string as digest."""
+
+    content = f"Session Question & Answers:\n{json.dumps(pairs, indent=2)}"
+
+    response_format = {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "session_digest",
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "digest": {
+                        "type": "string"
+                    }
+                },
+                "required": ["digest"]
+            }
+        }
+    }
+
+    response = await call_chatgpt(prompt, content, 0.2, response_format, route=kind)
+
+    try:
+        return json.loads(response.choices[0].message.content)["digest"]
+    except Exception:
+        raise HTTPException(
+            status_code=500,
+            detail="Invalid JSON returned by AI"
+        )
@@ -1,21 +1,18 @@
 from fastapi import HTTPException
 from model import call_chatgpt
 import json
-from utils.resume import extract_text_with_ocr, extract_text_without_ocr
+import asyncio
+from utils.artifacts import get_artifact, store_artifact, summary_field
 
 
-def process_resume(pdf_path, ocr_mode="N"):
+async def summarize_resume(extracted_text, sha256=None, ocr_mode="N"):
 
-    if ocr_mode.upper() == "Y":
-        extracted_text = extract_text_with_ocr(pdf_path)
-    else:
-        extracted_text = extract_text_without_ocr(pdf_path)
+    # the same bytes were summarized before, here or in a contest
+    if sha256:
+        summary = await asyncio.to_thread(get_artifact, sha256, summary_field(ocr_mode))
 
-    if not extracted_text.strip():
-        raise HTTPException(
-            status_code=400,
-            detail="No text extracted from PDF."
-        )
+        if summary is not None:
+            return summary
 
     prompt = f""" You are a professional technical resume analyzer. Analyze the resume and:
       - Identify technical skills and tools
@@ -52,7 +49,7 @@ def process_resume(pdf_path, ocr_mode="N"):
         }
     }
 
-    response = call_chatgpt(prompt, content, 0.2, response_format)
+    response = await call_chatgpt(prompt, content, 0.2, response_format, route="resume")
 
 
 
@@ -67,6 +64,9 @@ def process_resume(pdf_path, ocr_mode="N"):
             detail="Invalid JSON returned by AI"
         )
 
+    if sha256:
+        await asyncio.to_thread(store_artifact, sha256, summary_field(ocr_mode), summary_str)
+
     return summary_str
 
 
@@ -75,7 +75,7 @@ def process_resume(pdf_path, ocr_mode="N"):
 
 
 
-def generate_resume_question(
+async def generate_resume_question(
     summary_text: str,
     num_questions: int,
     previous_sessions: list
@@ -168,7 +168,7 @@ Previous Sessions:
         }
     }
 
-    response = call_chatgpt(prompt, content, 0.4, response_format)
+    response = await call_chatgpt(prompt, content, 0.4, response_format, route="resume")
 
     try:
         response_content = response.choices[0].message.content
@@ -193,7 +193,7 @@ Previous Sessions:
 
 
 
-def evaluate_resume_answers(summary_text: str, question_bank: list):
+async def evaluate_resume_answers(summary_text: str, question_bank: list):
 
     prompt = """
     You are a senior technical interviewer evaluating candidate answers based on his resume summary.
@@ -264,7 +264,7 @@ def evaluate_resume_answers(summary_text: str, question_bank: list):
         }
     }
 
-    response = call_chatgpt(prompt, content, 0.2, response_format)
+    response = await call_chatgpt(prompt, content, 0.2, response_format, route="resume")
 
     try:
         response_content = response.choices[0].message.content
@@ -284,7 +284,7 @@ def evaluate_resume_answers(summary_text: str, question_bank: list):
 
 
 
-def generate_resume_combined_diff_session_feedback(summary_text: str, session_data: dict):
+async def generate_resume_combined_diff_session_feedback(summary_text: str, session_data: dict):
 
     prompt = """
 You are a senior technical interview evaluator.
@@ -366,7 +366,7 @@ Return strictly valid JSON:
         }
     }
 
-    response = call_chatgpt(prompt, content, 0.2, response_format)
+    response = await call_chatgpt(prompt, content, 0.2, response_format, route="resume")
 
     try:
         content = response.choices[0].message.content
@@ -379,7 +379,7 @@ Return strictly valid JSON:
 
 
 
-def generate_resume_combined_same_session_feedback(summary_text: str, session_data: dict):
+async def generate_resume_combined_same_session_feedback(summary_text: str, session_data: dict):
 
     prompt = """
 You are a senior technical interview evaluator.
@@ -462,7 +462,7 @@ Return strictly valid JSON:
         }
     }
 
-    response = call_chatgpt(prompt, content, 0.2, response_format)
+    response = await call_chatgpt(prompt, content, 0.2, response_format, route="resume")
 
     try:
         content = response.choices[0].message.content
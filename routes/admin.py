@@ -1,27 +1,33 @@
-from fastapi import APIRouter, HTTPException, Depends
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from database import admin_collection, contest_candidate_collection, contest_leaderboard
 from schemas.user import UserCreate
 from verify.token import verify_access_token
-from verify.admin import verify_admin_payload, validate_contest_data, verify_contest_id, verify_duplicate_contest
-from prompt.admin import validate_role_skills, generate_resume_questions, generate_concept_questions, generate_hr_questions
-from prompt.admin import generate_coding_ids
+from verify.admin import verify_admin_payload, invalidate_admin, validate_contest_data, verify_contest_id, verify_duplicate_contest
+from verify.admin import verify_export_round, verify_export_format, verify_candidate_cursor
+from utils.contest_builder import build_contest_questions
 from database import contest_collection
 from schemas.contest import ContestCreate
 from utils.time import generate_timestamp
-from datetime import datetime, timezone, timedelta
-import asyncio
-from utils.normalizer import normalize_and_rank, finalize_leaderboard
-from utils.admin import run_contest_scheduler, fake_submit_candidate_coding,fake_submit_candidate_concept,fake_submit_candidate_hr
-from bson import ObjectId
-from database import candidate_collection
+from utils.results import compute_resume_result, compute_coding_result, compute_concept_result
+from utils.results import compute_hr_result, compute_leaderboard
+from utils.jobs import schedule_contest_result
 from verify.contest import verify_resume_result_time, verify_hr_result_time,verify_coding_result_time, verify_concept_result_time, verify_leaderboard_declare_time, verify_contest_registry
-from utils.admin import format_leaderboard
+from utils.admin import leaderboard_page, leaderboard_rows, leaderboard_exists, candidate_rows, export_lines
+from utils.admin import LEADERBOARD_COLUMNS, CANDIDATE_COLUMNS
+from typing import Optional
 from verify.candidate import verify_candidate_by_id
 from fastapi.responses import StreamingResponse
-from database import contest_resume_fs, contest_audio_fs, candidate_collection
+from database import contest_resume_fs, contest_audio_fs
 from verify.candidate import verify_candidate_by_id
 from verify.contest import verify_resume_round_data, verify_hr_audio_answer, verify_hr_question
+from utils.llm_cache import cache_stats
+from utils.files import serve_grid_file
+from utils.artifacts import release_blob
+from utils.contest_cache import invalidate_contest
+from utils.round_stats import provisional_leaderboard, delete_round_data
+from utils.leaderboard import attach_names
 
 
 security = HTTPBearer()
@@ -31,6 +37,14 @@ router = APIRouter(
     tags=["admin"]
 )
 
+LEADERBOARD_EXPORTS = {
+    "resume": ("resume_round", verify_resume_result_time),
+    "coding": ("coding_round", verify_coding_result_time),
+    "concept": ("concept_round", verify_concept_result_time),
+    "hr": ("hr_round", verify_hr_result_time),
+    "final": ("final_leaderboard", verify_leaderboard_declare_time)
+}
+
 
 
 @router.patch("/register")
@@ -60,6 +74,7 @@ def register_admin(
         {"_id": admin_id},
         {"$set": update_data}
     )
+    invalidate_admin(admin_id)
 
     return {
         "success": True,
@@ -92,6 +107,7 @@ def change_admin_details(
         {"_id": admin_id},
         {"$set": update_data}
     )
+    invalidate_admin(admin_id)
 
     return {
         "success": True,
@@ -121,6 +137,23 @@ def get_admin_profile(
 
 
 
+@router.get("/monitor/llm-cache")
+def get_llm_cache_stats(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
+
+    token = credentials.credentials
+    payload = verify_access_token(token)
+    verify_admin_payload(payload)
+
+    return {
+        "success": True,
+        "data": cache_stats()
+    }
+
+
+
+
 
 
 
@@ -128,65 +161,36 @@ def get_admin_profile(
 
 
 @router.post("/create-contest")
-def create_contest(
+async def create_contest(
     data: ContestCreate,
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
 
     token = credentials.credentials
     payload = verify_access_token(token)
-    admin, admin_id, email = verify_admin_payload(payload)
-    verify_duplicate_contest(data)
+    admin, admin_id, email = await asyncio.to_thread(verify_admin_payload, payload)
+    await asyncio.to_thread(verify_duplicate_contest, data)
 
 
     validate_contest_data(data)
-    validate_role_skills(
-    data.role.value,
-    [s.value for s in data.skills]
-    )
 
-    resume_questions = generate_resume_questions(
-        data.company.value,
-        data.role.value,
-        [s.value for s in data.skills],
-        data.resume_questions_count
-    )
-    resume_questions = {str(i + 1): q for i, q in enumerate(resume_questions)}
-
-    coding_questions = generate_coding_ids(
-        data.company.value,
-        data.coding_questions_count
-    )
-
-    concept_questions = generate_concept_questions(
-        data.role.value,
-        [s.value for s in data.skills],
-        data.concept_questions_count
-    )
-    concept_questions = {str(i + 1): q for i, q in enumerate(concept_questions)}
-
-    hr_questions = generate_hr_questions(
-        data.role.value,
-        data.hr_questions_count-1
-    )
-    hr_questions = {str(i + 2): q for i, q in enumerate(hr_questions)}
-    hr_questions["1"] = "Introduce Yourself"
+    # validation, the three question sets and the coding draw run together
+    questions = await build_contest_questions(data)
     
     contest_data = data.model_dump()
     contest_data["admin_created_id"] = admin_id
     contest_data["skills"] = sorted([s.value for s in data.skills])
-    contest_data["resume_round"]["questions"] = resume_questions
-    contest_data["coding_round"]["questions"] = coding_questions
-    contest_data["concept_round"]["questions"] = concept_questions
-    contest_data["hr_round"]["questions"] = hr_questions
-    contest_data["registered_candidates"] = []
+    contest_data["resume_round"]["questions"] = questions["resume"]
+    contest_data["coding_round"]["questions"] = questions["coding"]
+    contest_data["concept_round"]["questions"] = questions["concept"]
+    contest_data["hr_round"]["questions"] = questions["hr"]
     contest_data["candidate_count"] = 0
     contest_data["created_on"] = generate_timestamp()
     contest_data["fake_submit_coding"] = []
     contest_data["fake_submit_concept"] = []
     contest_data["fake_submit_hr"] = []
 
-    inserted = contest_collection.insert_one(contest_data)
+    inserted = await asyncio.to_thread(contest_collection.insert_one, contest_data)
 
     return {
         "success":True
@@ -261,112 +265,80 @@ def get_contest_details(
 
 
 
-@router.post("/result/resume")
-async def generate_resume_result(
+@router.get("/result/progress")
+def get_scoring_progress(
     contest_id: str,
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
     token = credentials.credentials
     payload = verify_access_token(token)
-    admin, admin_id, email = verify_admin_payload(payload)
-
+    verify_admin_payload(payload)
     contest, contest_obj_id = verify_contest_id(contest_id)
 
-    
-
-    candidates = list(
-        contest_candidate_collection.find(
-            {
-                "contest_id": contest_obj_id,
-                "resume": {"$exists": True}
-            },
-            {
-                "_id": 0,
-                "candidate_id": 1,
-                "resume.question_bank": 1,
-                "resume.submitted_at": 1
+    return {
+        "success": True,
+        "data": {
+            round_name: {
+                **contest.get("scoring", {}).get(round_name, {}),
+                "remaining": len(contest.get(f"fake_submit_{round_name}", []))
             }
-        )
-    )
-
-    if not candidates:
-        raise HTTPException(status_code=404, detail="No resumes submitted for this contest")
-
-
-    question_count = contest["resume_questions_count"]
-
-    # initialize question-wise container
-    candidates_scores = [[] for _ in range(question_count)]
-
-
-    for candidate in candidates:
+            for round_name in ["coding", "concept", "hr"]
+        }
+    }
 
-        candidate_id = candidate["candidate_id"]
-        question_bank = candidate["resume"]["question_bank"]
 
-        for q in question_bank:
 
-            qid = int(q["question_id"]) - 1
-            score = q["score"]
 
-            candidates_scores[qid].append({
-                "candidate_id": str(candidate_id),
-                "raw_score": score,
-                "submitted_at": datetime.min.replace(tzinfo=timezone.utc)
-            })
+@router.get("/result/provisional")
+def get_provisional_result(
+    contest_id: str,
+    round: str,
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
+    token = credentials.credentials
+    payload = verify_access_token(token)
+    verify_admin_payload(payload)
+    contest, contest_obj_id = verify_contest_id(contest_id)
+    round_name = verify_export_round(round)
 
-    all_candidates = contest["registered_candidates"]
-    all_candidates_str = {str(cid) for cid in all_candidates}
-    participated = {entry["candidate_id"] for entry in candidates_scores[0]}
-    missing_candidates = all_candidates_str - participated
+    leaderboard, stats = provisional_leaderboard(contest, round_name)
+    attach_names(leaderboard)
 
-    for qid in range(question_count):
+    return {
+        "success": True,
+        "data": [
+            {
+                "candidate_id": str(entry["candidate_id"]),
+                "name": entry["name"],
+                "rank": entry["rank"],
+                "percentile": entry["percentile"],
+                "score": entry["final_normalized_score"],
+                "latest_submission": entry["latest_submission"]
+            }
+            for entry in leaderboard
+        ],
+        "questions": stats
+    }
 
-        min_score = min(entry["raw_score"] for entry in candidates_scores[qid])
-        penalty_score = min_score - 1
 
-        for cid in missing_candidates:
-            candidates_scores[qid].append({
-                "candidate_id": cid,
-                "raw_score": penalty_score,
-                "submitted_at": datetime.min.replace(tzinfo=timezone.utc) + timedelta(seconds=600)
-            })
-    
 
-    leaderboard = normalize_and_rank(candidates_scores)
 
-    resume_leaderboard = []
 
-    for entry in leaderboard:
 
-        resume_leaderboard.append({
-            "candidate_id": ObjectId(entry["candidate_id"]),
-            "final_normalized_score": entry["final_normalized_score"],
-            "latest_submission": entry["latest_submission"],
-            "rank": entry["rank"],
-            "percentile": entry["percentile"]
-        })
 
-    # top X candidates
-    x = contest.get("selected_resume", 0)
 
-    selected_resume_candidates = [
-        entry["candidate_id"]
-        for entry in resume_leaderboard[:x]
-    ]
+@router.post("/result/resume")
+async def generate_resume_result(
+    contest_id: str,
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
+    token = credentials.credentials
+    payload = verify_access_token(token)
+    admin, admin_id, email = verify_admin_payload(payload)
 
-    contest_leaderboard.update_one(
-        {"contest_id": contest_obj_id},
-        {
-            "$set": {
-                "resume_round": resume_leaderboard,
-                "selected_resume_candidates": selected_resume_candidates
-            }
-        },
-        upsert=True
-    )
+    contest, contest_obj_id = verify_contest_id(contest_id)
 
-    return
+    await compute_resume_result(contest, contest_obj_id)
 
 
 
@@ -384,117 +356,8 @@ async def generate_coding_result(
     payload = verify_access_token(token)
     admin, admin_id, email = verify_admin_payload(payload)
     contest, contest_obj_id = verify_contest_id(contest_id)
-    fake_submit_candidate_coding(contest_obj_id, contest)
 
-    coding_ids = contest["coding_round"]["questions"]
-
-    coding_ids_map = {qid: i for i, qid in enumerate(coding_ids)}
-
-    candidates = list(
-        contest_candidate_collection.find(
-            {
-                "contest_id": contest_obj_id,
-                "coding": {"$exists": True}
-            },
-            {
-                "_id": 0,
-                "candidate_id": 1,
-                "coding.question_bank.question_id": 1,
-                "coding.question_bank.score": 1,
-                "coding.question_bank.timestamp": 1,
-                "coding.start_time": 1
-            }
-        )
-    )
-
-    if not candidates:
-        raise HTTPException(status_code=404, detail="No codings submitted for this contest")
-
-
-    question_count = len(coding_ids)
-    candidates_scores = [[] for _ in range(question_count)]
-    duration = contest["coding_round"]["duration"] * 2
-
-    for candidate in candidates:
-
-        candidate_id = candidate["candidate_id"]
-        coding = candidate.get("coding", {})
-        start_time = coding.get("start_time")
-        question_bank = coding.get("question_bank", [])
-
-        qb_map = {q["question_id"]: q for q in question_bank}
-
-        for qid in coding_ids:
-
-            q = qb_map.get(qid)
-
-            if q["score"] is None:
-                score = 0
-            else:
-                score = q["score"]
-
-
-            if q["timestamp"] is None or start_time is None:
-                timestamp = datetime.min.replace(tzinfo=timezone.utc) + timedelta(seconds=duration)
-            else:
-                timestamp = (datetime.min + (q["timestamp"] - start_time)).replace(tzinfo=timezone.utc)
-
-            index = coding_ids_map[qid]
-
-            candidates_scores[index].append({
-                "candidate_id": str(candidate_id),
-                "raw_score": score,
-                "submitted_at": timestamp
-            })
-
-
-    all_candidates = contest["registered_candidates"]
-    all_candidates_str = {str(cid) for cid in all_candidates}
-    participated = {entry["candidate_id"] for entry in candidates_scores[0]}
-    missing_candidates = all_candidates_str - participated
-
-    for qid in range(question_count):
-
-        min_score = min(entry["raw_score"] for entry in candidates_scores[qid])
-        penalty_score = min_score - 1
-
-        for cid in missing_candidates:
-            candidates_scores[qid].append({
-                "candidate_id": cid,
-                "raw_score": penalty_score,
-                "submitted_at":  datetime.min.replace(tzinfo=timezone.utc) + timedelta(seconds=duration)
-            })
-
-    leaderboard = normalize_and_rank(candidates_scores)
-
-    coding_leaderboard = []
-
-    for entry in leaderboard:
-        coding_leaderboard.append({
-            "candidate_id": ObjectId(entry["candidate_id"]),
-            "final_normalized_score": entry["final_normalized_score"],
-            "latest_submission": entry["latest_submission"],
-            "rank": entry["rank"],
-            "percentile": entry["percentile"]
-        })
-
-    x = contest.get("selected_coding", 0)
-
-    selected_coding_candidates = [
-        entry["candidate_id"]
-        for entry in coding_leaderboard[:x]
-    ]
-
-    contest_leaderboard.update_one(
-        {"contest_id": contest_obj_id},
-        {
-            "$set": {
-                "coding_round": coding_leaderboard,
-                "selected_coding_candidates": selected_coding_candidates
-            }
-        },
-        upsert=True
-    )
+    await compute_coding_result(contest, contest_obj_id)
 
 
 
@@ -512,126 +375,8 @@ async def generate_concept_result(
     payload = verify_access_token(token)
     admin, admin_id, email = verify_admin_payload(payload)
     contest, contest_obj_id = verify_contest_id(contest_id)
-    fake_submit_candidate_concept(contest_obj_id, contest)
-
-    concept_ids = list(contest["concept_round"]["questions"].keys())
-    concept_index_map = {qid: i for i, qid in enumerate(concept_ids)}
 
-
-    candidates = list(
-        contest_candidate_collection.find(
-            {
-                "contest_id": contest_obj_id,
-                "concept": {"$exists": True}
-            },
-            {
-                "_id": 0,
-                "candidate_id": 1,
-                "concept.question_bank.question_id": 1,
-                "concept.question_bank.score": 1,
-                "concept.question_bank.timestamp": 1,
-                "concept.start_time": 1
-            }
-        )
-    )
-
-    if not candidates:
-        raise HTTPException(status_code=404, detail="No concepts submitted for this contest")
-
-
-    question_count = len(concept_ids)
-
-    # initialize question-wise container
-    candidates_scores = [[] for _ in range(question_count)]
-    duration = contest["concept_round"]["duration"] * 2
-
-
-    for candidate in candidates:
-
-        candidate_id = candidate["candidate_id"]
-        concept = candidate.get("concept", {})
-        start_time = concept.get("start_time")
-        question_bank = concept.get("question_bank", [])
-
-        
-
-        qb_map = {q["question_id"]: q for q in question_bank}
-
-        for qid in concept_ids:
-
-            q = qb_map.get(qid)
-
-            if q["score"] is None:
-                score = 0
-            else:
-                score = q["score"]
-
-
-            if q["timestamp"] is None or start_time is None:
-                timestamp = datetime.min.replace(tzinfo=timezone.utc) + timedelta(seconds=duration)
-            else:
-                timestamp = (datetime.min + (q["timestamp"] - start_time)).replace(tzinfo=timezone.utc)
-
-
-            index = concept_index_map[qid]
-
-            candidates_scores[index].append({
-                "candidate_id": str(candidate_id),
-                "raw_score": score,
-                "submitted_at": timestamp
-            })
-
-    all_candidates = contest["registered_candidates"]
-    all_candidates_str = {str(cid) for cid in all_candidates}
-    participated = {entry["candidate_id"] for entry in candidates_scores[0]}
-    missing_candidates = all_candidates_str - participated
-
-    for qid in range(question_count):
-
-        min_score = min(entry["raw_score"] for entry in candidates_scores[qid])
-        penalty_score = min_score - 1
-
-        for cid in missing_candidates:
-            candidates_scores[qid].append({
-                "candidate_id": cid,
-                "raw_score": penalty_score,
-                "submitted_at": datetime.min.replace(tzinfo=timezone.utc) + timedelta(seconds=duration)
-            })
-
-    leaderboard = normalize_and_rank(candidates_scores)
-
-    concept_leaderboard = []
-
-    for entry in leaderboard:
-
-        concept_leaderboard.append({
-            "candidate_id": ObjectId(entry["candidate_id"]),
-            "final_normalized_score": entry["final_normalized_score"],
-            "latest_submission": entry["latest_submission"],
-            "rank": entry["rank"],
-            "percentile": entry["percentile"]
-        })
-
-    # top X candidates
-    x = contest.get("selected_concept", 0)
-
-    selected_concept_candidates = [
-        entry["candidate_id"]
-        for entry in concept_leaderboard[:x]
-    ]
-
-    contest_leaderboard.update_one(
-        {"contest_id": contest_obj_id},
-        {
-            "$set": {
-                "concept_round": concept_leaderboard,
-                "selected_concept_candidates": selected_concept_candidates
-            }
-        },
-        upsert=True
-    )
-
-    return
+    await compute_concept_result(contest, contest_obj_id)
 
 
 
@@ -649,127 +394,11 @@ async def generate_hr_result(
     payload = verify_access_token(token)
     admin, admin_id, email = verify_admin_payload(payload)
     contest, contest_obj_id = verify_contest_id(contest_id)
-    fake_submit_candidate_hr(contest_obj_id, contest)
-
-    hr_ids = list(contest["hr_round"]["questions"].keys())
-    hr_index_map = {qid: i for i, qid in enumerate(hr_ids)}
-
-
-    candidates = list(
-        contest_candidate_collection.find(
-            {
-                "contest_id": contest_obj_id,
-                "hr": {"$exists": True}
-            },
-            {
-                "_id": 0,
-                "candidate_id": 1,
-                "hr.question_bank.question_id": 1,
-                "hr.question_bank.score": 1,
-                "hr.question_bank.timestamp": 1,
-                "hr.start_time": 1
-            }
-        )
-    )
-
-    if not candidates:
-        raise HTTPException(status_code=404, detail="No HR submissions found for this contest")
-
-
-    question_count = len(hr_ids)
-
-    # initialize question-wise container
-    candidates_scores = [[] for _ in range(question_count)]
-    duration = contest["hr_round"]["duration"] * 2
-
-
-    for candidate in candidates:
-
-        candidate_id = candidate["candidate_id"]
-        hr = candidate.get("hr", {})
-        start_time = hr.get("start_time")
-        question_bank = hr.get("question_bank", [])
-
-        
-
-        qb_map = {q["question_id"]: q for q in question_bank}
-
-        for qid in hr_ids:
-
-            q = qb_map.get(qid)
-
-            if q["score"] is None:
-                score = 0
-            else:
-                score = q["score"]
-
-
-            if q["timestamp"] is None or start_time is None:
-                timestamp = datetime.min.replace(tzinfo=timezone.utc) + timedelta(seconds=duration)
-            else:
-                timestamp = (datetime.min + (q["timestamp"] - start_time)).replace(tzinfo=timezone.utc)
-
-
-            index = hr_index_map[qid]
-
-            candidates_scores[index].append({
-                "candidate_id": str(candidate_id),
-                "raw_score": score,
-                "submitted_at": timestamp
-            })
-
-
-    all_candidates = contest["registered_candidates"]
-    all_candidates_str = {str(cid) for cid in all_candidates}
-    participated = {entry["candidate_id"] for entry in candidates_scores[0]}
-    missing_candidates = all_candidates_str - participated
-
-    for qid in range(question_count):
-
-        min_score = min(entry["raw_score"] for entry in candidates_scores[qid])
-        penalty_score = min_score - 1
-
-        for cid in missing_candidates:
-            candidates_scores[qid].append({
-                "candidate_id": cid,
-                "raw_score": penalty_score,
-                "submitted_at": datetime.min.replace(tzinfo=timezone.utc) + timedelta(seconds=duration)
-            })
-
-    leaderboard = normalize_and_rank(candidates_scores)
 
-    hr_leaderboard = []
+    await compute_hr_result(contest, contest_obj_id)
 
-    for entry in leaderboard:
 
-        hr_leaderboard.append({
-            "candidate_id": ObjectId(entry["candidate_id"]),
-            "final_normalized_score": entry["final_normalized_score"],
-            "latest_submission": entry["latest_submission"],
-            "rank": entry["rank"],
-            "percentile": entry["percentile"]
-        })
-
-    # top X candidates
-    x = contest.get("selected_hr", 0)
 
-    selected_hr_candidates = [
-        entry["candidate_id"]
-        for entry in hr_leaderboard[:x]
-    ]
-
-    contest_leaderboard.update_one(
-        {"contest_id": contest_obj_id},
-        {
-            "$set": {
-                "hr_round": hr_leaderboard,
-                "selected_hr_candidates": selected_hr_candidates
-            }
-        },
-        upsert=True
-    )
-
-    return
 
 
 
@@ -785,90 +414,12 @@ async def generate_leaderboard(
     admin, admin_id, email = verify_admin_payload(payload)
     contest, contest_obj_id = verify_contest_id(contest_id)
 
-    leaderboard_doc = contest_leaderboard.find_one(
-        {"contest_id": contest_obj_id},
-        {
-            "_id": 0,
-            "resume_round": 1,
-            "coding_round": 1,
-            "concept_round": 1,
-            "hr_round": 1
-        }
-    )
-
-    if not leaderboard_doc:
-        raise HTTPException(status_code=404, detail="No round leaderboards found")
-
-    section_outputs = []
-    timeMap = {}
-
-    def convert_section(section):
-
-        converted = []
-
-        for entry in section:
-            
-            cid = str(entry["candidate_id"])
-            diff = entry["latest_submission"].replace(tzinfo=timezone.utc) - datetime.min.replace(tzinfo=timezone.utc)
-            timeMap[cid] = timeMap.get(cid, timedelta()) + diff
-            converted.append({
-                "candidate_id": cid,
-                "final_normalized_score": entry["final_normalized_score"],
-                "latest_submission": timeMap[cid]
-            })
-
-        return converted
-
-    if leaderboard_doc.get("resume_round"):
-        section_outputs.append(convert_section(leaderboard_doc["resume_round"]))
-
-    if leaderboard_doc.get("coding_round"):
-        section_outputs.append(convert_section(leaderboard_doc["coding_round"]))
+    await compute_leaderboard(contest, contest_obj_id)
 
-    if leaderboard_doc.get("concept_round"):
-        section_outputs.append(convert_section(leaderboard_doc["concept_round"]))
 
-    if leaderboard_doc.get("hr_round"):
-        section_outputs.append(convert_section(leaderboard_doc["hr_round"]))
 
-    if not section_outputs:
-        raise HTTPException(status_code=404, detail="No section leaderboards available")
 
 
-    final_leaderboard = finalize_leaderboard(section_outputs)
-
-    formatted = []
-
-    for entry in final_leaderboard:
-
-        formatted.append({
-            "candidate_id": ObjectId(entry["candidate_id"]),
-            "final_normalized_score": entry["final_normalized_score"],
-            "latest_submission": entry["latest_submission"],
-            "rank": entry["rank"],
-            "percentile": entry["percentile"]
-        })
-
-    x = contest.get("selected_hr", 0)
-
-    selected_candidates = [
-        entry["candidate_id"]
-        for entry in formatted[:x]
-    ]
-
-    contest_leaderboard.update_one(
-        {"contest_id": contest_obj_id},
-        {
-            "$set": {
-                "final_leaderboard": formatted,
-                "selected_candidates": selected_candidates
-            }
-        },
-        upsert=True
-    )
-
-    return
-
 
 
 
@@ -884,17 +435,7 @@ async def start_contest(
 
     contest, contest_obj_id = verify_contest_id(contest_id)
 
-    asyncio.create_task(
-        run_contest_scheduler(
-            contest,
-            token,
-            generate_hr_result,
-            generate_coding_result,
-            generate_resume_result, 
-            generate_concept_result, 
-            generate_leaderboard
-        )
-    )
+    schedule_contest_result(contest)
 
     return {
         "success": True,
@@ -907,6 +448,9 @@ async def start_contest(
 @router.get("/contest/candidates")
 def get_registered_candidates(
     contest_id: str,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    round: Optional[str] = None,
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
     token = credentials.credentials
@@ -915,72 +459,61 @@ def get_registered_candidates(
 
     contest, contest_obj_id = verify_contest_id(contest_id)
 
-    contest_candidates = list(
-        contest_candidate_collection.aggregate([
-            {
-                "$match": {"contest_id": contest_obj_id}
-            },
-            {
-                "$project": {
-                    "_id": 0,
-                    "candidate_id": 1,
-                    "resume": {"$ne": ["$resume", None]},
-                    "coding": {"$ne": ["$coding", None]},
-                    "concept": {"$ne": ["$concept", None]},
-                    "hr": {"$ne": ["$hr", None]}
-                }
-            }
-        ])
-    )
+    round_name = verify_export_round(round) if round else None
+    cursor_id = verify_candidate_cursor(cursor)
 
-    candidate_ids = [doc["candidate_id"] for doc in contest_candidates]
+    if limit is not None and limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be positive")
 
-    candidates = list(
-        candidate_collection.find(
-            {"_id": {"$in": candidate_ids}},
-            {"full_name": 1, "email": 1}
-        )
-    )
+    data = []
+    next_cursor = None
 
-    candidate_map = {
-        c["_id"]: {
-            "name": c.get("full_name"),
-            "email": c.get("email")
-        }
-        for c in candidates
-    }
+    for candidate_id, row in candidate_rows(contest_obj_id, round_name, cursor_id, limit):
+        data.append(row)
+        next_cursor = str(candidate_id)
 
-    data = []
-    for cc in contest_candidates:
-        meta = candidate_map.get(cc["candidate_id"], {})
-
-        if cc["hr"]:
-            last_round = "hr"
-        elif cc["concept"]:
-            last_round = "concept"
-        elif cc["coding"]:
-            last_round = "coding"
-        elif cc["resume"]:
-            last_round = "resume"
-        else:
-            last_round = None
-
-        data.append({
-            "candidate_id": str(cc["candidate_id"]),
-            "name": meta.get("name"),
-            "email": meta.get("email"),
-            "last_round_participated": last_round
-        })
+    if not limit or len(data) < limit:
+        next_cursor = None
 
     return {
         "success": True,
-        "data": data
+        "data": data,
+        "next_cursor": next_cursor
     }
 
 
+
+
+@router.get("/contest/candidates/export")
+def export_registered_candidates(
+    contest_id: str,
+    round: Optional[str] = None,
+    format: str = "ndjson",
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
+    token = credentials.credentials
+    payload = verify_access_token(token)
+    admin, admin_id, email = verify_admin_payload(payload)
+
+    contest, contest_obj_id = verify_contest_id(contest_id)
+    round_name = verify_export_round(round) if round else None
+    media_type = verify_export_format(format)
+
+    return StreamingResponse(
+        export_lines(candidate_rows(contest_obj_id, round_name), CANDIDATE_COLUMNS, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{contest_id}_candidates.{format}"'}
+    )
+
+
 @router.get("/leaderboard/resume")
 def view_resume_leaderboard(
     contest_id: str,
+    limit: Optional[int] = None,
+    cursor: Optional[int] = None,
+    min_rank: Optional[int] = None,
+    max_rank: Optional[int] = None,
+    order: str = "asc",
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
     token = credentials.credentials
@@ -990,23 +523,26 @@ def view_resume_leaderboard(
     contest, contest_obj_id = verify_contest_id(contest_id)
     verify_resume_result_time(generate_timestamp(), contest)
 
-    leaderboard_doc = contest_leaderboard.find_one(
-        {"contest_id": contest_obj_id},
-        {"resume_round": 1, "_id": 0}
+    return leaderboard_page(
+        contest_obj_id,
+        "resume_round",
+        "Resume leaderboard not found",
+        limit,
+        cursor,
+        min_rank,
+        max_rank,
+        order
     )
 
-    if not leaderboard_doc or "resume_round" not in leaderboard_doc:
-        raise HTTPException(status_code=404, detail="Resume leaderboard not found")
-
-    return {
-        "success": True,
-        "data": format_leaderboard(leaderboard_doc["resume_round"])
-    }
-
 
 @router.get("/leaderboard/coding")
 def view_coding_leaderboard(
     contest_id: str,
+    limit: Optional[int] = None,
+    cursor: Optional[int] = None,
+    min_rank: Optional[int] = None,
+    max_rank: Optional[int] = None,
+    order: str = "asc",
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
 
@@ -1017,24 +553,27 @@ def view_coding_leaderboard(
     contest, contest_obj_id = verify_contest_id(contest_id)
     verify_coding_result_time(generate_timestamp(), contest)
 
-    leaderboard_doc = contest_leaderboard.find_one(
-        {"contest_id": contest_obj_id},
-        {"coding_round": 1, "_id": 0}
+    return leaderboard_page(
+        contest_obj_id,
+        "coding_round",
+        "Coding leaderboard not found",
+        limit,
+        cursor,
+        min_rank,
+        max_rank,
+        order
     )
 
-    if not leaderboard_doc or "coding_round" not in leaderboard_doc:
-        raise HTTPException(status_code=404, detail="Coding leaderboard not found")
-
-    return {
-        "success": True,
-        "data": format_leaderboard(leaderboard_doc["coding_round"])
-    }
-
 
 
 @router.get("/leaderboard/concept")
 def view_concept_leaderboard(
     contest_id: str,
+    limit: Optional[int] = None,
+    cursor: Optional[int] = None,
+    min_rank: Optional[int] = None,
+    max_rank: Optional[int] = None,
+    order: str = "asc",
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
 
@@ -1045,23 +584,26 @@ def view_concept_leaderboard(
     contest, contest_obj_id = verify_contest_id(contest_id)
     verify_concept_result_time(generate_timestamp(), contest)
 
-    leaderboard_doc = contest_leaderboard.find_one(
-        {"contest_id": contest_obj_id},
-        {"concept_round": 1, "_id": 0}
+    return leaderboard_page(
+        contest_obj_id,
+        "concept_round",
+        "Concept leaderboard not found",
+        limit,
+        cursor,
+        min_rank,
+        max_rank,
+        order
     )
 
-    if not leaderboard_doc or "concept_round" not in leaderboard_doc:
-        raise HTTPException(status_code=404, detail="Concept leaderboard not found")
-
-    return {
-        "success": True,
-        "data": format_leaderboard(leaderboard_doc["concept_round"])
-    }
-
 
 @router.get("/leaderboard/hr")
 def view_hr_leaderboard(
     contest_id: str,
+    limit: Optional[int] = None,
+    cursor: Optional[int] = None,
+    min_rank: Optional[int] = None,
+    max_rank: Optional[int] = None,
+    order: str = "asc",
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
 
@@ -1072,23 +614,26 @@ def view_hr_leaderboard(
     contest, contest_obj_id = verify_contest_id(contest_id)
     verify_hr_result_time(generate_timestamp(), contest)
 
-    leaderboard_doc = contest_leaderboard.find_one(
-        {"contest_id": contest_obj_id},
-        {"hr_round": 1, "_id": 0}
+    return leaderboard_page(
+        contest_obj_id,
+        "hr_round",
+        "HR leaderboard not found",
+        limit,
+        cursor,
+        min_rank,
+        max_rank,
+        order
     )
 
-    if not leaderboard_doc or "hr_round" not in leaderboard_doc:
-        raise HTTPException(status_code=404, detail="HR leaderboard not found")
-
-    return {
-        "success": True,
-        "data": format_leaderboard(leaderboard_doc["hr_round"])
-    }
-
 
 @router.get("/leaderboard/final")
 def view_final_leaderboard(
     contest_id: str,
+    limit: Optional[int] = None,
+    cursor: Optional[int] = None,
+    min_rank: Optional[int] = None,
+    max_rank: Optional[int] = None,
+    order: str = "asc",
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
 
@@ -1099,18 +644,51 @@ def view_final_leaderboard(
     contest, contest_obj_id = verify_contest_id(contest_id)
     verify_leaderboard_declare_time(generate_timestamp(), contest)
 
-    leaderboard_doc = contest_leaderboard.find_one(
-        {"contest_id": contest_obj_id},
-        {"final_leaderboard": 1, "_id": 0}
+    return leaderboard_page(
+        contest_obj_id,
+        "final_leaderboard",
+        "Final leaderboard not found",
+        limit,
+        cursor,
+        min_rank,
+        max_rank,
+        order
     )
 
-    if not leaderboard_doc or "final_leaderboard" not in leaderboard_doc:
-        raise HTTPException(status_code=404, detail="Final leaderboard not found")
 
-    return {
-        "success": True,
-        "data": format_leaderboard(leaderboard_doc["final_leaderboard"])
-    }
+
+
+@router.get("/leaderboard/export")
+def export_leaderboard(
+    contest_id: str,
+    round: str,
+    format: str = "ndjson",
+    min_rank: Optional[int] = None,
+    max_rank: Optional[int] = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
+
+    token = credentials.credentials
+    payload = verify_access_token(token)
+    admin, admin_id, email = verify_admin_payload(payload)
+
+    contest, contest_obj_id = verify_contest_id(contest_id)
+    round_name = verify_export_round(round, final=True)
+    media_type = verify_export_format(format)
+
+    board_key, verify_result_time = LEADERBOARD_EXPORTS[round_name]
+    verify_result_time(generate_timestamp(), contest)
+
+    if not leaderboard_exists(contest_obj_id, board_key):
+        raise HTTPException(status_code=404, detail="Leaderboard not found")
+
+    rows = leaderboard_rows(contest_obj_id, board_key, min_rank, max_rank)
+
+    return StreamingResponse(
+        export_lines(rows, LEADERBOARD_COLUMNS, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{contest_id}_{round_name}_leaderboard.{format}"'}
+    )
 
 
 
@@ -1156,6 +734,7 @@ def get_candidate_contest_details(
 def get_candidate_resume_file(
     contest_id: str,
     candidate_id: str,
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
     token = credentials.credentials
@@ -1170,15 +749,9 @@ def get_candidate_resume_file(
     resume = verify_resume_round_data(contest_candidate)
     file_id = resume["file_id"]
 
-    try:
-        grid_out = contest_resume_fs.get(file_id)
-    except Exception:
-        raise HTTPException(status_code=404, detail="Resume file not found")
-
-    return StreamingResponse(
-        grid_out,
-        media_type=grid_out.content_type or "application/pdf",
-        headers={"Content-Disposition": f'inline; filename="{grid_out.filename}"'}
+    return serve_grid_file(
+        contest_resume_fs, file_id, request, "application/pdf", "Resume file not found",
+        filename=resume.get("filename", "resume.pdf")
     )
 
 
@@ -1187,6 +760,7 @@ def get_candidate_hr_audio(
     contest_id: str,
     candidate_id: str,
     question_id: str,
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
     token = credentials.credentials
@@ -1202,16 +776,7 @@ def get_candidate_hr_audio(
     question_data = verify_hr_audio_answer(contest_candidate, question_id)
     audio_id = question_data["audio_id"]
 
-    try:
-        grid_out = contest_audio_fs.get(audio_id)
-    except Exception:
-        raise HTTPException(status_code=404, detail="Audio file not found")
-
-    return StreamingResponse(
-        grid_out,
-        media_type=grid_out.content_type or "audio/wav",
-        headers={"Content-Disposition": f'inline; filename="{grid_out.filename}"'}
-    )
+    return serve_grid_file(contest_audio_fs, audio_id, request, "audio/wav", "Audio file not found")
 
 
 @router.delete("/contest/delete")
@@ -1245,7 +810,7 @@ def delete_contest(
 
     for file_id in resume_file_ids:
         try:
-            contest_resume_fs.delete(file_id)
+            release_blob("contest_resume", file_id)
         except Exception:
             pass
 
@@ -1258,6 +823,8 @@ def delete_contest(
     contest_candidate_collection.delete_many({"contest_id": contest_obj_id})
     contest_leaderboard.delete_one({"contest_id": contest_obj_id})
     contest_collection.delete_one({"_id": contest_obj_id})
+    delete_round_data(contest_obj_id)
+    invalidate_contest(contest_obj_id)
 
     return {
         "success": True,
@@ -2,7 +2,7 @@ from fastapi import APIRouter
 from datetime import datetime, timezone, date
 from database import candidate_collection, admin_collection
 from verify.token import verify_google_token,create_access_token
-from verify.admin import verify_admin_by_email
+from verify.admin import verify_admin_by_email, invalidate_admin
 from utils.time import generate_timestamp
 
 
@@ -63,6 +63,7 @@ def google_auth_admin(data: dict):
             {"_id": admin_id},
             {"$set": {"profile_pic": profile_pic}}
         )
+        invalidate_admin(admin_id)
 
 
     today=date.today()
@@ -3,7 +3,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from database import candidate_collection
 from schemas.user import UserCreate
 from verify.token import verify_access_token
-from verify.candidate import verify_candidate_payload
+from verify.candidate import verify_candidate_payload, invalidate_candidate
 
 
 security = HTTPBearer()
@@ -46,6 +46,7 @@ def register_candidate(
         {"_id": candidate_id},
         {"$set": update_data}
     )
+    invalidate_candidate(candidate_id)
 
     return {
         "success": True,
@@ -78,6 +79,7 @@ def change_candidate_details(
         {"_id": candidate_id},
         {"$set": update_data}
     )
+    invalidate_candidate(candidate_id)
 
     return {
         "success": True,
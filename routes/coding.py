@@ -1,9 +1,10 @@
+import asyncio
 from fastapi import APIRouter, Depends,HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from datetime import datetime, timezone, timedelta
 from database import leetcode, coding_collection, coding_question_collection, candidate_collection
 from verify.token import verify_access_token
-from verify.candidate import verify_candidate_payload
+from verify.candidate import verify_candidate_payload, invalidate_candidate
 from constants.company import CompanyEnum
 from constants.tag import TagEnum
 from constants.difficulty import DifficultyEnum
@@ -11,9 +12,12 @@ from constants.language import LanguageEnum
 from typing import Optional, List
 from verify.coding import verify_coding, verify_quantity, verify_question_session, verify_session_status, verify_session_status2, verify_session_time, verify_question_id, verify_timestamp
 from prompt.coding import evaluate_coding_answers, generate_coding_combined_diff_session_feedback, generate_coding_combined_same_session_feedback
-from utils.coding import get_used_coding_question_ids ,previous_coding_session_questions, auto_submit
+from utils.coding import get_coding_used_counts, add_used_questions, release_used_questions, previous_coding_session_questions
+from utils.question_index import count_questions, draw_questions
+from utils.jobs import schedule_session_timeout
 from utils.time import generate_timestamp
-import asyncio
+from utils.history import schedule_session_digest
+from utils.combined_feedback import save_combined_feedback, list_combined_feedback, delete_combined_feedback
 
 router = APIRouter(prefix="/leetcode", tags=["Coding"])
 security = HTTPBearer()
@@ -30,19 +34,11 @@ def start_coding(
     payload = verify_access_token(token)
     candidate, candidate_id, email = verify_candidate_payload(payload)
 
-    query = {}
-
-    if company:
-        query["companies"] = {"$in": [c.value for c in company]}
-
-    if tag:
-        query["tags"] = {"$in": [t.value for t in tag]}
-
-
-    if difficulty:
-        query["difficulty"] = {"$in": [d.value for d in difficulty]}
-
-    available_ques = leetcode.count_documents(query)
+    available_ques = count_questions(
+        [c.value for c in company] if company else None,
+        [t.value for t in tag] if tag else None,
+        [d.value for d in difficulty] if difficulty else None
+    )
 
     if available_ques == 0:
         return {
@@ -52,11 +48,12 @@ def start_coding(
 
     coding_doc = {
     "candidate_id": candidate_id,
-    "coding_number": candidate["total_codings"]+1,
+    "coding_number": candidate_collection.find_one({"_id": candidate_id}, {"total_codings": 1})["total_codings"]+1,
     "company": [c.value for c in company] if company else [],
     "difficulty": [d.value for d in difficulty] if difficulty else [],
     "tag": [t.value for t in tag] if tag else [],
     "available_ques": available_ques,
+    "used_counts": {},
     "created_on": generate_timestamp(),
     "total_sessions":0
     }
@@ -71,6 +68,7 @@ def start_coding(
             }
         }
     )
+    invalidate_candidate(candidate_id)
 
     return {
         "success": True
@@ -178,31 +176,26 @@ async def generate_questions(
     verify_quantity(num_questions, coding)
 
 
-    query = {}
-
-    if coding.get("company"):
-        query["companies"] = {"$in": coding["company"]}
-
-    if coding.get("tag"):
-        query["tags"] = {"$in": coding["tag"]}
-
-    if coding.get("difficulty"):
-        query["difficulty"] = {"$in": coding["difficulty"]}
-
-
     session_number = coding["total_sessions"] + 1       
 
-    if session_number > 1:
-        query["question_id"] = {"$nin": get_used_coding_question_ids(coding_id)}
+    used_counts = get_coding_used_counts(coding)
 
+    question_ids = draw_questions(
+        num_questions,
+        coding.get("company"),
+        coding.get("tag"),
+        coding.get("difficulty"),
+        exclude=[qid for qid, count in used_counts.items() if count > 0]
+    )
 
-    pipeline = [
-        {"$match": query},
-        {"$sample": {"size": num_questions}}
-    ]
+    question_docs = leetcode.find(
+        {"question_id": {"$in": question_ids}},
+        {"_id": 0, "question_id": 1, "task_name": 1, "problem_description": 1}
+    )
+    question_map = {q["question_id"]: q for q in question_docs}
 
-    questions_cursor = leetcode.aggregate(pipeline)
-    questions_list = list(questions_cursor)
+    # a question removed since the index was loaded is skipped
+    questions_list = [question_map[qid] for qid in question_ids if qid in question_map]
 
 
 
@@ -248,6 +241,8 @@ async def generate_questions(
         }
     )
 
+    add_used_questions(coding_id, [q["question_id"] for q in questions_list])
+
     formatted_questions = [
         {
             "question_id": q["question_id"],
@@ -257,16 +252,7 @@ async def generate_questions(
         for q in questions_list
     ]
 
-    asyncio.create_task(
-        auto_submit(
-            str(coding_id),
-            question_session_id=str(question_session_id),
-            token=token,
-            start_time = timestamp,
-            duration = time,
-            fun = submit_session
-        )
-    )
+    schedule_session_timeout("coding", question_session_id, timestamp, time)
 
     return {
         "success":True,
@@ -379,19 +365,15 @@ async def reattempt_session(
         "timestamp": timestamp
     }
 
+    # older sets are counted before this attempt exists
+    get_coding_used_counts(coding_doc)
+
     inserted = coding_question_collection.insert_one(new_doc)
     new_session_id = inserted.inserted_id
 
-    asyncio.create_task(
-        auto_submit(
-            coding_id,
-            question_session_id=str(new_session_id),
-            token=token,
-            start_time = timestamp,
-            duration = old_session_doc["time"],
-            fun = submit_session
-        )
-    )
+    add_used_questions(coding_obj_id, [q["question_id"] for q in new_question_bank])
+
+    schedule_session_timeout("coding", new_session_id, timestamp, old_session_doc["time"])
 
     return {
         "new_question_session_id": str(new_session_id)
@@ -475,7 +457,7 @@ def fake_submit_session(
 
 
 @router.get("/questions/feedback")
-def generate_feedback(
+async def generate_feedback(
     coding_id: str,
     question_session_id: str,
     credentials: HTTPAuthorizationCredentials = Depends(security)
@@ -483,10 +465,11 @@ def generate_feedback(
 
     token = credentials.credentials
     payload = verify_access_token(token)
-    candidate, candidate_id, email = verify_candidate_payload(payload)
+    candidate, candidate_id, email = await asyncio.to_thread(verify_candidate_payload, payload)
 
-    coding_doc, coding_obj_id = verify_coding(coding_id, candidate_id)
-    session_doc, session_obj_id = verify_question_session(
+    coding_doc, coding_obj_id = await asyncio.to_thread(verify_coding, coding_id, candidate_id)
+    session_doc, session_obj_id = await asyncio.to_thread(
+        verify_question_session,
         question_session_id,
         coding_obj_id
     )
@@ -495,10 +478,12 @@ def generate_feedback(
     
 
     question_ids = [q["question_id"] for q in session_doc.get("question_bank")]
-    question_docs = list(
-        leetcode.find(
-            {"question_id": {"$in": question_ids}},
-            {"question_id": 1, "problem_description": 1, "_id": 0}
+    question_docs = await asyncio.to_thread(
+        lambda: list(
+            leetcode.find(
+                {"question_id": {"$in": question_ids}},
+                {"question_id": 1, "problem_description": 1, "_id": 0}
+            )
         )
     )
     question_map = {
@@ -519,7 +504,7 @@ def generate_feedback(
 
     
     try:
-        feedback_result = evaluate_coding_answers(enriched_questions)
+        feedback_result = await evaluate_coding_answers(enriched_questions)
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -543,7 +528,8 @@ def generate_feedback(
             q["feedback"] = feedback_map[qid]["feedback"]
             q["score"] = feedback_map[qid]["score"]
 
-    coding_question_collection.update_one(
+    await asyncio.to_thread(
+        coding_question_collection.update_one,
         {"_id": session_obj_id},
         {
             "$set": {
@@ -554,6 +540,8 @@ def generate_feedback(
         }
     )
 
+    await asyncio.to_thread(schedule_session_digest, "coding", session_obj_id)
+
     return {
         "question_session_id": str(session_obj_id),
         "overall_feedback": overall_feedback,
@@ -649,6 +637,8 @@ def delete_coding(
         "_id": coding_obj_id
     })
 
+    delete_combined_feedback(coding_obj_id)
+
     return {"success": True}
 
 
@@ -682,10 +672,15 @@ def delete_session(
             detail="Can't delete complete session entirely, either reattempt or leave."
         )
 
+    # older sets are counted while this session still exists
+    get_coding_used_counts(coding_doc)
+
     coding_question_collection.delete_one({
         "_id": session_obj_id
     })
 
+    release_used_questions(coding_obj_id, [q["question_id"] for q in session_doc.get("question_bank", [])])
+
     return {"success": True}
 
 
@@ -734,22 +729,14 @@ async def delete_and_reattempt(
             },
             "$unset": {
                 "submitted_at_frontend": "",
-                "submitted_at_backend": ""
+                "submitted_at_backend": "",
+                "history_digest": ""
             }
         }
     )
 
 
-    asyncio.create_task(
-        auto_submit(
-            coding_id,
-            question_session_id=question_session_id,
-            token=token,
-            start_time = timestamp,
-            duration = session_doc["time"],
-            fun = submit_session
-        )
-    )
+    schedule_session_timeout("coding", question_session_id, timestamp, session_doc["time"])
 
     return {"success": True}
 
@@ -759,7 +746,7 @@ async def delete_and_reattempt(
 
 
 @router.get("/progress/coding")
-def combined_feedback_last_x_sessions(
+async def combined_feedback_last_x_sessions(
     coding_id: str,
     x: int,
     credentials: HTTPAuthorizationCredentials = Depends(security)
@@ -770,28 +757,16 @@ def combined_feedback_last_x_sessions(
 
     token = credentials.credentials
     payload = verify_access_token(token)
-    candidate, candidate_id, email = verify_candidate_payload(payload)
+    candidate, candidate_id, email = await asyncio.to_thread(verify_candidate_payload, payload)
 
-    coding_doc, coding_obj_id = verify_coding(coding_id, candidate_id)
+    coding_doc, coding_obj_id = await asyncio.to_thread(verify_coding, coding_id, candidate_id)
 
-    session_dict, sessions_used = previous_coding_session_questions(
-    coding_obj_id,x=x)
+    session_dict, sessions_used = await previous_coding_session_questions(
+    coding_obj_id,x=x, digests=True)
     
-    feedback = generate_coding_combined_diff_session_feedback(session_dict)
+    feedback = await generate_coding_combined_diff_session_feedback(session_dict)
 
-    coding_collection.update_one(
-        {"_id": coding_obj_id},
-        {
-            "$push": {
-                "combined_feedback": {
-                    "sessions_used": sessions_used,
-                    "feedback": feedback,
-                    "type": "different",
-                    "timestamp": generate_timestamp()
-                }
-            }
-        }
-    )
+    await asyncio.to_thread(save_combined_feedback, "coding", coding_obj_id, "different", sessions_used, feedback)
 
     return {
         "sessions_used": sessions_used,
@@ -801,7 +776,7 @@ def combined_feedback_last_x_sessions(
 
 
 @router.get("/progress/session")
-def combined_feedback_same_session(
+async def combined_feedback_same_session(
     coding_id: str,
     question_session_id: str,
     x: int,
@@ -813,37 +788,27 @@ def combined_feedback_same_session(
 
     token = credentials.credentials
     payload = verify_access_token(token)
-    candidate, candidate_id, email = verify_candidate_payload(payload)
+    candidate, candidate_id, email = await asyncio.to_thread(verify_candidate_payload, payload)
 
-    coding_doc, coding_obj_id = verify_coding(coding_id, candidate_id)
-    session_doc, session_obj_id = verify_question_session(
+    coding_doc, coding_obj_id = await asyncio.to_thread(verify_coding, coding_id, candidate_id)
+    session_doc, session_obj_id = await asyncio.to_thread(
+        verify_question_session,
         question_session_id,
         coding_obj_id
     )
 
     session_number = session_doc["session_number"]
 
-    session_dict, sessions_used = previous_coding_session_questions(
+    session_dict, sessions_used = await previous_coding_session_questions(
     coding_obj_id,
     x=x,
-    session_number=session_number)
+    session_number=session_number,
+    digests=True)
 
-    feedback = generate_coding_combined_same_session_feedback(session_dict)
+    feedback = await generate_coding_combined_same_session_feedback(session_dict)
 
 
-    coding_collection.update_one(
-        {"_id": coding_obj_id},
-        {
-            "$push": {
-                "combined_feedback": {
-                    "sessions_used": sessions_used,
-                    "feedback": feedback,
-                    "type":"same",
-                    "timestamp": generate_timestamp()
-                }
-            }
-        }
-    )
+    await asyncio.to_thread(save_combined_feedback, "coding", coding_obj_id, "same", sessions_used, feedback)
 
     return {
         "sessions_used": sessions_used,
@@ -864,15 +829,7 @@ def get_different_combined_feedback(
 
     coding_doc, coding_obj_id = verify_coding(coding_id, candidate_id)
 
-    combined_feedback = []
-    for item in coding_doc.get("combined_feedback", []):
-        if item.get("type") == "different":
-            combined_feedback.append({
-                "sessions_used": item.get("sessions_used", {}),
-                "feedback": item.get("feedback", ""),
-                "type": item.get("type"),
-                "timestamp": item.get("timestamp", None)
-            })
+    combined_feedback = list_combined_feedback("coding", coding_obj_id, "different")
 
     return {
         "coding_id": str(coding_obj_id),
@@ -892,17 +849,7 @@ def get_same_combined_feedback(
 
     coding_doc, coding_obj_id = verify_coding(coding_id, candidate_id)
 
-    combined_feedback = []
-    for item in coding_doc.get("combined_feedback", []):
-        if item.get("type") == "same":
-            first_session = next(iter(item.get("sessions_used", {}).values()), None)
-            if first_session and first_session.get("session_number") == session_number:
-                combined_feedback.append({
-                    "sessions_used": item.get("sessions_used", {}),
-                    "feedback": item.get("feedback", ""),
-                    "type": item.get("type"),
-                    "timestamp": item.get("timestamp", None)
-                })
+    combined_feedback = list_combined_feedback("coding", coding_obj_id, "same", session_number)
 
 
     return {
@@ -1,16 +1,19 @@
+import asyncio
 from fastapi import APIRouter, HTTPException, Depends
 from datetime import datetime, timezone, timedelta
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from database import concept_collection, concept_question_collection, candidate_collection
 from verify.token import verify_access_token
-from verify.candidate import verify_candidate_payload
+from verify.candidate import verify_candidate_payload, invalidate_candidate
 from constants.topic import TopicEnum
 from typing import List
 from verify.concept import verify_concept, verify_question_number, verify_question_session, verify_session_status,verify_session_status2, verify_session_time, verify_timestamp
 from prompt.concept import generate_concept_topic_questions, evaluate_concept_topic_answers, generate_concept_combined_diff_session_feedback, generate_concept_combined_same_session_feedback
-from utils.concept import previous_concept_session_questions, auto_submit
+from utils.concept import previous_concept_session_questions
+from utils.jobs import schedule_session_timeout
 from utils.time import generate_timestamp
-import asyncio
+from utils.history import schedule_session_digest
+from utils.combined_feedback import save_combined_feedback, list_combined_feedback, delete_combined_feedback
 
 router = APIRouter(prefix="/concept", tags=["Conceptual"])
 security = HTTPBearer()
@@ -33,7 +36,7 @@ def start_concept(
 
     concept_doc = {
     "candidate_id": candidate_id,
-    "concept_number": candidate["total_concepts"]+1,
+    "concept_number": candidate_collection.find_one({"_id": candidate_id}, {"total_concepts": 1})["total_concepts"]+1,
     "topic": [t.value for t in topic] if topic else [],
     "created_on": generate_timestamp(),
     "total_sessions":0
@@ -49,6 +52,7 @@ def start_concept(
             }
         }
     )
+    invalidate_candidate(candidate_id)
 
     return {
         "success": True
@@ -145,12 +149,12 @@ async def generate_questions(
 
     previous_sessions = {}
     if session_number != 1:
-        previous_sessions,_ = previous_concept_session_questions(concept_id)
+        previous_sessions,_ = await previous_concept_session_questions(concept_id)
 
 
 
     try:
-        questions_json = generate_concept_topic_questions(
+        questions_json = await generate_concept_topic_questions(
             concept["topic"],
             num_questions,
             previous_sessions
@@ -202,16 +206,7 @@ async def generate_questions(
         i + 1: q for i, q in enumerate(questions_list)
     }
 
-    asyncio.create_task(
-        auto_submit(
-            str(concept_id),
-            question_session_id=str(question_session_id),
-            token=token,
-            start_time = timestamp,
-            duration = time,
-            fun = submit_session
-        )
-    )
+    schedule_session_timeout("concept", question_session_id, timestamp, time)
 
 
 
@@ -310,16 +305,7 @@ async def reattempt_session(
     inserted = concept_question_collection.insert_one(new_doc)
     new_session_id = inserted.inserted_id
 
-    asyncio.create_task(
-        auto_submit(
-            concept_id,
-            question_session_id=str(new_session_id),
-            token=token,
-            start_time = timestamp,
-            duration = old_session_doc["time"],
-            fun = submit_session
-        )
-    )
+    schedule_session_timeout("concept", new_session_id, timestamp, old_session_doc["time"])
 
     return {
         "new_question_session_id": str(new_session_id)
@@ -374,7 +360,7 @@ def fake_submit_session(
 
 
 @router.get("/questions/feedback")
-def generate_feedback(
+async def generate_feedback(
     concept_id: str,
     question_session_id: str,
     credentials: HTTPAuthorizationCredentials = Depends(security)
@@ -382,17 +368,18 @@ def generate_feedback(
 
     token = credentials.credentials
     payload = verify_access_token(token)
-    candidate, candidate_id, email = verify_candidate_payload(payload)
+    candidate, candidate_id, email = await asyncio.to_thread(verify_candidate_payload, payload)
 
-    concept_doc, concept_obj_id = verify_concept(concept_id, candidate_id)
-    session_doc, session_obj_id = verify_question_session(
+    concept_doc, concept_obj_id = await asyncio.to_thread(verify_concept, concept_id, candidate_id)
+    session_doc, session_obj_id = await asyncio.to_thread(
+        verify_question_session,
         question_session_id,
         concept_obj_id
     )
     verify_session_status2(session_doc)
 
     try:
-        feedback_result = evaluate_concept_topic_answers(
+        feedback_result = await evaluate_concept_topic_answers(
             concept_doc["topic"],
             session_doc["question_bank"]
         )
@@ -419,7 +406,8 @@ def generate_feedback(
             q["feedback"] = feedback_map[qn]["feedback"]
             q["score"] = feedback_map[qn]["score"]
 
-    concept_question_collection.update_one(
+    await asyncio.to_thread(
+        concept_question_collection.update_one,
         {"_id": session_obj_id},
         {
             "$set": {
@@ -430,6 +418,8 @@ def generate_feedback(
         }
     )
 
+    await asyncio.to_thread(schedule_session_digest, "concept", session_obj_id)
+
 
     return {
         "question_session_id": str(session_obj_id),
@@ -526,6 +516,8 @@ def delete_concept(
         "_id": concept_obj_id
     })
 
+    delete_combined_feedback(concept_obj_id)
+
     return {"success": True}
 
 
@@ -611,21 +603,13 @@ async def delete_and_reattempt(
             },
             "$unset": {
                 "submitted_at_frontend": "",
-                "submitted_at_backend": ""
+                "submitted_at_backend": "",
+                "history_digest": ""
             }
         }
     )
 
-    asyncio.create_task(
-        auto_submit(
-            concept_id,
-            question_session_id=question_session_id,
-            token=token,
-            start_time = timestamp,
-            duration = session_doc["time"],
-            fun = submit_session
-        )
-    )
+    schedule_session_timeout("concept", question_session_id, timestamp, session_doc["time"])
 
     return {"success": True}
 
@@ -635,7 +619,7 @@ async def delete_and_reattempt(
 
 
 @router.get("/progress/concept")
-def combined_feedback_last_x_sessions(
+async def combined_feedback_last_x_sessions(
     concept_id: str,
     x: int,
     credentials: HTTPAuthorizationCredentials = Depends(security)
@@ -646,28 +630,16 @@ def combined_feedback_last_x_sessions(
 
     token = credentials.credentials
     payload = verify_access_token(token)
-    candidate, candidate_id, email = verify_candidate_payload(payload)
+    candidate, candidate_id, email = await asyncio.to_thread(verify_candidate_payload, payload)
 
-    concept_doc, concept_obj_id = verify_concept(concept_id, candidate_id)
+    concept_doc, concept_obj_id = await asyncio.to_thread(verify_concept, concept_id, candidate_id)
 
-    session_dict, sessions_used = previous_concept_session_questions(
-    concept_obj_id,x=x)
+    session_dict, sessions_used = await previous_concept_session_questions(
+    concept_obj_id,x=x, digests=True)
     
-    feedback = generate_concept_combined_diff_session_feedback(concept_doc["topic"], session_dict)
+    feedback = await generate_concept_combined_diff_session_feedback(concept_doc["topic"], session_dict)
 
-    concept_collection.update_one(
-        {"_id": concept_obj_id},
-        {
-            "$push": {
-                "combined_feedback": {
-                    "sessions_used": sessions_used,
-                    "feedback": feedback,
-                    "type": "different",
-                    "timestamp": generate_timestamp()
-                }
-            }
-        }
-    )
+    await asyncio.to_thread(save_combined_feedback, "concept", concept_obj_id, "different", sessions_used, feedback)
 
     return {
         "sessions_used": sessions_used,
@@ -677,7 +649,7 @@ def combined_feedback_last_x_sessions(
 
 
 @router.get("/progress/session")
-def combined_feedback_same_session(
+async def combined_feedback_same_session(
     concept_id: str,
     question_session_id: str,
     x: int,
@@ -689,37 +661,27 @@ def combined_feedback_same_session(
 
     token = credentials.credentials
     payload = verify_access_token(token)
-    candidate, candidate_id, email = verify_candidate_payload(payload)
+    candidate, candidate_id, email = await asyncio.to_thread(verify_candidate_payload, payload)
 
-    concept_doc, concept_obj_id = verify_concept(concept_id, candidate_id)
-    session_doc, session_obj_id = verify_question_session(
+    concept_doc, concept_obj_id = await asyncio.to_thread(verify_concept, concept_id, candidate_id)
+    session_doc, session_obj_id = await asyncio.to_thread(
+        verify_question_session,
         question_session_id,
         concept_obj_id
     )
 
     session_number = session_doc["session_number"]
 
-    session_dict, sessions_used = previous_concept_session_questions(
+    session_dict, sessions_used = await previous_concept_session_questions(
     concept_obj_id,
     x=x,
-    session_number=session_number)
+    session_number=session_number,
+    digests=True)
 
-    feedback = generate_concept_combined_same_session_feedback(concept_doc["topic"], session_dict)
+    feedback = await generate_concept_combined_same_session_feedback(concept_doc["topic"], session_dict)
 
 
-    concept_collection.update_one(
-        {"_id": concept_obj_id},
-        {
-            "$push": {
-                "combined_feedback": {
-                    "sessions_used": sessions_used,
-                    "feedback": feedback,
-                    "type":"same",
-                    "timestamp": generate_timestamp()
-                }
-            }
-        }
-    )
+    await asyncio.to_thread(save_combined_feedback, "concept", concept_obj_id, "same", sessions_used, feedback)
 
     return {
         "sessions_used": sessions_used,
@@ -739,15 +701,7 @@ def get_different_combined_feedback(
 
     concept_doc, concept_obj_id = verify_concept(concept_id, candidate_id)
 
-    combined_feedback = []
-    for item in concept_doc.get("combined_feedback", []):
-        if item.get("type") == "different":
-            combined_feedback.append({
-                "sessions_used": item.get("sessions_used", {}),
-                "feedback": item.get("feedback", ""),
-                "type": item.get("type"),
-                "timestamp": item.get("timestamp", None)
-            })
+    combined_feedback = list_combined_feedback("concept", concept_obj_id, "different")
 
     return {
         "concept_id": str(concept_obj_id),
@@ -767,17 +721,7 @@ def get_same_combined_feedback(
 
     concept_doc, concept_obj_id = verify_concept(concept_id, candidate_id)
 
-    combined_feedback = []
-    for item in concept_doc.get("combined_feedback", []):
-        if item.get("type") == "same":
-            first_session = next(iter(item.get("sessions_used", {}).values()), None)
-            if first_session and first_session.get("session_number") == session_number:
-                combined_feedback.append({
-                    "sessions_used": item.get("sessions_used", {}),
-                    "feedback": item.get("feedback", ""),
-                    "type": item.get("type"),
-                    "timestamp": item.get("timestamp", None)
-                })
+    combined_feedback = list_combined_feedback("concept", concept_obj_id, "same", session_number)
 
 
     return {
@@ -1,26 +1,31 @@
 from verify.contest import verify_contest_id, verify_candidate_eligibility, verify_contest_registry
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Form
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Form, Header, Response, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from tempfile import NamedTemporaryFile
-import shutil
-import os
 from verify.token import verify_access_token
 from verify.candidate import verify_candidate_payload
 from utils.time import generate_timestamp
 from verify.contest import verify_resume_time_open, verify_timestamp, verify_coding_time_open, verify_coding_submit
-from utils.resume import extract_text_with_ocr, extract_text_without_ocr
 from prompt.contest import evaluate_resume_score, generate_summary
-from database import contest_collection, contest_candidate_collection, contest_resume_fs, contest_audio_fs,contest_leaderboard, candidate_collection, leetcode
+from database import contest_collection, contest_candidate_collection, contest_resume_fs, contest_audio_fs, leetcode
 from datetime import datetime, timezone, timedelta
 from verify.contest import verify_resume_result_time,verify_coding_result_time, verify_candidate_passed_resume, verify_coding_question, verify_coding_time, verify_candidate_passed_coding
-from utils.contest import auto_submit, generate_coding_scores, generate_concept_scores, generate_hr_scores
+from utils.contest import generate_coding_scores, generate_concept_scores, generate_hr_scores
+from utils.jobs import schedule_round_timeout
+from utils.round_stats import record_round_scores, penalty_seconds
+from utils.registration import register_candidate, unregister_candidate
 import asyncio
 from verify.contest import verify_concept_time_open, verify_concept_question, verify_concept_time, verify_concept_result_time, verify_concept_submit, verify_candidate_passed_concept
 from verify.contest import verify_hr_time_open, verify_hr_question, verify_hr_time, verify_hr_submit, verify_hr_result_time
 from verify.contest import verify_leaderboard_declare_time
-import tempfile
 from model import call_audio_model_1
 from fastapi.responses import StreamingResponse
+from typing import Optional
+from utils.leaderboard import leaderboard_view
+from utils.broadcast import PUBLISHER, leaderboard_events
+from utils.files import serve_grid_file
+from utils.upload import receive_upload, discard_upload
+from utils.artifacts import extract_resume_text
+from utils.reader import RESUME_MAX_BYTES, AUDIO_MAX_BYTES
 from verify.contest import verify_contest_end_time,verify_unregister_time, verify_hr_audio_answer
 from verify.contest import verify_hr_round_data,verify_coding_round_data, verify_resume_round_data, verify_concept_round_data
 security = HTTPBearer()
@@ -137,29 +142,7 @@ def register_for_contest(
     
     
 
-    update_result = contest_collection.update_one(
-        {
-            "_id": contest_obj_id,
-            "candidate_count": {"$lt": contest["candidate_capacity"]},
-            "registered_candidates": {"$ne": candidate_id}
-        },
-        {
-            "$addToSet": {"registered_candidates": candidate_id},
-            "$inc": {"candidate_count": 1}
-        }
-    )
-
-    if update_result.modified_count == 0:
-        raise HTTPException(
-            status_code=400,
-            detail="Contest full or already registered"
-        )
-
-    contest_candidate_collection.insert_one({
-        "contest_id": contest_obj_id,
-        "candidate_id": candidate_id,
-        "created_on": timestamp
-    })
+    register_candidate(contest, candidate_id, timestamp)
 
     return {
         "success": True,
@@ -190,20 +173,7 @@ def unregister_from_contest(
 
     verify_unregister_time(generate_timestamp(), contest)
 
-    contest_collection.update_one(
-        {"_id": contest_obj_id},
-        {
-            "$pull": {"registered_candidates": candidate_id},
-            "$inc": {"candidate_count": -1}
-        }
-    )
-
-    contest_candidate_collection.delete_one(
-        {
-            "contest_id": contest_obj_id,
-            "candidate_id": candidate_id
-        }
-    )
+    unregister_candidate(contest_obj_id, candidate_id)
 
     return {
         "success": True,
@@ -266,53 +236,35 @@ async def submit_resume_for_contest(
         raise HTTPException(status_code=400, detail="Only PDF allowed")
 
 
-    with NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-        shutil.copyfileobj(file.file, tmp)
-        temp_path = tmp.name
+    upload = await receive_upload(file, contest_resume_fs, "application/pdf", RESUME_MAX_BYTES, "contest_resume")
+    file_id = upload["file_id"]
 
 
     try:
-        if ocr_mode.upper() == "Y":
-            resume_text = extract_text_with_ocr(temp_path)
-        else:
-            resume_text = extract_text_without_ocr(temp_path)
-
-        if not resume_text.strip():
-            raise HTTPException(
-                status_code=400,
-                detail="No text extracted from PDF"
-            )
+        resume_text = await extract_resume_text(upload["data"], ocr_mode, upload["sha256"])
 
 
         questions = contest["resume_round"]["questions"]
 
-        response = evaluate_resume_score(
+        response = await evaluate_resume_score(
             resume_text, questions, 
             contest["company"], contest["role"], contest["skills"])
         
         question_bank = response["results"]
         overall_feedback = response["overall_feedback"]
         
-        summary = generate_summary(resume_text)
-
-        with open(temp_path, "rb") as f:
-            file_id = contest_resume_fs.put(
-                f,
-                filename=file.filename,
-                content_type="application/pdf"
-            )
+        summary = await generate_summary(resume_text, upload["sha256"], ocr_mode)
 
     except HTTPException:
+        discard_upload(contest_resume_fs, upload)
         raise
     except Exception:
+        discard_upload(contest_resume_fs, upload)
         raise HTTPException(
             status_code=500,
             detail="AI evaluation failed"
         )
 
-    finally:
-        os.remove(temp_path)
-
 
     contest_candidate_collection.update_one(
         {
@@ -323,6 +275,7 @@ async def submit_resume_for_contest(
             "$set": {
                 "resume": {
                     "file_id": file_id,
+                    "filename": file.filename,
                     "summary": summary,
                     "question_bank":question_bank,
                     "overall_feedback":overall_feedback,
@@ -332,6 +285,8 @@ async def submit_resume_for_contest(
         }
     )
 
+    record_round_scores(contest_obj_id, "resume", candidate_id, {"question_bank": question_bank}, 0)
+
 
     return {
         "success": True
@@ -346,6 +301,10 @@ async def submit_resume_for_contest(
 @router.get("/leaderboard/resume")
 def get_resume_leaderboard(
     contest_id: str,
+    response: Response,
+    page: int = 1,
+    page_size: Optional[int] = None,
+    if_none_match: Optional[str] = Header(None),
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
 
@@ -360,54 +319,15 @@ def get_resume_leaderboard(
     verify_resume_result_time(timestamp, contest)
 
 
-    leaderboard_doc = contest_leaderboard.find_one(
-        {"contest_id": contest_obj_id},
-        {"resume_round": 1, "_id": 0, "selected_resume_candidates":1}
-    )
-
-    if not leaderboard_doc:
-        raise HTTPException(status_code=404, detail="Leaderboard not generated")
-
-    leaderboard = leaderboard_doc["resume_round"]
-    candidate_ids = [entry["candidate_id"] for entry in leaderboard]
-
-
-
-    candidates = list(
-        candidate_collection.find(
-            {"_id": {"$in": candidate_ids}},
-            {"_id": 1, "full_name": 1}
-        )
-    )
-    name_map = {
-        c["_id"]: c["full_name"]
-        for c in candidates
-    }
+    etag, body = leaderboard_view(contest_obj_id, "resume", real_candidate_id, page, page_size)
 
-    result = []
-    for entry in leaderboard:
-        result.append({
-            "candidate_id": str(real_candidate_id) if real_candidate_id == entry["candidate_id"] else None,
-            "name": name_map.get(entry["candidate_id"], "Unknown"),
-            "rank": entry["rank"],
-            "percentile": entry["percentile"],
-            "score": entry["final_normalized_score"],
-            "latest_submission": entry["latest_submission"]
-        })
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
 
-    if real_candidate_id in leaderboard_doc["selected_resume_candidates"]:
-        selection = True
-    else:
-        selection = False
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
 
-
-
-
-    return {
-        "success": True,
-        "data": result,
-        "selection": selection
-    }
+    return body
 
 
 
@@ -428,7 +348,7 @@ def get_resume_leaderboard(
 
 
 @router.post("/coding/submit")
-def submit_coding(
+async def submit_coding(
     contest_id: str,
     frontend_timestamp : datetime,
     credentials: HTTPAuthorizationCredentials = Depends(security)
@@ -439,15 +359,16 @@ def submit_coding(
 
     token = credentials.credentials
     payload = verify_access_token(token)
-    candidate, candidate_id, email = verify_candidate_payload(payload)
-    contest, contest_obj_id = verify_contest_id(contest_id)
-    contest_candidate = verify_contest_registry(candidate, contest, "Y")
-    verify_candidate_passed_resume(candidate_id, contest_id)
+    candidate, candidate_id, email = await asyncio.to_thread(verify_candidate_payload, payload)
+    contest, contest_obj_id = await asyncio.to_thread(verify_contest_id, contest_id)
+    contest_candidate = await asyncio.to_thread(verify_contest_registry, candidate, contest, "Y")
+    await asyncio.to_thread(verify_candidate_passed_resume, candidate_id, contest_id)
     verify_coding_time(timestamp, contest, contest_candidate)
     verify_coding_submit(contest_candidate)
 
 
-    contest_candidate_collection.update_one(
+    await asyncio.to_thread(
+        contest_candidate_collection.update_one,
         {
             "contest_id": contest_obj_id,
             "candidate_id": candidate_id
@@ -459,9 +380,10 @@ def submit_coding(
         }
     )
 
-    generate_coding_scores(contest_obj_id, candidate_id, contest_candidate)
+    await generate_coding_scores(contest_obj_id, candidate_id, contest_candidate)
 
-    contest_collection.update_one(
+    await asyncio.to_thread(
+        contest_collection.update_one,
         {"_id": contest_obj_id},
         {"$pull": {"fake_submit_coding": candidate_id}}
     )
@@ -557,15 +479,16 @@ async def get_coding_questions(
             }
         )
 
-        asyncio.create_task(
-            auto_submit(
-                contest_id,
-                token,
-                end_time,
-                submit_coding
-            )
+        record_round_scores(
+            contest_obj_id,
+            "coding",
+            candidate_id,
+            {"start_time": start_time, "question_bank": question_bank},
+            penalty_seconds(contest, "coding")
         )
 
+        schedule_round_timeout(contest_obj_id, candidate_id, "coding", end_time)
+
     
     return {
         "success": True,
@@ -645,6 +568,10 @@ def submit_coding_answer(
 @router.get("/leaderboard/coding")
 def get_coding_leaderboard(
     contest_id: str,
+    response: Response,
+    page: int = 1,
+    page_size: Optional[int] = None,
+    if_none_match: Optional[str] = Header(None),
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
 
@@ -659,54 +586,15 @@ def get_coding_leaderboard(
     verify_coding_result_time(timestamp, contest)
 
 
-    leaderboard_doc = contest_leaderboard.find_one(
-        {"contest_id": contest_obj_id},
-        {"coding_round": 1, "_id": 0, "selected_coding_candidates":1}
-    )
-
-    if not leaderboard_doc:
-        raise HTTPException(status_code=404, detail="Leaderboard not generated")
-
-    leaderboard = leaderboard_doc["coding_round"]
-    candidate_ids = [entry["candidate_id"] for entry in leaderboard]
-
-
-
-    candidates = list(
-        candidate_collection.find(
-            {"_id": {"$in": candidate_ids}},
-            {"_id": 1, "full_name": 1}
-        )
-    )
-    name_map = {
-        c["_id"]: c["full_name"]
-        for c in candidates
-    }
-
-    result = []
-    for entry in leaderboard:
-        result.append({
-            "candidate_id": str(real_candidate_id) if real_candidate_id == entry["candidate_id"] else None,
-            "name": name_map.get(entry["candidate_id"], "Unknown"),
-            "rank": entry["rank"],
-            "percentile": entry["percentile"],
-            "score": entry["final_normalized_score"],
-            "latest_submission": entry["latest_submission"]
-        })
-
-    if real_candidate_id in leaderboard_doc["selected_coding_candidates"]:
-        selection = True
-    else:
-        selection = False
-
+    etag, body = leaderboard_view(contest_obj_id, "coding", real_candidate_id, page, page_size)
 
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
 
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
 
-    return {
-        "success": True,
-        "data": result,
-        "selection": selection
-    }
+    return body
 
 
 
@@ -748,7 +636,7 @@ def get_coding_leaderboard(
 
 
 @router.post("/concept/submit")
-def submit_concept(
+async def submit_concept(
     contest_id: str,
     frontend_timestamp : datetime,
     credentials: HTTPAuthorizationCredentials = Depends(security)
@@ -759,15 +647,16 @@ def submit_concept(
 
     token = credentials.credentials
     payload = verify_access_token(token)
-    candidate, candidate_id, email = verify_candidate_payload(payload)
-    contest, contest_obj_id = verify_contest_id(contest_id)
-    contest_candidate = verify_contest_registry(candidate, contest, "Y")
-    verify_candidate_passed_coding(candidate_id, contest_id)
+    candidate, candidate_id, email = await asyncio.to_thread(verify_candidate_payload, payload)
+    contest, contest_obj_id = await asyncio.to_thread(verify_contest_id, contest_id)
+    contest_candidate = await asyncio.to_thread(verify_contest_registry, candidate, contest, "Y")
+    await asyncio.to_thread(verify_candidate_passed_coding, candidate_id, contest_id)
     verify_concept_time(timestamp, contest, contest_candidate)
     verify_concept_submit(contest_candidate)
 
 
-    contest_candidate_collection.update_one(
+    await asyncio.to_thread(
+        contest_candidate_collection.update_one,
         {
             "contest_id": contest_obj_id,
             "candidate_id": candidate_id
@@ -779,9 +668,10 @@ def submit_concept(
         }
     )
 
-    generate_concept_scores(contest_obj_id, candidate_id, contest_candidate)
+    await generate_concept_scores(contest_obj_id, candidate_id, contest_candidate)
 
-    contest_collection.update_one(
+    await asyncio.to_thread(
+        contest_collection.update_one,
         {"_id": contest_obj_id},
         {"$pull": {"fake_submit_concept": candidate_id}}
     )
@@ -861,15 +751,16 @@ async def get_concept_questions(
             }
         )
 
-        asyncio.create_task(
-            auto_submit(
-                contest_id,
-                token,
-                end_time,
-                submit_concept
-            )
+        record_round_scores(
+            contest_obj_id,
+            "concept",
+            candidate_id,
+            {"start_time": start_time, "question_bank": question_bank},
+            penalty_seconds(contest, "concept")
         )
 
+        schedule_round_timeout(contest_obj_id, candidate_id, "concept", end_time)
+
     
     return {
         "success": True,
@@ -944,6 +835,10 @@ def submit_concept_answer(
 @router.get("/leaderboard/concept")
 def get_concept_leaderboard(
     contest_id: str,
+    response: Response,
+    page: int = 1,
+    page_size: Optional[int] = None,
+    if_none_match: Optional[str] = Header(None),
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
 
@@ -958,54 +853,15 @@ def get_concept_leaderboard(
     verify_concept_result_time(timestamp, contest)
 
 
-    leaderboard_doc = contest_leaderboard.find_one(
-        {"contest_id": contest_obj_id},
-        {"concept_round": 1, "_id": 0, "selected_concept_candidates":1}
-    )
+    etag, body = leaderboard_view(contest_obj_id, "concept", real_candidate_id, page, page_size)
 
-    if not leaderboard_doc:
-        raise HTTPException(status_code=404, detail="Leaderboard not generated")
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
 
-    leaderboard = leaderboard_doc["concept_round"]
-    candidate_ids = [entry["candidate_id"] for entry in leaderboard]
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
 
-
-
-    candidates = list(
-        candidate_collection.find(
-            {"_id": {"$in": candidate_ids}},
-            {"_id": 1, "full_name": 1}
-        )
-    )
-    name_map = {
-        c["_id"]: c["full_name"]
-        for c in candidates
-    }
-
-    result = []
-    for entry in leaderboard:
-        result.append({
-            "candidate_id": str(real_candidate_id) if real_candidate_id == entry["candidate_id"] else None,
-            "name": name_map.get(entry["candidate_id"], "Unknown"),
-            "rank": entry["rank"],
-            "percentile": entry["percentile"],
-            "score": entry["final_normalized_score"],
-            "latest_submission": entry["latest_submission"]
-        })
-
-    if real_candidate_id in leaderboard_doc["selected_concept_candidates"]:
-        selection = True
-    else:
-        selection = False
-
-
-
-
-    return {
-        "success": True,
-        "data": result,
-        "selection": selection
-    }
+    return body
 
 
 
@@ -1033,7 +889,7 @@ def get_concept_leaderboard(
 
 
 @router.post("/hr/submit")
-def submit_hr(
+async def submit_hr(
     contest_id: str,
     frontend_timestamp : datetime,
     credentials: HTTPAuthorizationCredentials = Depends(security)
@@ -1044,15 +900,16 @@ def submit_hr(
 
     token = credentials.credentials
     payload = verify_access_token(token)
-    candidate, candidate_id, email = verify_candidate_payload(payload)
-    contest, contest_obj_id = verify_contest_id(contest_id)
-    contest_candidate = verify_contest_registry(candidate, contest, "Y")
-    verify_candidate_passed_concept(candidate_id, contest_id)
+    candidate, candidate_id, email = await asyncio.to_thread(verify_candidate_payload, payload)
+    contest, contest_obj_id = await asyncio.to_thread(verify_contest_id, contest_id)
+    contest_candidate = await asyncio.to_thread(verify_contest_registry, candidate, contest, "Y")
+    await asyncio.to_thread(verify_candidate_passed_concept, candidate_id, contest_id)
     verify_hr_time(timestamp, contest, contest_candidate)
     verify_hr_submit(contest_candidate)
 
 
-    contest_candidate_collection.update_one(
+    await asyncio.to_thread(
+        contest_candidate_collection.update_one,
         {
             "contest_id": contest_obj_id,
             "candidate_id": candidate_id
@@ -1064,9 +921,10 @@ def submit_hr(
         }
     )
 
-    generate_hr_scores(contest_obj_id, candidate_id, contest_candidate)
+    await generate_hr_scores(contest_obj_id, candidate_id, contest_candidate)
 
-    contest_collection.update_one(
+    await asyncio.to_thread(
+        contest_collection.update_one,
         {"_id": contest_obj_id},
         {"$pull": {"fake_submit_hr": candidate_id}}
     )
@@ -1148,15 +1006,16 @@ async def get_hr_questions(
         )
 
 
-        asyncio.create_task(
-            auto_submit(
-                contest_id,
-                token,
-                end_time,
-                submit_hr
-            )
+        record_round_scores(
+            contest_obj_id,
+            "hr",
+            candidate_id,
+            {"start_time": start_time, "question_bank": question_bank},
+            penalty_seconds(contest, "hr")
         )
 
+        schedule_round_timeout(contest_obj_id, candidate_id, "hr", end_time)
+
     
     return {
         "success": True,
@@ -1202,23 +1061,14 @@ async def submit_hr_answer(
             detail="Only WAV audio files are accepted"
         )
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_audio:
-        audio_bytes = await audio.read()
-        temp_audio.write(audio_bytes)
-        temp_audio_path = temp_audio.name
+    upload = await receive_upload(audio, contest_audio_fs, audio.content_type, AUDIO_MAX_BYTES)
+    audio_file_id = upload["file_id"]
 
     try:
-        segmented_data, transcript = call_audio_model_1(temp_audio_path)
-
-        with open(temp_audio_path, "rb") as f:
-            audio_file_id = contest_audio_fs.put(
-                f,
-                filename=audio.filename,
-                content_type=audio.content_type
-            )
-    finally:
-        if os.path.exists(temp_audio_path):
-            os.remove(temp_audio_path)
+        segmented_data, transcript = await asyncio.to_thread(call_audio_model_1, upload["data"], audio.filename)
+    except BaseException:
+        discard_upload(contest_audio_fs, upload)
+        raise
 
 
     contest_candidate_collection.update_one(
@@ -1259,6 +1109,10 @@ async def submit_hr_answer(
 @router.get("/leaderboard/hr")
 def get_hr_leaderboard(
     contest_id: str,
+    response: Response,
+    page: int = 1,
+    page_size: Optional[int] = None,
+    if_none_match: Optional[str] = Header(None),
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
 
@@ -1273,53 +1127,15 @@ def get_hr_leaderboard(
     verify_hr_result_time(timestamp, contest)
 
 
-    leaderboard_doc = contest_leaderboard.find_one(
-        {"contest_id": contest_obj_id},
-        {"hr_round": 1, "_id": 0, "selected_hr_candidates":1}
-    )
-
-    if not leaderboard_doc:
-        raise HTTPException(status_code=404, detail="Leaderboard not generated")
-
-    leaderboard = leaderboard_doc["hr_round"]
-    candidate_ids = [entry["candidate_id"] for entry in leaderboard]
-
-
-    candidates = list(
-        candidate_collection.find(
-            {"_id": {"$in": candidate_ids}},
-            {"_id": 1, "full_name": 1}
-        )
-    )
-    name_map = {
-        c["_id"]: c["full_name"]
-        for c in candidates
-    }
-
-    result = []
-    for entry in leaderboard:
-        result.append({
-            "candidate_id": str(real_candidate_id) if real_candidate_id == entry["candidate_id"] else None,
-            "name": name_map.get(entry["candidate_id"], "Unknown"),
-            "rank": entry["rank"],
-            "percentile": entry["percentile"],
-            "score": entry["final_normalized_score"],
-            "latest_submission": entry["latest_submission"]
-        })
-
-    if real_candidate_id in leaderboard_doc["selected_hr_candidates"]:
-        selection = True
-    else:
-        selection = False
+    etag, body = leaderboard_view(contest_obj_id, "hr", real_candidate_id, page, page_size)
 
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
 
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
 
-
-    return {
-        "success": True,
-        "data": result,
-        "selection": selection
-    }
+    return body
 
 
 
@@ -1330,6 +1146,10 @@ def get_hr_leaderboard(
 @router.get("/leaderboard/final")
 def get_final_leaderboard(
     contest_id: str,
+    response: Response,
+    page: int = 1,
+    page_size: Optional[int] = None,
+    if_none_match: Optional[str] = Header(None),
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
 
@@ -1344,52 +1164,61 @@ def get_final_leaderboard(
     verify_leaderboard_declare_time(timestamp, contest)
 
 
-    leaderboard_doc = contest_leaderboard.find_one(
-        {"contest_id": contest_obj_id},
-        {"final_leaderboard": 1, "_id": 0, "selected_candidates":1}
-    )
+    etag, body = leaderboard_view(contest_obj_id, "final", real_candidate_id, page, page_size)
 
-    if not leaderboard_doc:
-        raise HTTPException(status_code=404, detail="Leaderboard not generated")
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
 
-    leaderboard = leaderboard_doc["final_leaderboard"]
-    candidate_ids = [entry["candidate_id"] for entry in leaderboard]
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
 
+    return body
 
-    candidates = list(
-        candidate_collection.find(
-            {"_id": {"$in": candidate_ids}},
-            {"_id": 1, "full_name": 1}
-        )
-    )
-    name_map = {
-        c["_id"]: c["full_name"]
-        for c in candidates
-    }
 
-    result = []
-    for entry in leaderboard:
-        result.append({
-            "candidate_id": str(real_candidate_id) if real_candidate_id == entry["candidate_id"] else None,
-            "name": name_map.get(entry["candidate_id"], "Unknown"),
-            "rank": entry["rank"],
-            "percentile": entry["percentile"],
-            "score": entry["final_normalized_score"],
-            "latest_submission": entry["latest_submission"]
-        })
 
-    if real_candidate_id in leaderboard_doc["selected_candidates"]:
-        selection = True
-    else:
-        selection = False
+LEADERBOARD_RESULT_CHECKS = {
+    "resume": verify_resume_result_time,
+    "coding": verify_coding_result_time,
+    "concept": verify_concept_result_time,
+    "hr": verify_hr_result_time,
+    "final": verify_leaderboard_declare_time
+}
 
 
+@router.get("/leaderboard/stream")
+async def stream_leaderboard(
+    contest_id: str,
+    round: str,
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
 
-    return {
-        "success": True,
-        "data": result,
-        "selection": selection
-    }
+    token = credentials.credentials
+    payload = verify_access_token(token)
+    candidate, real_candidate_id, email = await asyncio.to_thread(verify_candidate_payload, payload)
+    contest, contest_obj_id = await asyncio.to_thread(verify_contest_id, contest_id)
+    contest_candidate = await asyncio.to_thread(verify_contest_registry, candidate, contest, "Y")
+
+    if round not in LEADERBOARD_RESULT_CHECKS:
+        raise HTTPException(status_code=400, detail="Invalid round")
+
+    check = LEADERBOARD_RESULT_CHECKS[round]
+
+    # the stream may be opened before results are out; nothing is sent
+    # until the round's result time has passed
+    def declared():
+        try:
+            check(generate_timestamp(), contest)
+            return True
+        except HTTPException:
+            return False
+
+    PUBLISHER.check_capacity()
+
+    return StreamingResponse(
+        leaderboard_events((contest_obj_id, round), real_candidate_id, declared),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 
@@ -1562,6 +1391,7 @@ def get_hr_question_bank(
 @router.get("/resume/file")
 def get_contest_resume_file(
     contest_id: str,
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
     token = credentials.credentials
@@ -1576,20 +1406,9 @@ def get_contest_resume_file(
 
     file_id = resume["file_id"]
 
-    try:
-        grid_out = contest_resume_fs.get(file_id)
-    except Exception:
-        raise HTTPException(
-            status_code=404,
-            detail="Resume file not found"
-        )
-
-    return StreamingResponse(
-        grid_out,
-        media_type=grid_out.content_type or "application/pdf",
-        headers={
-            "Content-Disposition": f'inline; filename="{grid_out.filename}"'
-        }
+    return serve_grid_file(
+        contest_resume_fs, file_id, request, "application/pdf", "Resume file not found",
+        filename=resume.get("filename", "resume.pdf")
     )
 
 
@@ -1598,6 +1417,7 @@ def get_contest_resume_file(
 def get_hr_audio_file(
     contest_id: str,
     question_id: str,
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
     token = credentials.credentials
@@ -1613,18 +1433,4 @@ def get_hr_audio_file(
 
     audio_id = question_data["audio_id"]
 
-    try:
-        grid_out = contest_audio_fs.get(audio_id)
-    except Exception:
-        raise HTTPException(
-            status_code=404,
-            detail="Audio file not found"
-        )
-
-    return StreamingResponse(
-        grid_out,
-        media_type=grid_out.content_type or "audio/wav",
-        headers={
-            "Content-Disposition": f'inline; filename="{grid_out.filename}"'
-        }
-    )
+    return serve_grid_file(contest_audio_fs, audio_id, request, "audio/wav", "Audio file not found")
@@ -1,14 +1,17 @@
+import asyncio
 from fastapi import APIRouter, HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from datetime import datetime, timezone, timedelta
 from database import github_collection, github_question_collection, candidate_collection
 from verify.token import verify_access_token
-from verify.candidate import verify_candidate_payload
-from utils.github import fetch_repositories, previous_github_session_questions, auto_submit
+from verify.candidate import verify_candidate_payload, invalidate_candidate
+from utils.github import fetch_repositories, previous_github_session_questions
+from utils.jobs import schedule_session_timeout
 from prompt.github import process_repo, generate_github_question, evaluate_github_answers, generate_github_combined_diff_session_feedback, generate_github_combined_same_session_feedback
 from verify.github import verify_github_link, verify_github_link_repo, verify_github, verify_question_number, verify_question_session, verify_session_status,verify_session_status2, verify_session_time, verify_timestamp
 from utils.time import generate_timestamp
-import asyncio
+from utils.history import schedule_session_digest
+from utils.combined_feedback import save_combined_feedback, list_combined_feedback, delete_combined_feedback
 
 
 router = APIRouter(
@@ -20,16 +23,16 @@ security = HTTPBearer()
 
 
 @router.post("/repos")
-def get_repositories(
+async def get_repositories(
     github_link: str,
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
     token = credentials.credentials
     payload = verify_access_token(token)
-    candidate, candidate_id, email = verify_candidate_payload(payload)
+    candidate, candidate_id, email = await asyncio.to_thread(verify_candidate_payload, payload)
 
-    verify_github_link(github_link)
-    repo_list = fetch_repositories(github_link)
+    await verify_github_link(github_link)
+    repo_list = await fetch_repositories(github_link)
 
     return {
         "success": True,
@@ -39,7 +42,7 @@ def get_repositories(
 
 
 @router.post("/repo")
-def get_repository_details(
+async def get_repository_details(
     github_link: str,
     repo_link: str,
     credentials: HTTPAuthorizationCredentials = Depends(security)
@@ -47,14 +50,16 @@ def get_repository_details(
 
     token = credentials.credentials
     payload = verify_access_token(token)
-    candidate, candidate_id, email = verify_candidate_payload(payload)
+    candidate, candidate_id, email = await asyncio.to_thread(verify_candidate_payload, payload)
+
+    await verify_github_link_repo(github_link, repo_link)
+    repo_details = await process_repo(repo_link)
 
-    verify_github_link_repo(github_link, repo_link)
-    repo_details = process_repo(repo_link)
+    totals = await asyncio.to_thread(candidate_collection.find_one, {"_id": candidate_id}, {"total_githubs": 1})
 
     github_doc = {
         "candidate_id": candidate_id,
-        "github_number": candidate["total_githubs"]+1,
+        "github_number": totals["total_githubs"]+1,
         "github_link": github_link,
         "repo_name": repo_details["repo_name"],
         "repo_link": repo_link,
@@ -63,9 +68,10 @@ def get_repository_details(
         "total_sessions":0
     }
 
-    result = github_collection.insert_one(github_doc)
+    result = await asyncio.to_thread(github_collection.insert_one, github_doc)
 
-    candidate_collection.update_one(
+    await asyncio.to_thread(
+        candidate_collection.update_one,
         {"_id": candidate_id},
         {
             "$inc": {
@@ -73,6 +79,7 @@ def get_repository_details(
             }
         }
     )
+    await asyncio.to_thread(invalidate_candidate, candidate_id)
 
     return {
         "success": True
@@ -175,12 +182,12 @@ async def generate_github_questions(
 
     previous_sessions = {}
     if session_number != 1:
-        previous_sessions,_ = previous_github_session_questions(github_obj_id)
+        previous_sessions,_ = await previous_github_session_questions(github_obj_id)
 
 
 
     try:
-        questions_json = generate_github_question(
+        questions_json = await generate_github_question(
             github_doc["summary"],
             num_questions,
             previous_sessions
@@ -233,16 +240,7 @@ async def generate_github_questions(
         i + 1: q for i, q in enumerate(questions_list)
     }
 
-    asyncio.create_task(
-        auto_submit(
-            str(github_id),
-            question_session_id=str(question_session_id),
-            token=token,
-            start_time = timestamp,
-            duration = time,
-            fun = submit_session
-        )
-    )
+    schedule_session_timeout("github", question_session_id, timestamp, time)
 
     return {
         "github_id": str(github_obj_id),
@@ -338,16 +336,7 @@ async def reattempt_session(
     inserted = github_question_collection.insert_one(new_doc)
     new_session_id = inserted.inserted_id
 
-    asyncio.create_task(
-        auto_submit(
-            github_id,
-            question_session_id=str(new_session_id),
-            token=token,
-            start_time = timestamp,
-            duration = old_session_doc["time"],
-            fun = submit_session
-        )
-    )
+    schedule_session_timeout("github", new_session_id, timestamp, old_session_doc["time"])
 
     return {
         "new_question_session_id": str(new_session_id)
@@ -405,7 +394,7 @@ def fake_submit_session(
 
 
 @router.get("/questions/feedback")
-def generate_feedback(
+async def generate_feedback(
     github_id: str,
     question_session_id: str,
     credentials: HTTPAuthorizationCredentials = Depends(security)
@@ -413,17 +402,18 @@ def generate_feedback(
 
     token = credentials.credentials
     payload = verify_access_token(token)
-    candidate, candidate_id, email = verify_candidate_payload(payload)
+    candidate, candidate_id, email = await asyncio.to_thread(verify_candidate_payload, payload)
 
-    github_doc, github_obj_id = verify_github(github_id, candidate_id)
-    session_doc, session_obj_id = verify_question_session(
+    github_doc, github_obj_id = await asyncio.to_thread(verify_github, github_id, candidate_id)
+    session_doc, session_obj_id = await asyncio.to_thread(
+        verify_question_session,
         question_session_id,
         github_obj_id
     )
     verify_session_status2(session_doc)
 
     try:
-        feedback_result = evaluate_github_answers(
+        feedback_result = await evaluate_github_answers(
             github_doc["summary"],
             session_doc["question_bank"]
         )
@@ -450,7 +440,8 @@ def generate_feedback(
             q["feedback"] = feedback_map[qn]["feedback"]
             q["score"] = feedback_map[qn]["score"]
 
-    github_question_collection.update_one(
+    await asyncio.to_thread(
+        github_question_collection.update_one,
         {"_id": session_obj_id},
         {
             "$set": {
@@ -461,6 +452,8 @@ def generate_feedback(
         }
     )
 
+    await asyncio.to_thread(schedule_session_digest, "github", session_obj_id)
+
 
     return {
         "question_session_id": str(session_obj_id),
@@ -555,6 +548,8 @@ def delete_github(
         "_id": github_obj_id
     })
 
+    delete_combined_feedback(github_obj_id)
+
     return {"success": True}
 
 
@@ -640,22 +635,14 @@ async def delete_and_reattempt(
             },
             "$unset": {
                 "submitted_at_frontend": "",
-                "submitted_at_backend": ""
+                "submitted_at_backend": "",
+                "history_digest": ""
             }
         }
     )
 
 
-    asyncio.create_task(
-        auto_submit(
-            github_id,
-            question_session_id=question_session_id,
-            token=token,
-            start_time = timestamp,
-            duration = session_doc["time"],
-            fun = submit_session
-        )
-    )
+    schedule_session_timeout("github", question_session_id, timestamp, session_doc["time"])
 
     return {"success": True}
 
@@ -665,7 +652,7 @@ async def delete_and_reattempt(
 
 
 @router.get("/progress/github")
-def combined_feedback_last_x_sessions(
+async def combined_feedback_last_x_sessions(
     github_id: str,
     x: int,
     credentials: HTTPAuthorizationCredentials = Depends(security)
@@ -676,28 +663,16 @@ def combined_feedback_last_x_sessions(
 
     token = credentials.credentials
     payload = verify_access_token(token)
-    candidate, candidate_id, email = verify_candidate_payload(payload)
+    candidate, candidate_id, email = await asyncio.to_thread(verify_candidate_payload, payload)
 
-    github_doc, github_obj_id = verify_github(github_id, candidate_id)
+    github_doc, github_obj_id = await asyncio.to_thread(verify_github, github_id, candidate_id)
 
-    session_dict, sessions_used = previous_github_session_questions(
-    github_obj_id,x=x)
+    session_dict, sessions_used = await previous_github_session_questions(
+    github_obj_id,x=x, digests=True)
     
-    feedback = generate_github_combined_diff_session_feedback(github_doc["summary"], session_dict)
+    feedback = await generate_github_combined_diff_session_feedback(github_doc["summary"], session_dict)
 
-    github_collection.update_one(
-        {"_id": github_obj_id},
-        {
-            "$push": {
-                "combined_feedback": {
-                    "sessions_used": sessions_used,
-                    "feedback": feedback,
-                    "type": "different",
-                    "timestamp": generate_timestamp()
-                }
-            }
-        }
-    )
+    await asyncio.to_thread(save_combined_feedback, "github", github_obj_id, "different", sessions_used, feedback)
 
     return {
         "sessions_used": sessions_used,
@@ -707,7 +682,7 @@ def combined_feedback_last_x_sessions(
 
 
 @router.get("/progress/session")
-def combined_feedback_same_session(
+async def combined_feedback_same_session(
     github_id: str,
     question_session_id: str,
     x: int,
@@ -719,37 +694,27 @@ def combined_feedback_same_session(
 
     token = credentials.credentials
     payload = verify_access_token(token)
-    candidate, candidate_id, email = verify_candidate_payload(payload)
+    candidate, candidate_id, email = await asyncio.to_thread(verify_candidate_payload, payload)
 
-    github_doc, github_obj_id = verify_github(github_id, candidate_id)
-    session_doc, session_obj_id = verify_question_session(
+    github_doc, github_obj_id = await asyncio.to_thread(verify_github, github_id, candidate_id)
+    session_doc, session_obj_id = await asyncio.to_thread(
+        verify_question_session,
         question_session_id,
         github_obj_id
     )
 
     session_number = session_doc["session_number"]
 
-    session_dict, sessions_used = previous_github_session_questions(
+    session_dict, sessions_used = await previous_github_session_questions(
     github_obj_id,
     x=x,
-    session_number=session_number)
+    session_number=session_number,
+    digests=True)
 
-    feedback = generate_github_combined_same_session_feedback(github_doc["summary"], session_dict)
+    feedback = await generate_github_combined_same_session_feedback(github_doc["summary"], session_dict)
 
 
-    github_collection.update_one(
-        {"_id": github_obj_id},
-        {
-            "$push": {
-                "combined_feedback": {
-                    "sessions_used": sessions_used,
-                    "feedback": feedback,
-                    "type":"same",
-                    "timestamp": generate_timestamp()
-                }
-            }
-        }
-    )
+    await asyncio.to_thread(save_combined_feedback, "github", github_obj_id, "same", sessions_used, feedback)
 
     return {
         "sessions_used": sessions_used,
@@ -769,15 +734,7 @@ def get_different_combined_feedback(
 
     github_doc, github_obj_id = verify_github(github_id, candidate_id)
 
-    combined_feedback = []
-    for item in github_doc.get("combined_feedback", []):
-        if item.get("type") == "different":
-            combined_feedback.append({
-                "sessions_used": item.get("sessions_used", {}),
-                "feedback": item.get("feedback", ""),
-                "type": item.get("type"),
-                "timestamp": item.get("timestamp", None)
-            })
+    combined_feedback = list_combined_feedback("github", github_obj_id, "different")
 
     return {
         "resume_id": str(github_obj_id),
@@ -797,17 +754,7 @@ def get_same_combined_feedback(
 
     github_doc, github_obj_id = verify_github(github_id, candidate_id)
 
-    combined_feedback = []
-    for item in github_doc.get("combined_feedback", []):
-        if item.get("type") == "same":
-            first_session = next(iter(item.get("sessions_used", {}).values()), None)
-            if first_session and first_session.get("session_number") == session_number:
-                combined_feedback.append({
-                    "sessions_used": item.get("sessions_used", {}),
-                    "feedback": item.get("feedback", ""),
-                    "type": item.get("type"),
-                    "timestamp": item.get("timestamp", None)
-                })
+    combined_feedback = list_combined_feedback("github", github_obj_id, "same", session_number)
 
 
     return {
@@ -1,18 +1,23 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+import asyncio
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from tempfile import NamedTemporaryFile
-import shutil
-import os
 from database import resume_collection, resume_question_collection, resume_fs, candidate_collection
-from prompt.resume import process_resume, generate_resume_question, evaluate_resume_answers, generate_resume_combined_diff_session_feedback, generate_resume_combined_same_session_feedback
+from prompt.resume import generate_resume_question, evaluate_resume_answers, generate_resume_combined_diff_session_feedback, generate_resume_combined_same_session_feedback
 from verify.token import verify_access_token
-from verify.candidate import verify_candidate_payload
-from verify.resume import verify_resume, verify_question_session, verify_session_status,verify_session_status2, verify_session_time, verify_question_number, verify_file_id, verify_timestamp
-from fastapi.responses import StreamingResponse
+from verify.candidate import verify_candidate_payload, invalidate_candidate
+from verify.resume import verify_resume, verify_resume_ready, verify_question_session, verify_session_status,verify_session_status2, verify_session_time, verify_question_number, verify_file_id, verify_timestamp
+from utils.files import serve_grid_file
+from utils.upload import receive_upload, discard_upload
+from utils.artifacts import release_blob
+from utils.ingest import schedule_resume_ingest, resume_status
+from utils.scheduler import cancel_job
+from utils.reader import RESUME_MAX_BYTES
 from datetime import datetime, timedelta, timezone
-from utils.resume import previous_resume_session_questions, auto_submit
+from utils.resume import previous_resume_session_questions
+from utils.jobs import schedule_session_timeout
 from utils.time import generate_timestamp
-import asyncio
+from utils.history import schedule_session_digest
+from utils.combined_feedback import save_combined_feedback, list_combined_feedback, delete_combined_feedback
 from fastapi import BackgroundTasks
 
 router = APIRouter(
@@ -39,27 +44,28 @@ async def upload_resume(
 
     original_filename = file.filename
 
-    with NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-        shutil.copyfileobj(file.file, tmp)
-        temp_path = tmp.name
+    upload = await receive_upload(file, resume_fs, "application/pdf", RESUME_MAX_BYTES, "resume")
+    file_id = upload["file_id"]
 
     try:
-        summary = process_resume(temp_path, ocr_mode)
-    
-        with open(temp_path, "rb") as f:
-            file_id = resume_fs.put(
-                f,
-                filename=original_filename,
-                content_type="application/pdf"
-            )
+        timestamp = generate_timestamp()
 
+        # extraction and summarization run as a resume_ingest job
         resume_doc = {
             "candidate_id": candidate_id,
-            "resume_number": candidate["total_resumes"]+1,
-            "summary": summary,
+            "resume_number": candidate_collection.find_one({"_id": candidate_id}, {"total_resumes": 1})["total_resumes"]+1,
+            "summary": None,
+            "status": "processing",
+            "ingest": {
+                "stage": "extract",
+                "ocr_mode": ocr_mode.upper(),
+                "error": None,
+                "updated_at": timestamp
+            },
             "file_id": file_id,
             "filename": original_filename,
-            "created_on": generate_timestamp(),
+            "sha256": upload["sha256"],
+            "created_on": timestamp,
             "total_sessions":0
         }
 
@@ -73,12 +79,36 @@ async def upload_resume(
                 }
             }
         )
+        invalidate_candidate(candidate_id)
 
-    finally:
-        os.remove(temp_path)
+        schedule_resume_ingest(result.inserted_id)
+
+    except BaseException:
+        discard_upload(resume_fs, upload)
+        raise
 
     return {
-        "success": True
+        "success": True,
+        "resume_id": str(result.inserted_id),
+        "status": "processing"
+    }
+
+
+
+@router.get("/status")
+def get_resume_status(
+    resume_id: str,
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
+
+    token = credentials.credentials
+    payload = verify_access_token(token)
+    candidate, candidate_id, email = verify_candidate_payload(payload)
+    resume_doc, resume_obj_id = verify_resume(resume_id, candidate_id)
+
+    return {
+        "success": True,
+        **resume_status(resume_doc)
     }
 
 
@@ -119,6 +149,7 @@ def get_all_resume_ids(
 @router.get("/file")
 def get_resume_file(
     resume_id: str,
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
     token = credentials.credentials
@@ -128,14 +159,9 @@ def get_resume_file(
 
     file_id = resume_doc["file_id"]
 
-    grid_out = resume_fs.get(file_id)
-
-    return StreamingResponse(
-        grid_out,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": f'inline; filename="{grid_out.filename}"'
-        }
+    return serve_grid_file(
+        resume_fs, file_id, request, "application/pdf", "Resume file not found",
+        filename=resume_doc.get("filename")
     )
 
 
@@ -206,17 +232,18 @@ async def generate_questions(
     candidate, candidate_id, email = verify_candidate_payload(payload)
     
     resume_doc, resume_obj_id = verify_resume(resume_id, candidate_id)
+    verify_resume_ready(resume_doc)
     session_number = resume_doc["total_sessions"] + 1   
 
     
     previous_sessions = {}
     if session_number != 1:
-        previous_sessions,_ = previous_resume_session_questions(resume_obj_id)
+        previous_sessions,_ = await previous_resume_session_questions(resume_obj_id)
 
 
 
     try:
-        questions_json = generate_resume_question(
+        questions_json = await generate_resume_question(
             resume_doc["summary"],
             num_questions,
             previous_sessions
@@ -264,16 +291,7 @@ async def generate_questions(
         }
     )
 
-    asyncio.create_task(
-        auto_submit(
-            str(resume_id),
-            question_session_id=str(question_session_id),
-            token=token,
-            start_time = timestamp,
-            duration = time,
-            fun = submit_session
-        )
-    )
+    schedule_session_timeout("resume", question_session_id, timestamp, time)
 
     formatted_questions = {
         i + 1: q for i, q in enumerate(questions_list)
@@ -384,16 +402,7 @@ async def reattempt_session(
     inserted = resume_question_collection.insert_one(new_doc)
     new_session_id = inserted.inserted_id
 
-    asyncio.create_task(
-        auto_submit(
-            resume_id,
-            question_session_id=str(new_session_id),
-            token=token,
-            start_time = timestamp,
-            duration = old_session_doc["time"],
-            fun = submit_session
-        )
-    )
+    schedule_session_timeout("resume", new_session_id, timestamp, old_session_doc["time"])
 
     return {
         "new_question_session_id": str(new_session_id)
@@ -455,7 +464,7 @@ def fake_submit_session(
 
 
 @router.get("/questions/feedback")
-def generate_feedback(
+async def generate_feedback(
     resume_id: str,
     question_session_id: str,
     credentials: HTTPAuthorizationCredentials = Depends(security)
@@ -463,17 +472,18 @@ def generate_feedback(
 
     token = credentials.credentials
     payload = verify_access_token(token)
-    candidate, candidate_id, email = verify_candidate_payload(payload)
+    candidate, candidate_id, email = await asyncio.to_thread(verify_candidate_payload, payload)
 
-    resume_doc, resume_obj_id = verify_resume(resume_id, candidate_id)
-    session_doc, session_obj_id = verify_question_session(
+    resume_doc, resume_obj_id = await asyncio.to_thread(verify_resume, resume_id, candidate_id)
+    session_doc, session_obj_id = await asyncio.to_thread(
+        verify_question_session,
         question_session_id,
         resume_obj_id
     )
     verify_session_status2(session_doc)
 
     try:
-        feedback_result = evaluate_resume_answers(
+        feedback_result = await evaluate_resume_answers(
             resume_doc["summary"],
             session_doc["question_bank"]
         )
@@ -500,7 +510,8 @@ def generate_feedback(
             q["feedback"] = feedback_map[qn]["feedback"]
             q["score"] = feedback_map[qn]["score"]
 
-    resume_question_collection.update_one(
+    await asyncio.to_thread(
+        resume_question_collection.update_one,
         {"_id": session_obj_id},
         {
             "$set": {
@@ -511,6 +522,8 @@ def generate_feedback(
         }
     )
 
+    await asyncio.to_thread(schedule_session_digest, "resume", session_obj_id)
+
 
     return {
         "question_session_id": str(session_obj_id),
@@ -603,12 +616,16 @@ def delete_resume(
 
     file_id = resume_doc.get("file_id")
     if file_id:
-        resume_fs.delete(file_id)
+        release_blob("resume", file_id)
+
+    cancel_job("resume_ingest", str(resume_obj_id))
 
     resume_collection.delete_one({
         "_id": resume_obj_id
     })
 
+    delete_combined_feedback(resume_obj_id)
+
     return {"success": True}
 
 
@@ -694,21 +711,13 @@ async def delete_and_reattempt(
             },
             "$unset": {
                 "submitted_at_frontend": "",
-                "submitted_at_backend": ""
+                "submitted_at_backend": "",
+                "history_digest": ""
             }
         }
     )
 
-    asyncio.create_task(
-        auto_submit(
-            resume_id,
-            question_session_id=question_session_id,
-            token=token,
-            start_time = timestamp,
-            duration = session_doc["time"],
-            fun = submit_session
-        )
-    )
+    schedule_session_timeout("resume", question_session_id, timestamp, session_doc["time"])
 
     return {"success": True}
 
@@ -718,7 +727,7 @@ async def delete_and_reattempt(
 
 
 @router.get("/progress/resume")
-def combined_feedback_last_x_sessions(
+async def combined_feedback_last_x_sessions(
     resume_id: str,
     x: int,
     credentials: HTTPAuthorizationCredentials = Depends(security)
@@ -729,28 +738,16 @@ def combined_feedback_last_x_sessions(
 
     token = credentials.credentials
     payload = verify_access_token(token)
-    candidate, candidate_id, email = verify_candidate_payload(payload)
+    candidate, candidate_id, email = await asyncio.to_thread(verify_candidate_payload, payload)
 
-    resume_doc, resume_obj_id = verify_resume(resume_id, candidate_id)
+    resume_doc, resume_obj_id = await asyncio.to_thread(verify_resume, resume_id, candidate_id)
 
-    session_dict, sessions_used = previous_resume_session_questions(
-    resume_obj_id,x=x)
+    session_dict, sessions_used = await previous_resume_session_questions(
+    resume_obj_id,x=x, digests=True)
     
-    feedback = generate_resume_combined_diff_session_feedback(resume_doc["summary"], session_dict)
+    feedback = await generate_resume_combined_diff_session_feedback(resume_doc["summary"], session_dict)
 
-    resume_collection.update_one(
-        {"_id": resume_obj_id},
-        {
-            "$push": {
-                "combined_feedback": {
-                    "sessions_used": sessions_used,
-                    "feedback": feedback,
-                    "type": "different",
-                    "timestamp": generate_timestamp()
-                }
-            }
-        }
-    )
+    await asyncio.to_thread(save_combined_feedback, "resume", resume_obj_id, "different", sessions_used, feedback)
 
     return {
         "sessions_used": sessions_used,
@@ -760,7 +757,7 @@ def combined_feedback_last_x_sessions(
 
 
 @router.get("/progress/session")
-def combined_feedback_same_session(
+async def combined_feedback_same_session(
     resume_id: str,
     question_session_id: str,
     x: int,
@@ -772,37 +769,27 @@ def combined_feedback_same_session(
 
     token = credentials.credentials
     payload = verify_access_token(token)
-    candidate, candidate_id, email = verify_candidate_payload(payload)
+    candidate, candidate_id, email = await asyncio.to_thread(verify_candidate_payload, payload)
 
-    resume_doc, resume_obj_id = verify_resume(resume_id, candidate_id)
-    session_doc, session_obj_id = verify_question_session(
+    resume_doc, resume_obj_id = await asyncio.to_thread(verify_resume, resume_id, candidate_id)
+    session_doc, session_obj_id = await asyncio.to_thread(
+        verify_question_session,
         question_session_id,
         resume_obj_id
     )
 
     session_number = session_doc["session_number"]
 
-    session_dict, sessions_used = previous_resume_session_questions(
+    session_dict, sessions_used = await previous_resume_session_questions(
     resume_obj_id,
     x=x,
-    session_number=session_number)
+    session_number=session_number,
+    digests=True)
 
-    feedback = generate_resume_combined_same_session_feedback(resume_doc["summary"], session_dict)
+    feedback = await generate_resume_combined_same_session_feedback(resume_doc["summary"], session_dict)
 
 
-    resume_collection.update_one(
-        {"_id": resume_obj_id},
-        {
-            "$push": {
-                "combined_feedback": {
-                    "sessions_used": sessions_used,
-                    "feedback": feedback,
-                    "type":"same",
-                    "timestamp": generate_timestamp()
-                }
-            }
-        }
-    )
+    await asyncio.to_thread(save_combined_feedback, "resume", resume_obj_id, "same", sessions_used, feedback)
 
     return {
         "sessions_used": sessions_used,
@@ -823,15 +810,7 @@ def get_different_combined_feedback(
 
     resume_doc, resume_obj_id = verify_resume(resume_id, candidate_id)
 
-    combined_feedback = []
-    for item in resume_doc.get("combined_feedback", []):
-        if item.get("type") == "different":
-            combined_feedback.append({
-                "sessions_used": item.get("sessions_used", {}),
-                "feedback": item.get("feedback", ""),
-                "type": item.get("type"),
-                "timestamp": item.get("timestamp", None)
-            })
+    combined_feedback = list_combined_feedback("resume", resume_obj_id, "different")
 
     return {
         "resume_id": str(resume_obj_id),
@@ -851,17 +830,7 @@ def get_same_combined_feedback(
 
     resume_doc, resume_obj_id = verify_resume(resume_id, candidate_id)
 
-    combined_feedback = []
-    for item in resume_doc.get("combined_feedback", []):
-        if item.get("type") == "same":
-            first_session = next(iter(item.get("sessions_used", {}).values()), None)
-            if first_session and first_session.get("session_number") == session_number:
-                combined_feedback.append({
-                    "sessions_used": item.get("sessions_used", {}),
-                    "feedback": item.get("feedback", ""),
-                    "type": item.get("type"),
-                    "timestamp": item.get("timestamp", None)
-                })
+    combined_feedback = list_combined_feedback("resume", resume_obj_id, "same", session_number)
 
 
     return {
@@ -1,253 +1,252 @@
-import asyncio
-from utils.time import generate_timestamp
-from fastapi.security import HTTPAuthorizationCredentials
-import inspect
+from fastapi import HTTPException
 from bson import ObjectId
-from database import contest_candidate_collection, contest_collection, candidate_collection
-from bson import ObjectId
-import inspect
-from utils.contest import generate_coding_scores, generate_concept_scores, generate_hr_scores
+from database import candidate_collection, contest_candidate_collection, contest_leaderboard
+import csv
+import io
+import json
+from utils.scoring import score_pending_candidates
 
 
 
 
-async def run_contest_scheduler(
-    contest: dict,
-    token: str,
-    generate_hr_result,
-    generate_coding_result,
-    generate_resume_result, 
-    generate_concept_result, 
-    generate_leaderboard
+async def fake_submit_candidate_coding(
+    contest_id: ObjectId,
+    contest: dict
 ):
-    credentials = HTTPAuthorizationCredentials(
-        scheme="Bearer",
-        credentials=token
-    )
-    contest_id = str(contest["_id"])
+    await score_pending_candidates(contest_id, contest, "coding")
 
 
 
-    async def wait_until(target_time, fun):
 
-        now = generate_timestamp()
-        wait_seconds = (target_time - now).total_seconds()
+async def fake_submit_candidate_concept(
+    contest_id: ObjectId,
+    contest: dict
+):
+    await score_pending_candidates(contest_id, contest, "concept")
 
-        if wait_seconds > 0:
-            await asyncio.sleep(wait_seconds)
 
-        if inspect.iscoroutinefunction(fun):
-            await fun(contest_id, credentials)
-        else:
-            fun(contest_id, credentials)
 
 
+async def fake_submit_candidate_hr(
+    contest_id: ObjectId,
+    contest: dict
+):
+    await score_pending_candidates(contest_id, contest, "hr")
 
-    await wait_until(
-        contest["resume_round"]["result"],
-        generate_resume_result
-    )
-    await wait_until(
-        contest["coding_round"]["result"],
-        generate_coding_result
-    )
-    await wait_until(
-        contest["concept_round"]["result"],
-        generate_concept_result
-    )
-    await wait_until(
-        contest["hr_round"]["result"],
-        generate_hr_result
-    )
-    await wait_until(
-        contest["leaderboard_declare_time"],
-        generate_leaderboard
-    )
 
 
 
 
-def fake_submit_candidate_coding(
-    contest_id: ObjectId,
-    contest: dict
-):
-    fake_submit_ids = contest.get("fake_submit_coding", [])
-    
-    if fake_submit_ids:
-
-        fake_contest_candidates = list(
-            contest_candidate_collection.find(
-                {
-                    "contest_id": contest_id,
-                    "candidate_id": {"$in": fake_submit_ids}
-                },
-                {
-                    "_id": 0,
-                    "candidate_id": 1,
-                    "coding": 1
-                }
-            )
-        )
-
-        for contest_candidate in fake_contest_candidates:
-            generate_coding_scores(
-                contest_id, 
-                contest_candidate["candidate_id"], 
-                contest_candidate
-            )
-
-            contest_candidate_collection.update_one(
-                {
-                    "contest_id": contest_id,
-                    "candidate_id": contest_candidate["candidate_id"]
-                },
-                {
-                    "$set": {
-                        "coding.submitted_at": contest_candidate["coding"]["end_time"]
-                    }
-                }
-            )
-
-    contest_collection.update_one(
-            {"_id": contest_id},
-            {"$set": {"fake_submit_coding": []}}
-        )
-
-
-
-
-
-
-
-def fake_submit_candidate_concept(
-    contest_id: ObjectId,
-    contest: dict
-):
-    fake_submit_ids = contest.get("fake_submit_concept", [])
-    
-    if fake_submit_ids:
-
-        fake_contest_candidates = list(
-            contest_candidate_collection.find(
-                {
-                    "contest_id": contest_id,
-                    "candidate_id": {"$in": fake_submit_ids}
-                },
-                {
-                    "_id": 0,
-                    "candidate_id": 1,
-                    "concept": 1
-                }
-            )
-        )
-
-        for contest_candidate in fake_contest_candidates:
-            generate_concept_scores(
-                contest_id, 
-                contest_candidate["candidate_id"], 
-                contest_candidate
-            )
-
-            contest_candidate_collection.update_one(
-                {
-                    "contest_id": contest_id,
-                    "candidate_id": contest_candidate["candidate_id"]
-                },
-                {
-                    "$set": {
-                        "concept.submitted_at": contest_candidate["concept"]["end_time"]
-                    }
-                }
-            )
-    
-    contest_collection.update_one(
-            {"_id": contest_id},
-            {"$set": {"fake_submit_concept": []}}
-        )
-
-
-
-
-def fake_submit_candidate_hr(
+
+
+
+LEADERBOARD_COLUMNS = ["candidate_id", "name", "email", "rank", "percentile", "score", "latest_submission"]
+CANDIDATE_COLUMNS = ["candidate_id", "name", "email", "last_round_participated"]
+
+CANDIDATE_LOOKUP = [
+    {
+        "$lookup": {
+            "from": candidate_collection.name,
+            "localField": "candidate_id",
+            "foreignField": "_id",
+            "as": "candidate"
+        }
+    },
+    {
+        "$set": {
+            "name": {"$first": "$candidate.full_name"},
+            "email": {"$first": "$candidate.email"}
+        }
+    },
+    {"$project": {"candidate": 0}}
+]
+
+
+
+
+def leaderboard_exists(contest_id: ObjectId, board_key: str) -> bool:
+
+    return contest_leaderboard.count_documents(
+        {"contest_id": contest_id, board_key: {"$exists": True}},
+        limit=1
+    ) > 0
+
+
+
+
+def leaderboard_rows(
     contest_id: ObjectId,
-    contest: dict
+    board_key: str,
+    min_rank: int = None,
+    max_rank: int = None,
+    cursor: int = None,
+    descending: bool = False,
+    limit: int = None
 ):
-    fake_submit_ids = contest.get("fake_submit_hr", [])
-    
-    if fake_submit_ids:
-
-        fake_contest_candidates = list(
-            contest_candidate_collection.find(
-                {
-                    "contest_id": contest_id,
-                    "candidate_id": {"$in": fake_submit_ids}
-                },
-                {
-                    "_id": 0,
-                    "candidate_id": 1,
-                    "hr": 1
-                }
-            )
-        )
-
-        for contest_candidate in fake_contest_candidates:
-            generate_hr_scores(
-                contest_id, 
-                contest_candidate["candidate_id"], 
-                contest_candidate
-            )
-
-            contest_candidate_collection.update_one(
-                {
-                    "contest_id": contest_id,
-                    "candidate_id": contest_candidate["candidate_id"]
-                },
-                {
-                    "$set": {
-                        "hr.submitted_at": contest_candidate["hr"]["end_time"]
-                    }
-                }
-            )
-    
-    contest_collection.update_one(
-            {"_id": contest_id},
-            {"$set": {"fake_submit_hr": []}}
-        )
-
-
-
-
-
-
-
-
-def format_leaderboard(entries):
-    candidate_ids = [entry["candidate_id"] for entry in entries]
-
-    candidates = list(
-        candidate_collection.find(
-            {"_id": {"$in": candidate_ids}},
-            {"full_name": 1, "email": 1}
-        )
-    )
-
-    candidate_map = {
-        c["_id"]: {
-            "name": c.get("full_name"),
-            "email": c.get("email")
-        }
-        for c in candidates
-    }
 
-    return [
-        {
+    # entries are unwound out of the stored board one at a time, so neither
+    # Mongo's reply nor this process ever holds the whole board
+    pipeline = [
+        {"$match": {"contest_id": contest_id}},
+        {"$project": {"_id": 0, "entry": f"${board_key}"}},
+        {"$unwind": {"path": "$entry", "includeArrayIndex": "position"}}
+    ]
+
+    match = {}
+
+    if min_rank is not None or max_rank is not None:
+        match["entry.rank"] = {}
+        if min_rank is not None:
+            match["entry.rank"]["$gte"] = min_rank
+        if max_rank is not None:
+            match["entry.rank"]["$lte"] = max_rank
+
+    # the position in the stored board is the pagination cursor
+    if cursor is not None:
+        match["position"] = {"$lt" if descending else "$gt": cursor}
+
+    if match:
+        pipeline.append({"$match": match})
+
+    if descending:
+        pipeline.append({"$sort": {"position": -1}})
+
+    if limit:
+        pipeline.append({"$limit": limit})
+
+    pipeline.append({"$set": {"candidate_id": "$entry.candidate_id"}})
+    pipeline += CANDIDATE_LOOKUP
+
+    rows = contest_leaderboard.aggregate(pipeline, allowDiskUse=True, batchSize=1000)
+
+    for row in rows:
+        entry = row["entry"]
+
+        yield row["position"], {
             "candidate_id": str(entry["candidate_id"]),
-            "name": candidate_map.get(entry["candidate_id"], {}).get("name"),
-            "email": candidate_map.get(entry["candidate_id"], {}).get("email"),
+            "name": row.get("name"),
+            "email": row.get("email"),
             "rank": entry.get("rank"),
             "percentile": entry.get("percentile"),
             "score": entry.get("final_normalized_score"),
             "latest_submission": entry.get("latest_submission")
         }
-        for entry in entries
+
+
+
+
+def leaderboard_page(
+    contest_id: ObjectId,
+    board_key: str,
+    missing_detail: str,
+    limit: int = None,
+    cursor: int = None,
+    min_rank: int = None,
+    max_rank: int = None,
+    order: str = "asc"
+):
+
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be asc or desc")
+
+    if limit is not None and limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be positive")
+
+    if not leaderboard_exists(contest_id, board_key):
+        raise HTTPException(status_code=404, detail=missing_detail)
+
+    data = []
+    next_cursor = None
+
+    for position, row in leaderboard_rows(contest_id, board_key, min_rank, max_rank, cursor, order == "desc", limit):
+        data.append(row)
+        next_cursor = position
+
+    if not limit or len(data) < limit:
+        next_cursor = None
+
+    return {
+        "success": True,
+        "data": data,
+        "next_cursor": next_cursor
+    }
+
+
+
+
+def candidate_rows(contest_id: ObjectId, round_name: str = None, cursor: ObjectId = None, limit: int = None):
+
+    match = {"contest_id": contest_id}
+
+    if round_name:
+        match[round_name] = {"$exists": True}
+
+    # (contest_id, candidate_id) is indexed, so candidate_id is the cursor
+    if cursor is not None:
+        match["candidate_id"] = {"$gt": cursor}
+
+    pipeline = [
+        {"$match": match},
+        {"$sort": {"candidate_id": 1}}
     ]
+
+    if limit:
+        pipeline.append({"$limit": limit})
+
+    pipeline.append({
+        "$project": {
+            "_id": 0,
+            "candidate_id": 1,
+            "resume": {"$ne": ["$resume", None]},
+            "coding": {"$ne": ["$coding", None]},
+            "concept": {"$ne": ["$concept", None]},
+            "hr": {"$ne": ["$hr", None]}
+        }
+    })
+    pipeline += CANDIDATE_LOOKUP
+
+    for cc in contest_candidate_collection.aggregate(pipeline, allowDiskUse=True, batchSize=1000):
+
+        if cc.get("hr"):
+            last_round = "hr"
+        elif cc.get("concept"):
+            last_round = "concept"
+        elif cc.get("coding"):
+            last_round = "coding"
+        elif cc.get("resume"):
+            last_round = "resume"
+        else:
+            last_round = None
+
+        yield cc["candidate_id"], {
+            "candidate_id": str(cc["candidate_id"]),
+            "name": cc.get("name"),
+            "email": cc.get("email"),
+            "last_round_participated": last_round
+        }
+
+
+
+
+def export_lines(rows, columns: list, export_format: str):
+
+    rows = (row for _, row in rows)
+
+    if export_format == "ndjson":
+        for row in rows:
+            yield json.dumps(row, default=str) + "\n"
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+
+    for i, row in enumerate(rows, 1):
+        writer.writerow([row.get(column) for column in columns])
+
+        if i % 500 == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
@@ -0,0 +1,158 @@
+import asyncio
+from fastapi import HTTPException
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from gridfs.errors import NoFile
+from database import file_artifacts_collection, resume_fs, contest_resume_fs
+from utils.resume import extract_text_with_ocr, extract_text_without_ocr
+from utils.time import generate_timestamp
+
+
+# buckets whose blobs are shared by content hash
+BUCKETS = {
+    "resume": resume_fs,
+    "contest_resume": contest_resume_fs
+}
+
+
+
+
+def claim_blob(bucket: str, sha256: str, file_id, length: int):
+
+    now = generate_timestamp()
+
+    try:
+        file_artifacts_collection.update_one(
+            {"_id": sha256},
+            {"$setOnInsert": {"length": length, "created_at": now}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        pass
+
+    # a blob already stored under this hash wins; the fresh copy is dropped.
+    # Otherwise this upload becomes the stored blob. Retried if another
+    # upload of the same bytes claims the slot in between
+    while True:
+
+        existing = file_artifacts_collection.find_one_and_update(
+            {"_id": sha256, f"blobs.{bucket}": {"$exists": True}},
+            {"$inc": {f"refs.{bucket}": 1}, "$set": {"updated_at": now}},
+            projection={f"blobs.{bucket}": 1},
+            return_document=ReturnDocument.AFTER
+        )
+
+        if existing is not None:
+            stored_id = existing["blobs"][bucket]
+
+            if stored_id != file_id:
+                BUCKETS[bucket].delete(file_id)
+
+            return stored_id
+
+        claimed = file_artifacts_collection.update_one(
+            {"_id": sha256, f"blobs.{bucket}": {"$exists": False}},
+            {"$set": {f"blobs.{bucket}": file_id, f"refs.{bucket}": 1, "updated_at": now}}
+        )
+
+        if claimed.modified_count:
+            return file_id
+
+
+
+
+def release_blob(bucket: str, file_id):
+
+    fs = BUCKETS[bucket]
+
+    released = file_artifacts_collection.find_one_and_update(
+        {f"blobs.{bucket}": file_id},
+        {"$inc": {f"refs.{bucket}": -1}},
+        projection={"_id": 1},
+        return_document=ReturnDocument.AFTER
+    )
+
+    # stored before deduplication: owned by a single document
+    if released is None:
+        try:
+            fs.delete(file_id)
+        except NoFile:
+            pass
+        return
+
+    # only the release that takes the count to zero drops the blob; a claim
+    # racing with it bumps the count first and keeps it
+    dropped = file_artifacts_collection.update_one(
+        {"_id": released["_id"], f"blobs.{bucket}": file_id, f"refs.{bucket}": {"$lte": 0}},
+        {"$unset": {f"blobs.{bucket}": "", f"refs.{bucket}": ""}}
+    )
+
+    if dropped.modified_count:
+        fs.delete(file_id)
+
+
+
+
+def get_artifact(sha256: str, field: str):
+
+    doc = file_artifacts_collection.find_one({"_id": sha256}, {field: 1})
+
+    for part in field.split("."):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(part)
+
+    return doc
+
+
+
+
+def store_artifact(sha256: str, field: str, value):
+    file_artifacts_collection.update_one(
+        {"_id": sha256},
+        {"$set": {field: value, "updated_at": generate_timestamp()}},
+        upsert=True
+    )
+
+
+
+
+def text_field(ocr_mode: str) -> str:
+    return "text.ocr" if ocr_mode.upper() == "Y" else "text.plain"
+
+
+
+
+
+def summary_field(ocr_mode: str) -> str:
+    # a summary is only as good as the text it was made from
+    return "summaries.ocr" if ocr_mode.upper() == "Y" else "summaries.plain"
+
+
+
+
+async def extract_resume_text(pdf, ocr_mode: str, sha256: str = None) -> str:
+
+    field = text_field(ocr_mode)
+
+    if sha256:
+        text = await asyncio.to_thread(get_artifact, sha256, field)
+
+        if text is not None:
+            return text
+
+    if field == "text.ocr":
+        text = await asyncio.to_thread(extract_text_with_ocr, pdf)
+    else:
+        text = await asyncio.to_thread(extract_text_without_ocr, pdf)
+
+    if not text.strip():
+        raise HTTPException(
+            status_code=400,
+            detail="No text extracted from PDF."
+        )
+
+    if sha256:
+        await asyncio.to_thread(store_artifact, sha256, field, text)
+
+    return text
@@ -0,0 +1,355 @@
+import asyncio
+import json
+import sys
+import time
+from collections import defaultdict
+from fastapi import HTTPException
+from pymongo.errors import PyMongoError
+from database import contest_leaderboard
+from utils.leaderboard import LEADERBOARD_FIELDS, SNAPSHOT_CACHE, get_snapshot
+from utils.reader import LEADERBOARD_PUSH_INTERVAL, LEADERBOARD_PUSH_QUEUE, LEADERBOARD_PUSH_TOP
+from utils.reader import LEADERBOARD_PUSH_HEARTBEAT, LEADERBOARD_PUSH_MAX_SUBSCRIBERS
+
+
+RESYNC = object()
+
+
+
+
+class Subscription:
+
+    def __init__(self, key: tuple, maxsize: int):
+        self.key = key
+        self.queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+        self.last_rank = None
+        # set once the listener has been sent a whole board
+        self.synced = False
+        self.version = None
+
+
+
+
+class Publisher:
+
+    def __init__(self):
+        self.channels = defaultdict(set)
+        self.count = 0
+
+
+    def check_capacity(self):
+
+        if self.count >= LEADERBOARD_PUSH_MAX_SUBSCRIBERS:
+            raise HTTPException(status_code=503, detail="Too many live leaderboard subscribers")
+
+
+    def subscribe(self, key: tuple, maxsize: int = LEADERBOARD_PUSH_QUEUE) -> Subscription:
+
+        self.check_capacity()
+
+        subscription = Subscription(key, maxsize)
+        self.channels[key].add(subscription)
+        self.count += 1
+
+        return subscription
+
+
+    def unsubscribe(self, subscription: Subscription):
+
+        channel = self.channels.get(subscription.key)
+
+        if channel is None or subscription not in channel:
+            return
+
+        channel.discard(subscription)
+        self.count -= 1
+
+        if not channel:
+            del self.channels[subscription.key]
+
+
+    def publish(self, key: tuple, item):
+
+        for subscription in list(self.channels.get(key, ())):
+            try:
+                subscription.queue.put_nowait(item)
+
+            except asyncio.QueueFull:
+                # a slow client never holds up the others: it loses its
+                # backlog and is told to refetch the board
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+
+                subscription.queue.put_nowait(RESYNC)
+                subscription.dropped += 1
+
+
+    def active_channels(self) -> list:
+        return list(self.channels)
+
+
+
+
+PUBLISHER = Publisher()
+
+
+
+
+def sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+
+
+def board_event(previous: dict|None, snapshot: dict) -> str:
+
+    previous_rank = {}
+
+    if previous:
+        for candidate_id, position in previous["position"].items():
+            previous_rank[candidate_id] = previous["rows"][position]["rank"]
+
+    changes = []
+
+    for candidate_id, position in snapshot["position"].items():
+        row = snapshot["rows"][position]
+        before = previous_rank.get(candidate_id)
+
+        if before != row["rank"]:
+            changes.append({**row, "previous_rank": before})
+
+    changes.sort(key=lambda row: row["rank"])
+
+    # serialized once and shared by every subscriber of the board
+    return sse("leaderboard", {
+        "version": snapshot["version"],
+        "total": len(snapshot["rows"]),
+        "changed": len(changes),
+        "changes": changes[:LEADERBOARD_PUSH_TOP]
+    })
+
+
+
+
+def my_rank_event(subscription: Subscription, snapshot: dict, candidate_id) -> str|None:
+
+    position = snapshot["position"].get(candidate_id)
+
+    if position is None:
+        return None
+
+    row = snapshot["rows"][position]
+    previous_rank = subscription.last_rank
+    subscription.last_rank = row["rank"]
+
+    return sse("my_rank", {
+        **row,
+        "candidate_id": str(candidate_id),
+        "previous_rank": previous_rank,
+        "selection": candidate_id in snapshot["selected"]
+    })
+
+
+
+
+def read_versions(keys: list) -> dict:
+
+    contest_ids = list({contest_id for contest_id, _ in keys})
+
+    docs = {
+        doc["contest_id"]: doc.get("versions", {})
+        for doc in contest_leaderboard.find(
+            {"contest_id": {"$in": contest_ids}},
+            {"_id": 0, "contest_id": 1, "versions": 1}
+        )
+    }
+
+    return {
+        (contest_id, round_name): docs.get(contest_id, {}).get(LEADERBOARD_FIELDS[round_name][0])
+        for contest_id, round_name in keys
+    }
+
+
+
+
+async def watch_leaderboards(stop: asyncio.Event):
+
+    versions = {}
+    snapshots = {}
+
+    while not stop.is_set():
+
+        keys = PUBLISHER.active_channels()
+
+        # forget boards nobody is listening to any more
+        for key in list(versions):
+            if key not in PUBLISHER.channels:
+                versions.pop(key, None)
+                snapshots.pop(key, None)
+
+        current = {}
+
+        if keys:
+            try:
+                current = await asyncio.to_thread(read_versions, keys)
+            except PyMongoError:
+                current = {}
+
+        for key, version in current.items():
+
+            if version is None or version == versions.get(key):
+                continue
+
+            # a board seen for the first time may still be served from the
+            # cache, as long as it is the current version
+            if key in versions:
+                SNAPSHOT_CACHE.pop(key)
+
+            try:
+                snapshot = await asyncio.to_thread(get_snapshot, *key)
+
+                if snapshot["version"] != version:
+                    SNAPSHOT_CACHE.pop(key)
+                    snapshot = await asyncio.to_thread(get_snapshot, *key)
+
+            except (HTTPException, PyMongoError):
+                continue
+
+            # listeners that already hold this version skip it
+            PUBLISHER.publish(key, (board_event(snapshots.get(key), snapshot), snapshot))
+
+            versions[key] = version
+            snapshots[key] = snapshot
+
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=LEADERBOARD_PUSH_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+
+
+
+async def leaderboard_events(key: tuple, candidate_id, declared):
+
+    # subscribed only once the response starts streaming, so a client gone
+    # before then never holds a slot
+    subscription = PUBLISHER.subscribe(key)
+    latest = None
+
+    try:
+        try:
+            latest = await asyncio.to_thread(get_snapshot, *subscription.key)
+        except HTTPException:
+            pass
+
+        while True:
+
+            # the whole board goes out once it exists and its result time has
+            # passed, whichever comes last; only changes are sent after that
+            if latest and not subscription.synced and declared():
+                subscription.synced = True
+                subscription.version = latest["version"]
+                yield board_event(None, latest)
+                yield my_rank_event(subscription, latest, candidate_id) or ""
+
+            # a board held back until the result time is checked again every
+            # push interval
+            held = latest is not None and not subscription.synced
+            timeout = LEADERBOARD_PUSH_INTERVAL if held else LEADERBOARD_PUSH_HEARTBEAT
+
+            try:
+                item = await asyncio.wait_for(subscription.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+
+            if item is RESYNC:
+                yield sse("resync", {"dropped": subscription.dropped})
+                continue
+
+            message, snapshot = item
+
+            if snapshot["version"] == subscription.version:
+                continue
+
+            latest = snapshot
+
+            if not subscription.synced:
+                continue
+
+            subscription.version = snapshot["version"]
+
+            yield message
+            yield my_rank_event(subscription, snapshot, candidate_id) or ""
+
+    finally:
+        PUBLISHER.unsubscribe(subscription)
+
+
+
+
+async def load_test(subscribers: int, events: int, slow_share: float):
+
+    publisher = Publisher()
+    key = ("contest", "final")
+
+    rows = [
+        {"candidate_id": None, "name": f"candidate {i}", "rank": i + 1, "percentile": 100.0,
+         "score": 1.0, "latest_submission": None}
+        for i in range(1000)
+    ]
+    snapshot = {"version": "v", "rows": rows, "position": {i: i for i in range(1000)}, "selected": set()}
+
+    received = [0] * subscribers
+    slow_count = int(subscribers * slow_share)
+
+
+    async def consume(i, subscription):
+        delay = 0.05 if i < slow_count else 0
+        while True:
+            item = await subscription.queue.get()
+            if item is None:
+                return
+            received[i] += 1
+            if delay:
+                await asyncio.sleep(delay)
+
+
+    subscriptions = [publisher.subscribe(key) for _ in range(subscribers)]
+    tasks = [asyncio.create_task(consume(i, s)) for i, s in enumerate(subscriptions)]
+
+    publish_times = []
+
+    for _ in range(events):
+        message = board_event(None, snapshot)
+        start = time.perf_counter()
+        publisher.publish(key, (message, snapshot))
+        publish_times.append(time.perf_counter() - start)
+        await asyncio.sleep(0.01)
+
+    await asyncio.sleep(0.2)
+
+    for s in subscriptions:
+        while not s.queue.empty():
+            await asyncio.sleep(0.01)
+        s.queue.put_nowait(None)
+
+    await asyncio.gather(*tasks)
+
+    fast = received[slow_count:] or [0]
+    slow = received[:slow_count] or [0]
+    resyncs = sum(s.dropped for s in subscriptions)
+
+    print(f"subscribers {subscribers}, events {events}, slow {slow_count}")
+    print(f"publish fan-out  avg {1000 * sum(publish_times) / events:.2f} ms  max {1000 * max(publish_times):.2f} ms")
+    print(f"fast clients     min {min(fast)} / {events} messages")
+    print(f"slow clients     min {min(slow)} messages, {resyncs} resyncs")
+
+
+
+
+# python -m utils.broadcast 5000 50
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    m = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    asyncio.run(load_test(n, m, 0.1))
@@ -0,0 +1,66 @@
+from collections import OrderedDict
+import threading
+import time
+
+
+class TTLCache:
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+
+    def get(self, key, default=None):
+
+        with self.lock:
+            item = self.data.get(key)
+
+            if item is None:
+                return default
+
+            expires_at, value = item
+
+            if expires_at < time.monotonic():
+                del self.data[key]
+                return default
+
+            self.data.move_to_end(key)
+            return value
+
+
+    def set(self, key, value, ttl: float = None):
+
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+
+        with self.lock:
+            self.data[key] = (expires_at, value)
+            self.data.move_to_end(key)
+
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+
+    def pop(self, key):
+
+        with self.lock:
+            item = self.data.pop(key, None)
+
+        return item[1] if item else None
+
+
+    def keys(self) -> list:
+
+        with self.lock:
+            return list(self.data)
+
+
+    def clear(self):
+
+        with self.lock:
+            self.data.clear()
+
+
+    def __len__(self):
+        return len(self.data)
@@ -1,163 +1,200 @@
+import json
+from collections import Counter
 from bson import ObjectId
-from database import coding_question_collection, leetcode, coding_collection
-from fastapi import HTTPException
-from datetime import datetime, timezone, timedelta
-from typing import Callable, Awaitable, Union
-import asyncio
-from fastapi.security import HTTPAuthorizationCredentials
-import inspect
-from utils.time import generate_timestamp
+from pymongo import ReturnDocument
+from database import coding_question_collection, coding_collection
+from utils.history import build_history
 
 
-def get_used_coding_question_ids(coding_id: ObjectId):
+def used_key(question_id) -> str:
 
-    used_questions = set()
+    # ids become field names, so they are stored JSON-encoded (which keeps
+    # int ids apart from strings) with "%", "." and "$" escaped
+    return json.dumps(question_id).replace("%", "%25").replace(".", "%2E").replace("$", "%24")
 
-    sessions = coding_question_collection.find(
-        {"coding_id": coding_id},
-        {"question_bank.question_id": 1}
-    )
 
-    for session in sessions:
-        for q in session.get("question_bank", []):
-            qid = q.get("question_id")
-            if qid:
-                used_questions.add(qid)
+def decode_used_counts(used_counts: dict) -> dict:
+    return {
+        json.loads(key.replace("%2E", ".").replace("%24", "$").replace("%25", "%")): count
+        for key, count in used_counts.items()
+    }
 
-    return list(used_questions)
 
+def count_used_coding_questions(sessions) -> dict:
 
-def previous_coding_session_questions(
-    coding_id: ObjectId,
-    x: int = None,
-    session_number: int = None
-):
-    session_dict = {}
-    sessions_used = {}
+    used_counts = Counter()
 
-    search_query = {
-        "coding_id": coding_id,
-        "status": "passive"
-        }
+    for session in sessions:
+        used_counts.update({
+            used_key(q["question_id"]) for q in session.get("question_bank", []) if q.get("question_id")
+        })
+
+    return dict(used_counts)
 
-    if session_number is not None:
-        search_query["session_number"] = session_number
 
-    sessions = list(
+def get_coding_used_counts(coding: dict) -> dict:
+
+    if "used_counts" in coding:
+        return decode_used_counts(coding["used_counts"])
+
+    # coding sets from before the counts were kept on the doc are counted
+    # from their sessions once
+    used_counts = count_used_coding_questions(
         coding_question_collection.find(
-            search_query,
-            {
-                "_id": 1,
-                "session_number": 1,
-                "question_bank": 1,
-                "timestamp": 1
-            }
-        ).sort("timestamp", -1)
+            {"coding_id": coding["_id"]},
+            {"question_bank.question_id": 1}
+        )
+    )
+
+    updated = coding_collection.find_one_and_update(
+        {"_id": coding["_id"], "used_counts": {"$exists": False}},
+        {"$set": {"used_counts": used_counts}, "$unset": {"used_questions": ""}},
+        projection={"used_counts": 1},
+        return_document=ReturnDocument.AFTER
     )
 
+    if updated is None:
+        updated = coding_collection.find_one({"_id": coding["_id"]}, {"used_counts": 1})
 
-    if session_number is None:
-        latest_sessions = {}
-        for s in sessions:
-            sn = s["session_number"]
-            if sn not in latest_sessions:
-                latest_sessions[sn] = s
-        sessions = list(latest_sessions.values())
-
-    if x:
-        sessions = sessions[:x]
-        if len(sessions) <= 1:
-            raise HTTPException(
-                status_code=400,
-                detail="Need at least 2 sessions for combined feedback."
-            )
-
-
-    question_ids = set()
-    if session_number:
-        sessions_diff = [sessions[0]]
-    else:
-        sessions_diff = sessions
-
-    for s in sessions_diff:
-        for q in s.get("question_bank", []):
-            if q.get("answer") and q.get("question_id"):
-                question_ids.add(q["question_id"])
-
-    problems = list(
-        leetcode.find(
-            {"question_id": {"$in": list(question_ids)}},
-            {"question_id": 1, "problem_description": 1}
-        )
+    return decode_used_counts(updated["used_counts"])
+
+
+def add_used_questions(coding_id: ObjectId, question_ids: list):
+
+    # counts are per session, so a question asked again in a reattempt is
+    # only released once every session holding it is deleted. Callers run
+    # get_coding_used_counts before writing the session, so an older set's
+    # one-time count never already includes it
+    question_ids = set(question_ids)
+
+    if not question_ids:
+        return
+
+    coding_collection.update_one(
+        {"_id": coding_id},
+        {"$inc": {f"used_counts.{used_key(qid)}": 1 for qid in question_ids}}
     )
 
-    problem_map = {
-        p["question_id"]: p["problem_description"]
-        for p in problems
-    }
 
+def release_used_questions(coding_id: ObjectId, question_ids: list):
 
+    question_ids = set(question_ids)
 
-    for idx, s in enumerate(sessions):
-        sid = str(s["_id"])
-        ts = s["timestamp"]
-        sn = s["session_number"]
+    if not question_ids:
+        return
 
-        formatted_questions = {}
+    coding_collection.update_one(
+        {"_id": coding_id},
+        {"$inc": {f"used_counts.{used_key(qid)}": -1 for qid in question_ids}}
+    )
 
-        for q in s.get("question_bank", []):
+    # entries that reached zero are dropped so the map stays the size of
+    # the questions still in use
+    for key in map(used_key, question_ids):
+        coding_collection.update_one(
+            {"_id": coding_id, f"used_counts.{key}": {"$lte": 0}},
+            {"$unset": {f"used_counts.{key}": ""}}
+        )
 
-            qid = q.get("question_id")
-            answer = q.get("answer")
-            language = q.get("language")
 
-            if not answer or qid not in problem_map:
-                continue
+async def previous_coding_session_questions(
+    coding_id: ObjectId,
+    x: int = None,
+    session_number: int = None,
+    digests: bool = False,
+):
+    return await build_history("coding", coding_id, x, session_number, digests)
 
-            problem_description = problem_map[qid]
 
-            formatted_questions[f"{problem_description}"] = (
-                f"""Language: {language}\n Answer:\n{answer}"""
-            )
 
-        session_dict[f"session_{idx+1}"] = formatted_questions
 
-        sessions_used[str(ts)] = {
-            "session_number": sn,
-            "session_id": sid
-        }
 
-    return session_dict, sessions_used
 
 
+def benchmark(db, rounds: int):
 
+    import random
+    import time
+    from utils.question_index import load_question_index, draw_questions
 
-async def auto_submit(
-    coding_id: str,
-    question_session_id: str,
-    token: str,
-    start_time : datetime,
-    duration: int,
-    fun: Union[
-    Callable[[str, str, datetime, HTTPAuthorizationCredentials], None],
-    Callable[[str, str, datetime, HTTPAuthorizationCredentials], Awaitable[None]]
+    questions = [
+        {
+            "question_id": str(i),
+            "companies": random.sample(["google", "amazon", "meta", "microsoft"], 2),
+            "tags": random.sample(["array", "graph", "dp", "string"], 2),
+            "difficulty": random.choice(["Easy", "Medium", "Hard"]),
+            "task_name": f"Task {i}",
+            "problem_description": "x" * 500
+        }
+        for i in range(1, 3001)
     ]
-):
-    credentials = HTTPAuthorizationCredentials(
-        scheme="Bearer",
-        credentials=token
-    )
+    db.leetcode.insert_many([dict(q) for q in questions])
+    load_question_index(questions)
 
-    end_time = start_time + timedelta(minutes=duration) + timedelta(minutes=1)
-    now = generate_timestamp()
-    wait_seconds = (end_time - now).total_seconds()
+    company = ["google"]
+    pool = [q["question_id"] for q in questions if "google" in q["companies"]]
 
-    if wait_seconds > 0:
-        await asyncio.sleep(wait_seconds)
+    def avg_ms(call):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            call()
+        return (time.perf_counter() - start) / rounds * 1000
 
-    if inspect.iscoroutinefunction(fun):
-        await fun(coding_id, question_session_id, generate_timestamp(), credentials)
-    else:
-        fun(coding_id, question_session_id, generate_timestamp(), credentials)
+    print(f"{'sessions':>8}  {'rescan + $nin':>14}  {'used counts':>12}")
 
+    # each session holds 5 questions, with some reattempts repeating them
+    for session_count in [10, 50, 100, 200, 400]:
 
+        coding_id = ObjectId()
+        sessions = [
+            {
+                "coding_id": coding_id,
+                "question_bank": [
+                    {"question_id": qid, "language": "", "answer": "", "feedback": "", "score": ""}
+                    for qid in random.sample(pool, 5)
+                ]
+            }
+            for _ in range(session_count)
+        ]
+        db.coding_question_session.insert_many(sessions)
+        db.coding.insert_one({"_id": coding_id, "used_counts": count_used_coding_questions(sessions)})
+
+        # before: every session is read back and the used list goes out as $nin
+        def rescan():
+            used = set()
+            for session in db.coding_question_session.find({"coding_id": coding_id}, {"question_bank.question_id": 1}):
+                for q in session.get("question_bank", []):
+                    used.add(q["question_id"])
+            list(db.leetcode.aggregate([
+                {"$match": {"companies": {"$in": company}, "question_id": {"$nin": list(used)}}},
+                {"$sample": {"size": 5}}
+            ]))
+
+        def counted():
+            coding = db.coding.find_one({"_id": coding_id})
+            used = [qid for qid, count in decode_used_counts(coding["used_counts"]).items() if count > 0]
+            question_ids = draw_questions(5, company, exclude=used)
+            list(db.leetcode.find(
+                {"question_id": {"$in": question_ids}},
+                {"_id": 0, "question_id": 1, "task_name": 1, "problem_description": 1}
+            ))
+
+        print(f"{session_count:>8}  {avg_ms(rescan):>12.3f}ms  {avg_ms(counted):>10.3f}ms")
+
+
+# Benchmark of the /leetcode/questions/new draw; uses (and drops) a scratch
+# database on the configured server:
+#   python -m utils.coding 50
+if __name__ == "__main__":
+
+    import sys
+    from pymongo import MongoClient
+    from utils.reader import uri
+
+    client = MongoClient(uri)
+    name = f"benchmark_coding_{ObjectId()}"
+
+    try:
+        benchmark(client[name], int(sys.argv[1]) if len(sys.argv) > 1 else 50)
+    finally:
+        client.drop_database(name)
@@ -0,0 +1,102 @@
+from pymongo.errors import BulkWriteError
+from database import resume_collection, github_collection, concept_collection, coding_collection
+from database import combined_feedback_collection
+from utils.time import generate_timestamp
+
+
+PARENT_COLLECTIONS = {
+    "resume": resume_collection,
+    "github": github_collection,
+    "concept": concept_collection,
+    "coding": coding_collection
+}
+
+
+
+
+def first_session_number(sessions_used: dict):
+    first_session = next(iter(sessions_used.values()), None)
+    return first_session.get("session_number") if first_session else None
+
+
+
+
+def save_combined_feedback(kind: str, parent_id, feedback_type: str, sessions_used: dict, feedback):
+    combined_feedback_collection.insert_one({
+        "kind": kind,
+        "parent_id": parent_id,
+        "type": feedback_type,
+        "session_number": first_session_number(sessions_used),
+        "sessions_used": sessions_used,
+        "feedback": feedback,
+        "timestamp": generate_timestamp()
+    })
+
+
+
+
+def migrate_combined_feedback(kind: str, parent_id):
+
+    collection = PARENT_COLLECTIONS[kind]
+
+    legacy = collection.find_one(
+        {"_id": parent_id, "combined_feedback": {"$exists": True}},
+        {"combined_feedback": 1}
+    )
+
+    if not legacy:
+        return
+
+    # ids derived from the array position make a repeated or concurrent
+    # migration insert each entry once
+    docs = [
+        {
+            "_id": f"{parent_id}:{i}",
+            "kind": kind,
+            "parent_id": parent_id,
+            "type": item.get("type"),
+            "session_number": first_session_number(item.get("sessions_used", {})),
+            "sessions_used": item.get("sessions_used", {}),
+            "feedback": item.get("feedback", ""),
+            "timestamp": item.get("timestamp", None)
+        }
+        for i, item in enumerate(legacy["combined_feedback"])
+    ]
+
+    if docs:
+        try:
+            combined_feedback_collection.insert_many(docs, ordered=False)
+        except BulkWriteError:
+            pass
+
+    collection.update_one({"_id": parent_id}, {"$unset": {"combined_feedback": ""}})
+
+
+
+
+def list_combined_feedback(kind: str, parent_id, feedback_type: str, session_number: int = None) -> list:
+
+    migrate_combined_feedback(kind, parent_id)
+
+    query = {"parent_id": parent_id, "type": feedback_type}
+
+    if session_number is not None:
+        query["session_number"] = session_number
+
+    items = combined_feedback_collection.find(query).sort("timestamp", 1)
+
+    return [
+        {
+            "sessions_used": item.get("sessions_used", {}),
+            "feedback": item.get("feedback", ""),
+            "type": item.get("type"),
+            "timestamp": item.get("timestamp", None)
+        }
+        for item in items
+    ]
+
+
+
+
+def delete_combined_feedback(parent_id):
+    combined_feedback_collection.delete_many({"parent_id": parent_id})
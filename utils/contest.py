@@ -1,68 +1,33 @@
 import asyncio
 from bson import ObjectId
-from datetime import timedelta, datetime
-from utils.time import generate_timestamp
-import inspect
-from typing import Callable, Awaitable, Union
 from database import contest_candidate_collection, leetcode, contest_collection
 from prompt.contest import evaluate_coding_score, evaluate_concept_score, evaluate_hr_score
 from fastapi import HTTPException
-from fastapi.security import HTTPAuthorizationCredentials
-
-
-async def auto_submit(
-    contest_id: str,
-    token: str,
-    end_time: datetime,
-    fun: Union[
-    Callable[[str, datetime, HTTPAuthorizationCredentials], None],
-    Callable[[str, datetime, HTTPAuthorizationCredentials], Awaitable[None]]
-    ]    
-):  
-    credentials = HTTPAuthorizationCredentials(
-        scheme="Bearer",
-        credentials=token
-    )
-
-
-    now = generate_timestamp()
-    wait_seconds = (end_time - now).total_seconds()
+from utils.round_stats import record_round_scores, penalty_seconds
 
-    if wait_seconds > 0:
-        await asyncio.sleep(wait_seconds)
 
-    if inspect.iscoroutinefunction(fun):
-        await fun(contest_id, end_time, credentials)
-    else:
-        fun(contest_id, end_time, credentials)
+def get_coding_question_map(question_ids: list) -> dict:
 
+    questions = leetcode.find(
+        {"question_id": {"$in": question_ids}},
+        {"question_id": 1, "problem_description": 1, "_id": 0}
+    )
 
+    return {
+        q["question_id"]: q["problem_description"]
+        for q in questions
+    }
 
 
 
-def generate_coding_scores(contest_obj_id: ObjectId, candidate_id: ObjectId, contest_candidate):
 
 
+async def score_coding(contest_candidate: dict, question_map: dict) -> dict:
 
     coding = contest_candidate.get("coding")
     question_bank = coding.get("question_bank", [])
 
 
-    question_ids = [q["question_id"] for q in question_bank]
-
-    questions = list(
-        leetcode.find(
-            {"question_id": {"$in": question_ids}},
-            {"question_id": 1, "problem_description": 1, "_id": 0}
-        )
-    )
-
-    question_map = {
-        q["question_id"]: q["problem_description"]
-        for q in questions
-    }
-
-
     evaluation_input = []
 
     for q in question_bank:
@@ -76,7 +41,7 @@ def generate_coding_scores(contest_obj_id: ObjectId, candidate_id: ObjectId, con
             "language": q.get("language") or ""
         })
 
-    response = evaluate_coding_score(evaluation_input)
+    response = await evaluate_coding_score(evaluation_input)
 
     results = response["results"]
     overall_feedback = response["overall_feedback"]
@@ -106,37 +71,20 @@ def generate_coding_scores(contest_obj_id: ObjectId, candidate_id: ObjectId, con
             "score": score_map.get(qid, 0)
         })
 
-    contest_candidate_collection.update_one(
-        {
-            "contest_id": contest_obj_id,
-            "candidate_id": candidate_id
-        },
-        {
-            "$set": {
-                "coding.question_bank": new_question_bank,
-                "coding.overall_feedback": overall_feedback
-            }
-        }
-    )
-
-
-
-
-
-
+    return {
+        "coding.question_bank": new_question_bank,
+        "coding.overall_feedback": overall_feedback
+    }
 
 
 
 
-def generate_concept_scores(contest_obj_id: ObjectId, candidate_id: ObjectId, contest_candidate):
 
+async def score_concept(contest_candidate: dict, concept_question_bank: list) -> dict:
 
     concept = contest_candidate.get("concept")
     question_bank = concept.get("question_bank", [])
 
-    contest = contest_collection.find_one({"_id": contest_obj_id})
-    concept_question_bank = contest["concept_round"]["questions"]
-
 
     evaluation_input = []
 
@@ -150,7 +98,7 @@ def generate_concept_scores(contest_obj_id: ObjectId, candidate_id: ObjectId, co
             "answer": q.get("answer") or "",
         })
 
-    response = evaluate_concept_score(evaluation_input)
+    response = await evaluate_concept_score(evaluation_input)
 
     results = response["results"]
     overall_feedback = response["overall_feedback"]
@@ -178,30 +126,20 @@ def generate_concept_scores(contest_obj_id: ObjectId, candidate_id: ObjectId, co
             "score": score_map.get(qid, 0)
         })
 
-    contest_candidate_collection.update_one(
-        {
-            "contest_id": contest_obj_id,
-            "candidate_id": candidate_id
-        },
-        {
-            "$set": {
-                "concept.question_bank": new_question_bank,
-                "concept.overall_feedback": overall_feedback
-            }
-        }
-    )
+    return {
+        "concept.question_bank": new_question_bank,
+        "concept.overall_feedback": overall_feedback
+    }
 
 
 
 
 
-def generate_hr_scores(contest_obj_id: ObjectId, candidate_id: ObjectId, contest_candidate):
+async def score_hr(contest_candidate: dict, hr_question_bank: list) -> dict:
+
     hr = contest_candidate.get("hr")
     question_bank = hr.get("question_bank", [])
 
-    contest = contest_collection.find_one({"_id": contest_obj_id})
-    hr_question_bank = contest["hr_round"]["questions"]
-
 
     evaluation_input = []
 
@@ -218,7 +156,7 @@ def generate_hr_scores(contest_obj_id: ObjectId, candidate_id: ObjectId, contest
 
     summary = contest_candidate["resume"]["summary"]
 
-    response = evaluate_hr_score(evaluation_input, summary)
+    response = await evaluate_hr_score(evaluation_input, summary)
 
     results = response["results"]
     overall_feedback = response["overall_feedback"]
@@ -248,15 +186,99 @@ def generate_hr_scores(contest_obj_id: ObjectId, candidate_id: ObjectId, contest
             "score": score_map.get(qid, 0)
         })
 
+    return {
+        "hr.question_bank": new_question_bank,
+        "hr.overall_feedback": overall_feedback
+    }
+
+
+
+
+
+def save_round_score(contest_obj_id: ObjectId, candidate_id: ObjectId, round_name: str, contest_candidate: dict, update: dict, duration: int):
+
     contest_candidate_collection.update_one(
         {
             "contest_id": contest_obj_id,
             "candidate_id": candidate_id
         },
-        {
-            "$set": {
-                "hr.question_bank": new_question_bank,
-                "hr.overall_feedback": overall_feedback
-            }
-        }
+        {"$set": update}
+    )
+
+    record_round_scores(
+        contest_obj_id,
+        round_name,
+        candidate_id,
+        {**contest_candidate[round_name], "question_bank": update[f"{round_name}.question_bank"]},
+        duration
+    )
+
+
+
+
+
+async def generate_coding_scores(contest_obj_id: ObjectId, candidate_id: ObjectId, contest_candidate):
+
+    question_bank = contest_candidate.get("coding").get("question_bank", [])
+    question_map = await asyncio.to_thread(get_coding_question_map, [q["question_id"] for q in question_bank])
+    contest = await asyncio.to_thread(contest_collection.find_one, {"_id": contest_obj_id}, {"coding_round.duration": 1})
+
+    update = await score_coding(contest_candidate, question_map)
+
+    await asyncio.to_thread(
+        save_round_score,
+        contest_obj_id,
+        candidate_id,
+        "coding",
+        contest_candidate,
+        update,
+        penalty_seconds(contest, "coding")
+    )
+
+
+
+
+
+async def generate_concept_scores(contest_obj_id: ObjectId, candidate_id: ObjectId, contest_candidate):
+
+    contest = await asyncio.to_thread(
+        contest_collection.find_one,
+        {"_id": contest_obj_id},
+        {"concept_round.questions": 1, "concept_round.duration": 1}
+    )
+
+    update = await score_concept(contest_candidate, contest["concept_round"]["questions"])
+
+    await asyncio.to_thread(
+        save_round_score,
+        contest_obj_id,
+        candidate_id,
+        "concept",
+        contest_candidate,
+        update,
+        penalty_seconds(contest, "concept")
+    )
+
+
+
+
+
+async def generate_hr_scores(contest_obj_id: ObjectId, candidate_id: ObjectId, contest_candidate):
+
+    contest = await asyncio.to_thread(
+        contest_collection.find_one,
+        {"_id": contest_obj_id},
+        {"hr_round.questions": 1, "hr_round.duration": 1}
+    )
+
+    update = await score_hr(contest_candidate, contest["hr_round"]["questions"])
+
+    await asyncio.to_thread(
+        save_round_score,
+        contest_obj_id,
+        candidate_id,
+        "hr",
+        contest_candidate,
+        update,
+        penalty_seconds(contest, "hr")
     )
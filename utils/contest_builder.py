@@ -0,0 +1,172 @@
+import asyncio
+import sys
+import time
+from fastapi import HTTPException
+from prompt.admin import validate_role_skills, generate_resume_questions, generate_concept_questions
+from prompt.admin import generate_hr_questions, generate_coding_ids
+from utils.reader import CONTEST_BUILD_TIMEOUT, CONTEST_STEP_RETRIES
+
+
+
+
+def is_client_error(error: BaseException) -> bool:
+    return isinstance(error, HTTPException) and 400 <= error.status_code < 500
+
+
+
+
+async def timed(step, retry: bool):
+    start = time.perf_counter()
+    result = await step(retry)
+    return result, time.perf_counter() - start
+
+
+
+
+async def run_steps(steps: dict, timeout: float = CONTEST_BUILD_TIMEOUT, retries: int = CONTEST_STEP_RETRIES):
+
+    # steps maps a name to a callable taking a retry flag and returning an
+    # awaitable, so a failed step can be started again. Retries skip the LLM
+    # cache, which may hold the very response that failed validation
+    deadline = time.perf_counter() + timeout
+    attempts = {name: 0 for name in steps}
+    tasks = {asyncio.create_task(timed(step, False)): name for name, step in steps.items()}
+    results = {}
+    timings = {}
+
+    try:
+        while tasks:
+
+            remaining = deadline - time.perf_counter()
+
+            if remaining <= 0:
+                raise HTTPException(
+                    status_code=504,
+                    detail=f"Contest generation timed out: {', '.join(sorted(tasks.values()))}"
+                )
+
+            done, _ = await asyncio.wait(tasks, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                name = tasks.pop(task)
+                error = task.exception()
+
+                if error is None:
+                    results[name], timings[name] = task.result()
+                    continue
+
+                # a rejected request (e.g. role/skills mismatch) stops everything;
+                # anything else gets another try while time is left
+                if is_client_error(error):
+                    raise error
+
+                if attempts[name] >= retries:
+                    if isinstance(error, HTTPException):
+                        raise error
+                    raise HTTPException(status_code=500, detail=f"Contest generation failed: {name}") from error
+
+                attempts[name] += 1
+                tasks[asyncio.create_task(timed(steps[name], True))] = name
+
+    finally:
+        for task in tasks:
+            task.cancel()
+
+        # collect every outcome, so a failure next to the one raised and
+        # the cancelled steps are not left unretrieved
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    return results, timings
+
+
+
+
+def contest_question_steps(data) -> dict:
+
+    skills = [s.value for s in data.skills]
+
+    return {
+        "validate": lambda retry: validate_role_skills(data.role.value, skills, cache=False if retry else None),
+        "resume": lambda retry: generate_resume_questions(data.company.value, data.role.value, skills, data.resume_questions_count, cache=not retry),
+        "coding": lambda retry: asyncio.to_thread(generate_coding_ids, data.company.value, data.coding_questions_count),
+        "concept": lambda retry: generate_concept_questions(data.role.value, skills, data.concept_questions_count, cache=not retry),
+        "hr": lambda retry: generate_hr_questions(data.role.value, data.hr_questions_count - 1, cache=not retry)
+    }
+
+
+
+
+async def build_contest_questions(data) -> dict:
+
+    results, _ = await run_steps(contest_question_steps(data))
+
+    hr_questions = {str(i + 2): q for i, q in enumerate(results["hr"])}
+    hr_questions["1"] = "Introduce Yourself"
+
+    return {
+        "resume": {str(i + 1): q for i, q in enumerate(results["resume"])},
+        "coding": results["coding"],
+        "concept": {str(i + 1): q for i, q in enumerate(results["concept"])},
+        "hr": hr_questions
+    }
+
+
+
+
+async def benchmark(rounds: int):
+
+    from types import SimpleNamespace
+
+    data = SimpleNamespace(
+        company=SimpleNamespace(value="google"),
+        role=SimpleNamespace(value="backend"),
+        skills=[SimpleNamespace(value="python")],
+        resume_questions_count=5,
+        coding_questions_count=3,
+        concept_questions_count=5,
+        hr_questions_count=4
+    )
+
+    sequential = []
+    concurrent = []
+    slowest = []
+
+    steps = contest_question_steps(data)
+
+    # the leetcode draw is replaced by a sleep so no database is needed
+    steps["coding"] = lambda retry: asyncio.sleep(0.05)
+
+    for _ in range(rounds):
+
+        start = time.perf_counter()
+        for step in steps.values():
+            await step(False)
+        sequential.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        _, step_times = await run_steps(steps)
+        concurrent.append(time.perf_counter() - start)
+        slowest.append(max(step_times.values()))
+
+    def avg(values):
+        return sum(values) / len(values)
+
+    print(f"rounds:              {rounds}")
+    print(f"sequential:          {avg(sequential):.3f}s")
+    print(f"concurrent:          {avg(concurrent):.3f}s")
+    print(f"slowest single step: {avg(slowest):.3f}s")
+
+
+
+
+# Offline benchmark of contest creation:
+#   LLM_BACKEND=fake LLM_CACHE=N LLM_FAKE_LATENCY=0.5 python -m utils.contest_builder 20
+if __name__ == "__main__":
+
+    from utils.reader import LLM_BACKEND, LLM_CACHE
+
+    if LLM_BACKEND != "fake" or LLM_CACHE:
+        print("Set LLM_BACKEND=fake and LLM_CACHE=N to benchmark without OpenAI or cached answers")
+        sys.exit(1)
+
+    asyncio.run(benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10))
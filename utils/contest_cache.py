@@ -0,0 +1,183 @@
+import asyncio
+import copy
+import threading
+from collections import defaultdict
+from bson import ObjectId
+from pymongo.errors import OperationFailure, PyMongoError
+from database import contest_collection
+from utils.cache import TTLCache
+from utils.reader import CONTEST_CACHE_TTL, CONTEST_CACHE_SIZE, CONTEST_WATCH_POLL
+
+
+# unbounded or bookkeeping fields that answer/submit/scoring writes touch all
+# the time; they are never served from the cache and changes to them alone
+# do not evict an entry
+VOLATILE_FIELDS = (
+    "registered_candidates",
+    "fake_submit_coding",
+    "fake_submit_concept",
+    "fake_submit_hr",
+    "scoring"
+)
+
+CONTEST_PROJECTION = {field: 0 for field in VOLATILE_FIELDS}
+
+CONTEST_CACHE = TTLCache(CONTEST_CACHE_SIZE, CONTEST_CACHE_TTL)
+
+# bumped by every invalidation (the None key by every clear), so a fill that
+# read the document before an invalidation never puts the stale copy back
+GENERATIONS = defaultdict(int)
+GENERATION_LOCK = threading.Lock()
+
+# code returned by stand-alone servers, which have no change streams
+NO_CHANGE_STREAMS = 40573
+
+
+
+
+def contest_generation(contest_id: ObjectId) -> tuple:
+
+    with GENERATION_LOCK:
+        return GENERATIONS[None], GENERATIONS[contest_id]
+
+
+
+
+def cache_contest(contest_id: ObjectId, contest: dict, generation: tuple):
+
+    with GENERATION_LOCK:
+        if (GENERATIONS[None], GENERATIONS[contest_id]) == generation:
+            CONTEST_CACHE.set(contest_id, contest)
+
+
+
+
+def get_contest(contest_id: ObjectId):
+
+    contest = CONTEST_CACHE.get(contest_id)
+
+    if contest is None:
+        generation = contest_generation(contest_id)
+        contest = contest_collection.find_one({"_id": contest_id}, CONTEST_PROJECTION)
+
+        if not contest:
+            return None
+
+        cache_contest(contest_id, contest, generation)
+
+    # routes reshape the document they get back
+    return copy.deepcopy(contest)
+
+
+
+
+def invalidate_contest(contest_id: ObjectId):
+
+    with GENERATION_LOCK:
+        GENERATIONS[contest_id] += 1
+        CONTEST_CACHE.pop(contest_id)
+
+
+
+
+def clear_contests():
+
+    with GENERATION_LOCK:
+        GENERATIONS[None] += 1
+        CONTEST_CACHE.clear()
+
+
+
+
+def is_volatile_change(change: dict) -> bool:
+
+    if change["operationType"] != "update":
+        return False
+
+    description = change.get("updateDescription", {})
+
+    fields = list(description.get("updatedFields", {}))
+    fields += description.get("removedFields", [])
+    fields += [t["field"] for t in description.get("truncatedArrays", [])]
+
+    return bool(fields) and all(field.split(".")[0] in VOLATILE_FIELDS for field in fields)
+
+
+
+
+def follow_change_stream(stop: asyncio.Event):
+
+    with contest_collection.watch(max_await_time_ms=1000) as stream:
+
+        # anything cached before the stream opened may already be stale
+        clear_contests()
+
+        while stream.alive and not stop.is_set():
+
+            change = stream.try_next()
+
+            if change is None:
+                continue
+
+            if change["operationType"] in ("drop", "rename", "dropDatabase", "invalidate"):
+                clear_contests()
+                continue
+
+            if is_volatile_change(change):
+                continue
+
+            contest_id = change.get("documentKey", {}).get("_id")
+
+            if contest_id is not None:
+                invalidate_contest(contest_id)
+
+
+
+
+def refresh_cached_contests():
+
+    contest_ids = CONTEST_CACHE.keys()
+
+    if not contest_ids:
+        return
+
+    generations = {contest_id: contest_generation(contest_id) for contest_id in contest_ids}
+
+    fresh = {
+        contest["_id"]: contest
+        for contest in contest_collection.find({"_id": {"$in": contest_ids}}, CONTEST_PROJECTION)
+    }
+
+    for contest_id in contest_ids:
+        if contest_id in fresh:
+            cache_contest(contest_id, fresh[contest_id], generations[contest_id])
+        else:
+            invalidate_contest(contest_id)
+
+
+
+
+async def watch_contests(stop: asyncio.Event):
+
+    change_streams = True
+
+    while not stop.is_set():
+
+        try:
+            if change_streams:
+                await asyncio.to_thread(follow_change_stream, stop)
+            else:
+                await asyncio.to_thread(refresh_cached_contests)
+
+        except OperationFailure as e:
+            if e.code == NO_CHANGE_STREAMS:
+                change_streams = False
+            clear_contests()
+
+        except PyMongoError:
+            clear_contests()
+
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=CONTEST_WATCH_POLL)
+        except asyncio.TimeoutError:
+            pass
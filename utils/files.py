@@ -0,0 +1,202 @@
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from gridfs import GridFS
+from gridfs.errors import NoFile
+from urllib.parse import quote
+from utils.reader import FILE_STREAM_BUFFER, FILE_CACHE_MAX_AGE
+
+
+
+
+def file_etag(grid_out) -> str:
+    # GridFS files are never rewritten in place, so the id identifies the bytes
+    return f'"{grid_out._id}"'
+
+
+
+
+def last_modified(grid_out) -> str:
+    return format_datetime(grid_out.upload_date.replace(tzinfo=timezone.utc), usegmt=True)
+
+
+
+
+def etag_matches(header: str, etag: str) -> bool:
+
+    candidates = [tag.strip() for tag in header.split(",")]
+
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+
+
+def not_modified(request: Request, grid_out) -> bool:
+
+    if_none_match = request.headers.get("if-none-match")
+
+    if if_none_match is not None:
+        return etag_matches(if_none_match, file_etag(grid_out))
+
+    if_modified_since = request.headers.get("if-modified-since")
+
+    if if_modified_since is None:
+        return False
+
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+    uploaded = grid_out.upload_date.replace(tzinfo=timezone.utc, microsecond=0)
+
+    return since is not None and since.tzinfo is not None and uploaded <= since
+
+
+
+
+def parse_range(header: str, length: int):
+
+    # returns (start, end) inclusive, None to send the whole file, or raises
+    # 416; a multi-range request is answered with the whole file
+    if not header.startswith("bytes=") or "," in header:
+        return None
+
+    start, _, end = header[6:].strip().partition("-")
+
+    try:
+        if start == "":
+            suffix = int(end)
+            if suffix <= 0:
+                raise ValueError
+            return max(length - suffix, 0), length - 1
+
+        start = int(start)
+        end = int(end) if end else length - 1
+
+    except ValueError:
+        return None
+
+    if start >= length:
+        raise HTTPException(
+            status_code=416,
+            detail="Range not satisfiable",
+            headers={"Content-Range": f"bytes */{length}"}
+        )
+
+    if start > end:
+        return None
+
+    return start, min(end, length - 1)
+
+
+
+
+def range_allowed(request: Request, grid_out) -> bool:
+
+    if_range = request.headers.get("if-range")
+
+    if if_range is None:
+        return True
+
+    return if_range.strip() in (file_etag(grid_out), last_modified(grid_out))
+
+
+
+
+def iter_grid_file(grid_out, start: int, end: int):
+
+    grid_out.seek(start)
+    remaining = end - start + 1
+
+    # every read ends on a GridFS chunk boundary, so no chunk is fetched twice
+    block = max(FILE_STREAM_BUFFER // grid_out.chunk_size, 1) * grid_out.chunk_size
+    size = block - start % grid_out.chunk_size
+
+    try:
+        while remaining > 0:
+            data = grid_out.read(min(size, remaining))
+
+            if not data:
+                break
+
+            remaining -= len(data)
+            size = block
+
+            yield data
+
+    finally:
+        grid_out.close()
+
+
+
+
+def content_disposition(filename: str) -> str:
+
+    # plain ASCII fallback with quotes escaped, plus the exact name for
+    # clients that read filename*
+    fallback = filename.encode("ascii", "replace").decode().replace("\\", "\\\\").replace('"', '\\"')
+    fallback = "".join(c if c.isprintable() else "_" for c in fallback)
+
+    return f"inline; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+
+
+
+def serve_grid_file(
+    fs: GridFS,
+    file_id,
+    request: Request,
+    default_type: str,
+    detail: str = "File not found",
+    filename: str = None
+):
+
+    try:
+        grid_out = fs.get(file_id)
+    except NoFile:
+        raise HTTPException(status_code=404, detail=detail)
+
+    headers = {
+        "ETag": file_etag(grid_out),
+        "Last-Modified": last_modified(grid_out),
+        "Cache-Control": f"private, max-age={FILE_CACHE_MAX_AGE}",
+        "Accept-Ranges": "bytes"
+    }
+
+    if not_modified(request, grid_out):
+        grid_out.close()
+        return Response(status_code=304, headers=headers)
+
+    # a deduplicated blob carries its first uploader's name, so callers pass
+    # the name stored on their own document
+    headers["Content-Disposition"] = content_disposition(filename or grid_out.filename or "file")
+
+    length = grid_out.length
+    status_code = 200
+    start, end = 0, length - 1
+
+    range_header = request.headers.get("range")
+
+    if range_header and length and range_allowed(request, grid_out):
+
+        try:
+            byte_range = parse_range(range_header, length)
+        except HTTPException:
+            grid_out.close()
+            raise
+
+        if byte_range is not None:
+            start, end = byte_range
+            status_code = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{length}"
+
+    headers["Content-Length"] = str(end - start + 1)
+
+    return StreamingResponse(
+        iter_grid_file(grid_out, start, end),
+        status_code=status_code,
+        media_type=grid_out.content_type or default_type,
+        headers=headers
+    )
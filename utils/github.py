@@ -1,33 +1,194 @@
-import requests
+import asyncio
 import base64
+import hashlib
+import json
+import time
+import httpx
+from pathlib import Path
+from urllib.parse import urlencode, urlparse, parse_qs
 from fastapi import HTTPException
-from utils.reader import GITHUB_API_KEY
-from database import github_question_collection
-from bson import ObjectId
-from datetime import datetime, timezone, timedelta
-from typing import Callable, Awaitable, Union
-import asyncio
-from fastapi.security import HTTPAuthorizationCredentials
-import inspect
+from database import github_http_cache_collection
+from utils.reader import GITHUB_API_KEY, GITHUB_TIMEOUT, GITHUB_MAX_CONNECTIONS, GITHUB_MAX_REPO_PAGES
+from utils.reader import GITHUB_MODE, GITHUB_FIXTURES
+from utils.history import build_history
 from utils.time import generate_timestamp
+from bson import ObjectId
+
 
 def get_headers():
-    return {
-        "Authorization": f"Bearer {GITHUB_API_KEY}",
-        "Accept": "application/vnd.github+json"
-    }
 
+    headers = {"Accept": "application/vnd.github+json"}
+
+    if GITHUB_API_KEY:
+        headers["Authorization"] = f"Bearer {GITHUB_API_KEY}"
+
+    return headers
+
+
+# One pooled client for every GitHub call of this process
+GITHUB_CLIENT = httpx.AsyncClient(
+    base_url="https://api.github.com",
+    headers=get_headers(),
+    follow_redirects=True,
+    limits=httpx.Limits(
+        max_connections=GITHUB_MAX_CONNECTIONS,
+        max_keepalive_connections=GITHUB_MAX_CONNECTIONS
+    ),
+    timeout=httpx.Timeout(GITHUB_TIMEOUT, connect=5.0)
+)
+
+# last rate-limit headers GitHub sent this process
+RATE_LIMIT = {"remaining": None, "reset": 0.0}
+
+
+
+def request_key(path: str, params: dict = None) -> str:
+    return path + ("?" + urlencode(sorted(params.items())) if params else "")
+
+
+def fixture_path(key: str) -> Path:
+    return Path(GITHUB_FIXTURES) / f"{hashlib.sha1(key.encode()).hexdigest()[:20]}.json"
+
+
+def read_fixture(key: str) -> dict:
+
+    path = fixture_path(key)
+
+    if not path.exists():
+        raise HTTPException(status_code=503, detail=f"No recorded GitHub response for {key}")
+
+    return json.loads(path.read_text(encoding="utf-8"))["response"]
+
+
+def write_fixture(key: str, entry: dict):
+    path = fixture_path(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"request": key, "response": entry}, indent=2), encoding="utf-8")
+
+
+def note_rate_limit(headers):
+
+    remaining = headers.get("x-ratelimit-remaining")
+
+    if remaining is not None:
+        RATE_LIMIT["remaining"] = int(remaining)
+        RATE_LIMIT["reset"] = float(headers.get("x-ratelimit-reset", 0))
+
+
+def rate_limit_wait() -> float:
+
+    if RATE_LIMIT["remaining"] == 0:
+        return max(0.0, RATE_LIMIT["reset"] - time.time())
+
+    return 0.0
+
+
+def last_page(response: httpx.Response) -> int:
+
+    last = response.links.get("last", {}).get("url")
+
+    if not last:
+        return 1
+
+    return int(parse_qs(urlparse(last).query).get("page", ["1"])[0])
+
+
+def cached_entry(cached: dict) -> dict:
+    return {"status": cached["status"], "body": cached["body"], "last_page": cached.get("last_page", 1)}
+
+
+def rate_limited(wait: float):
+    return HTTPException(
+        status_code=429,
+        detail=f"GitHub rate limit reached, retry in {int(wait) + 1} seconds"
+    )
+
+
+async def github_get(path: str, params: dict = None) -> dict:
+
+    key = request_key(path, params)
 
+    if GITHUB_MODE == "replay":
+        return await asyncio.to_thread(read_fixture, key)
 
-def fetch_repositories(github_url: str):
+    cached = await asyncio.to_thread(github_http_cache_collection.find_one, {"_id": key})
+
+    # out of quota until the reset: a cached copy beats an error
+    wait = rate_limit_wait()
+    if wait > 0:
+        if cached:
+            return cached_entry(cached)
+        raise rate_limited(wait)
+
+    # a 304 answer to If-None-Match does not count against the rate limit
+    headers = {"If-None-Match": cached["etag"]} if cached else {}
+
+    try:
+        response = await GITHUB_CLIENT.get(path, params=params, headers=headers)
+    except httpx.HTTPError:
+        if cached:
+            return cached_entry(cached)
+        raise HTTPException(status_code=502, detail="GitHub API unreachable")
+
+    note_rate_limit(response.headers)
+
+    if response.status_code == 304 and cached:
+        entry = cached_entry(cached)
+
+        await asyncio.to_thread(
+            github_http_cache_collection.update_one,
+            {"_id": key},
+            {"$set": {"updated_at": generate_timestamp()}}
+        )
+
+    elif response.status_code in (403, 429) and rate_limit_wait() > 0:
+        if cached:
+            return cached_entry(cached)
+        raise rate_limited(rate_limit_wait())
+
+    else:
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+
+        entry = {"status": response.status_code, "body": body, "last_page": last_page(response)}
+
+        if response.status_code == 200 and response.headers.get("etag"):
+            await asyncio.to_thread(
+                github_http_cache_collection.update_one,
+                {"_id": key},
+                {"$set": {**entry, "etag": response.headers["etag"], "updated_at": generate_timestamp()}},
+                upsert=True
+            )
+
+    if GITHUB_MODE == "record":
+        await asyncio.to_thread(write_fixture, key, entry)
+
+    return entry
+
+
+
+async def fetch_repositories(github_url: str):
     username = github_url.strip().rstrip("/").split("/")[-1]
 
-    url = f"https://api.github.com/users/{username}/repos"
-    response = requests.get(url, headers=get_headers())
-    if response.status_code != 200:
+    path = f"/users/{username}/repos"
+    first = await github_get(path, {"per_page": 100, "page": 1})
+
+    if first["status"] != 200:
         raise HTTPException(status_code=400, detail="GitHub API error")
 
-    repos = response.json()
+    # the first page's Link header tells how many follow; they are fetched together
+    pages = min(first["last_page"], GITHUB_MAX_REPO_PAGES)
+    rest = await asyncio.gather(*(
+        github_get(path, {"per_page": 100, "page": page})
+        for page in range(2, pages + 1)
+    ))
+
+    if any(page["status"] != 200 for page in rest):
+        raise HTTPException(status_code=400, detail="GitHub API error")
+
+    repos = first["body"] + [repo for page in rest for repo in page["body"]]
 
     if not repos:
         raise HTTPException(status_code=404, detail="No repositories found")
@@ -44,35 +205,36 @@ def fetch_repositories(github_url: str):
     return repo_list
 
 
-def fetch_repo_details(selected_repo_link):
+async def fetch_repo_details(selected_repo_link):
 
     parts = selected_repo_link.rstrip("/").split("/")
     owner = parts[-2]
     repo_name = parts[-1]
 
-    repo_url = f"https://api.github.com/repos/{owner}/{repo_name}"
-    repo_response = requests.get(repo_url, headers=get_headers())
+    repo_response, lang_response, readme_response = await asyncio.gather(
+        github_get(f"/repos/{owner}/{repo_name}"),
+        github_get(f"/repos/{owner}/{repo_name}/languages"),
+        github_get(f"/repos/{owner}/{repo_name}/readme")
+    )
 
+    if repo_response["status"] != 200:
+        raise HTTPException(status_code=400, detail="GitHub API error")
 
-    repo_data = repo_response.json()
+    repo_data = repo_response["body"]
     repo_name = repo_data.get("name")
     repo_description = repo_data.get("description") or ""
-    languages_url = repo_data.get("languages_url")
 
 
-    lang_response = requests.get(languages_url, headers=get_headers())
     languages = {}
-    if lang_response.status_code == 200:
-        languages = lang_response.json()
+    if lang_response["status"] == 200:
+        languages = lang_response["body"]
 
 
-    readme_url = f"https://api.github.com/repos/{owner}/{repo_name}/readme"
-    readme_response = requests.get(readme_url, headers=get_headers())
     decoded_readme = ""
-    if readme_response.status_code == 200:
-        readme_content = readme_response.json().get("content", "")
+    if readme_response["status"] == 200:
+        readme_content = readme_response["body"].get("content", "")
         decoded_bytes = base64.b64decode(readme_content)
-        decoded_readme = decoded_bytes.decode("utf-8")
+        decoded_readme = decoded_bytes.decode("utf-8", errors="replace")
 
     if not (repo_description or decoded_readme):
         raise HTTPException(
@@ -99,110 +261,17 @@ def fetch_repo_details(selected_repo_link):
 
 
 
-def previous_github_session_questions(
+async def previous_github_session_questions(
     github_id: ObjectId,
     x: int = None,
     session_number: int = None,
+    digests: bool = False,
 ):
-    
-    session_dict = {}
-    sessions_used = {}
-    
-    search_query = {
-        "github_id": github_id,
-        "status": "passive"
-        }
-
-    if session_number:
-        search_query["session_number"] = session_number
-
-    all_sessions = list(
-        github_question_collection.find(
-            search_query,
-            {
-                "_id": 1,
-                "session_number": 1,
-                "question_bank": 1,
-                "timestamp": 1
-            }
-        ).sort("timestamp", -1)
-    )
-
-
-    if not session_number:
-        latest_sessions = {}
-
-        for session in all_sessions:
-            sn = session["session_number"]
-
-            if sn not in latest_sessions:
-                latest_sessions[sn] = session
-        
-        all_sessions = latest_sessions.values()
-
-
-    sorted_sessions = sorted(
-        all_sessions,
-        key=lambda s: s["timestamp"],
-        reverse=True
-    )
-
-    if x:
-        sorted_sessions = sorted_sessions[:x]
+    return await build_history("github", github_id, x, session_number, digests)
 
-        if len(sorted_sessions) <= 1:
-            raise HTTPException(
-                status_code=400,
-                detail="Need at least 2 sessions for combined feedback."
-            )
-
-    for idx, s in enumerate(sorted_sessions):
-        sn = s["session_number"]
-        sid = str(s["_id"])
-        ts = s["timestamp"]
-
-        session_dict[f"session_{idx+1}"] = {
-            q.get("question", ""): q.get("answer", "")
-            for q in s.get("question_bank", [])
-            if q.get("answer")
-        }
 
-        sessions_used[str(ts)] = {
-            "session_number": sn,
-            "session_id": sid
-        }
 
-    return session_dict, sessions_used
 
 
 
 
-
-
-async def auto_submit(
-    github_id: str,
-    question_session_id: str,
-    token: str,
-    start_time : datetime,
-    duration: int,
-    fun: Union[
-    Callable[[str, str, datetime, HTTPAuthorizationCredentials], None],
-    Callable[[str, str, datetime, HTTPAuthorizationCredentials], Awaitable[None]]
-    ]
-):
-    credentials = HTTPAuthorizationCredentials(
-        scheme="Bearer",
-        credentials=token
-    )
-
-    end_time = start_time + timedelta(minutes=duration) + timedelta(minutes=1)
-    now = generate_timestamp()
-    wait_seconds = (end_time - now).total_seconds()
-
-    if wait_seconds > 0:
-        await asyncio.sleep(wait_seconds)
-
-    if inspect.iscoroutinefunction(fun):
-        await fun(github_id, question_session_id, generate_timestamp(), credentials)
-    else:
-        fun(github_id, question_session_id, generate_timestamp(), credentials)
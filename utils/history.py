@@ -0,0 +1,259 @@
+import asyncio
+import json
+from fastapi import HTTPException
+from database import resume_question_collection, github_question_collection, concept_question_collection
+from database import coding_question_collection, leetcode
+from prompt.history import summarize_session
+from utils.scheduler import schedule_job
+from utils.time import generate_timestamp
+from utils.reader import HISTORY_TOKEN_BUDGET, HISTORY_ANSWER_CHARS
+
+
+HISTORY_SOURCES = {
+    "resume": (resume_question_collection, "resume_id"),
+    "github": (github_question_collection, "github_id"),
+    "concept": (concept_question_collection, "concept_id"),
+    "coding": (coding_question_collection, "coding_id")
+}
+
+# a digest is asked to stay under 120 words
+DIGEST_TOKENS = 200
+
+# feedback and scores are never part of the history
+HISTORY_FIELDS = {
+    "session_number": 1,
+    "timestamp": 1,
+    "history_digest": 1,
+    "question_bank.question": 1,
+    "question_bank.question_id": 1,
+    "question_bank.language": 1,
+    "question_bank.answer": 1
+}
+
+
+
+
+def history_pipeline(parent: str, owner_id, x: int = None, session_number: int = None) -> list:
+
+    match = {parent: owner_id, "status": "passive"}
+
+    if session_number:
+        match["session_number"] = session_number
+
+    pipeline = [
+        {"$match": match},
+        {"$project": HISTORY_FIELDS},
+        {"$sort": {"timestamp": -1}}
+    ]
+
+    # reattempts share a session_number; the latest one stands for it
+    if not session_number:
+        pipeline += [
+            {"$group": {"_id": "$session_number", "session": {"$first": "$$ROOT"}}},
+            {"$replaceRoot": {"newRoot": "$session"}},
+            {"$sort": {"timestamp": -1}}
+        ]
+
+    if x:
+        pipeline.append({"$limit": x})
+
+    return pipeline
+
+
+
+
+def load_sessions(kind: str, owner_id, x: int = None, session_number: int = None) -> list:
+    collection, parent = HISTORY_SOURCES[kind]
+    return list(collection.aggregate(history_pipeline(parent, owner_id, x, session_number)))
+
+
+
+
+def estimate_tokens(value) -> int:
+    return len(json.dumps(value)) // 4 + 1
+
+
+
+
+def truncate(text: str, limit: int = HISTORY_ANSWER_CHARS) -> str:
+
+    if text is None or len(text) <= limit:
+        return text
+
+    return text[:limit] + " ...[truncated]"
+
+
+
+
+def question_answers(session: dict) -> dict:
+    return {
+        truncate(q.get("question", "")): truncate(q.get("answer", ""))
+        for q in session.get("question_bank", [])
+        if q.get("answer")
+    }
+
+
+
+
+def coding_answers(session: dict, problem_map: dict) -> dict:
+    return {
+        truncate(problem_map[q["question_id"]]): truncate(f"""Language: {q.get("language")}\n Answer:\n{q["answer"]}""")
+        for q in session.get("question_bank", [])
+        if q.get("answer") and q.get("question_id") in problem_map
+    }
+
+
+
+
+def problem_descriptions(sessions: list) -> dict:
+
+    question_ids = {
+        q["question_id"]
+        for s in sessions
+        for q in s.get("question_bank", [])
+        if q.get("answer") and q.get("question_id")
+    }
+
+    problems = leetcode.find(
+        {"question_id": {"$in": list(question_ids)}},
+        {"_id": 0, "question_id": 1, "problem_description": 1}
+    )
+
+    return {p["question_id"]: p["problem_description"] for p in problems}
+
+
+
+
+def render_sessions(kind: str, sessions: list) -> list:
+
+    if kind == "coding":
+        problem_map = problem_descriptions(sessions)
+        return [coding_answers(s, problem_map) for s in sessions]
+
+    return [question_answers(s) for s in sessions]
+
+
+
+
+async def session_digest(kind: str, session: dict, pairs: dict) -> str:
+
+    # a passive session's answers no longer change, so its digest is kept on
+    # the session doc (a delete-reattempt clears it)
+    if session.get("history_digest"):
+        return session["history_digest"]
+
+    if not pairs:
+        return "No questions were answered in this session."
+
+    digest = await summarize_session(kind, pairs)
+
+    collection, _ = HISTORY_SOURCES[kind]
+    await asyncio.to_thread(
+        collection.update_one,
+        {"_id": session["_id"], "status": "passive"},
+        {"$set": {"history_digest": digest}}
+    )
+
+    return digest
+
+
+
+
+async def build_history(
+    kind: str,
+    owner_id,
+    x: int = None,
+    session_number: int = None,
+    digests: bool = False,
+    budget: int = HISTORY_TOKEN_BUDGET
+):
+
+    sessions = await asyncio.to_thread(load_sessions, kind, owner_id, x, session_number)
+
+    if x and len(sessions) <= 1:
+        raise HTTPException(
+            status_code=400,
+            detail="Need at least 2 sessions for combined feedback."
+        )
+
+    rendered = await asyncio.to_thread(render_sessions, kind, sessions)
+
+    # newest sessions go in as they are; from the first one that does not
+    # fit, every older session is replaced by its digest. Progress feedback
+    # asks for digests throughout
+    verbatim = []
+    used = 0
+
+    for pairs in ([] if digests else rendered):
+        cost = estimate_tokens(pairs)
+        if used + cost > budget:
+            break
+        verbatim.append(pairs)
+        used += cost
+
+    entries = list(verbatim)
+    pending = list(range(len(verbatim), len(sessions)))
+
+    # digests are made only for as many sessions as could still fit, and
+    # the oldest that do not fit are left out
+    while pending:
+
+        batch = pending[:max(1, (budget - used) // DIGEST_TOKENS)]
+        pending = pending[len(batch):]
+
+        summaries = await asyncio.gather(*(session_digest(kind, sessions[i], rendered[i]) for i in batch))
+
+        for digest in summaries:
+            cost = estimate_tokens(digest)
+            if used + cost > budget:
+                pending = []
+                break
+            entries.append({"Session digest": digest})
+            used += cost
+
+    session_dict = {}
+    sessions_used = {}
+
+    for idx, (s, pairs) in enumerate(zip(sessions, entries)):
+
+        session_dict[f"session_{idx+1}"] = pairs
+
+        sessions_used[str(s["timestamp"])] = {
+            "session_number": s["session_number"],
+            "session_id": str(s["_id"])
+        }
+
+    return session_dict, sessions_used
+
+
+
+
+def schedule_session_digest(kind: str, session_id):
+    schedule_job(
+        "session_digest",
+        f"{kind}:{session_id}",
+        generate_timestamp(),
+        {"kind": kind, "session_id": session_id}
+    )
+
+
+
+
+async def handle_session_digest(payload: dict):
+
+    kind = payload["kind"]
+    collection, _ = HISTORY_SOURCES[kind]
+
+    session = await asyncio.to_thread(
+        collection.find_one,
+        {"_id": payload["session_id"], "status": "passive"},
+        HISTORY_FIELDS
+    )
+
+    # reopened by a reattempt, deleted, or already digested
+    if not session or session.get("history_digest"):
+        return
+
+    rendered = await asyncio.to_thread(render_sessions, kind, [session])
+
+    await session_digest(kind, session, rendered[0])
@@ -0,0 +1,210 @@
+import sys
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from database import db
+from utils.reader import LLM_CACHE_TTL, GITHUB_CACHE_TTL
+
+
+def session_indexes(parent: str):
+    return [
+        IndexModel([(parent, ASCENDING), ("session_number", ASCENDING)]),
+        IndexModel([(parent, ASCENDING), ("timestamp", ASCENDING)]),
+        IndexModel([(parent, ASCENDING), ("status", ASCENDING), ("timestamp", DESCENDING)])
+    ]
+
+
+def owner_indexes():
+    return [IndexModel([("candidate_id", ASCENDING), ("created_on", DESCENDING)])]
+
+
+REQUIRED_INDEXES = {
+    "candidate": [IndexModel([("email", ASCENDING)])],
+    "admin": [IndexModel([("email", ASCENDING)])],
+
+    "resume": owner_indexes(),
+    "github": owner_indexes(),
+    "coding": owner_indexes(),
+    "concept": owner_indexes(),
+
+    "resume_question_session": session_indexes("resume_id"),
+    "github_question_session": session_indexes("github_id"),
+    "coding_question_session": session_indexes("coding_id"),
+    "concept_question_session": session_indexes("concept_id"),
+    "combined_feedback": [
+        IndexModel([("parent_id", ASCENDING), ("type", ASCENDING), ("session_number", ASCENDING), ("timestamp", ASCENDING)]),
+        IndexModel([("parent_id", ASCENDING), ("type", ASCENDING), ("timestamp", ASCENDING)])
+    ],
+
+    # companies and tags are both arrays, so they cannot share one index
+    "leetcode": [
+        IndexModel([("question_id", ASCENDING)]),
+        IndexModel([("companies", ASCENDING)]),
+        IndexModel([("tags", ASCENDING)]),
+        IndexModel([("difficulty", ASCENDING)])
+    ],
+
+    "contest": [
+        IndexModel([("role", ASCENDING), ("skills", ASCENDING), ("created_on", DESCENDING)]),
+        IndexModel([("company", ASCENDING), ("role", ASCENDING)])
+    ],
+    "candidate_response": [
+        IndexModel([("contest_id", ASCENDING), ("candidate_id", ASCENDING)], unique=True)
+    ],
+    "contest_leaderboard": [IndexModel([("contest_id", ASCENDING)], unique=True)],
+    "round_scores": [
+        IndexModel([("contest_id", ASCENDING), ("round", ASCENDING), ("candidate_id", ASCENDING)])
+    ],
+    "round_stats": [IndexModel([("contest_id", ASCENDING)])],
+
+    # blobs are released by file id; _id is the content hash
+    "file_artifacts": [
+        IndexModel([("blobs.resume", ASCENDING)], sparse=True),
+        IndexModel([("blobs.contest_resume", ASCENDING)], sparse=True)
+    ],
+
+    "llm_cache": [IndexModel([("created_at", ASCENDING)], expireAfterSeconds=LLM_CACHE_TTL)],
+    "github_http_cache": [IndexModel([("updated_at", ASCENDING)], expireAfterSeconds=GITHUB_CACHE_TTL)],
+    "scheduled_jobs": [
+        IndexModel([("status", ASCENDING), ("run_at", ASCENDING)]),
+        IndexModel([("status", ASCENDING), ("lease_until", ASCENDING)])
+    ]
+}
+
+
+
+
+def ensure_indexes(collections: list = None) -> dict:
+
+    report = {}
+
+    for name in collections or REQUIRED_INDEXES:
+
+        # an index that conflicts with existing data (duplicates, an older
+        # definition under the same name) is reported instead of stopping
+        # the rest
+        try:
+            report[name] = db[name].create_indexes(REQUIRED_INDEXES[name])
+        except OperationFailure as e:
+            report[name] = f"failed: {e.details.get('errmsg', e) if e.details else e}"
+
+    return report
+
+
+
+
+SAMPLE_ID = ObjectId()
+
+# (collection, filter, sort) for every query the routes issue by something
+# other than _id
+QUERY_SHAPES = [
+    ("candidate", {"email": "a@b.c"}, None),
+    ("admin", {"email": "a@b.c"}, None),
+
+    ("resume", {"candidate_id": SAMPLE_ID}, [("created_on", DESCENDING)]),
+    ("github", {"candidate_id": SAMPLE_ID}, [("created_on", DESCENDING)]),
+    ("coding", {"candidate_id": SAMPLE_ID}, [("created_on", DESCENDING)]),
+    ("concept", {"candidate_id": SAMPLE_ID}, [("created_on", DESCENDING)]),
+
+    ("resume_question_session", {"resume_id": SAMPLE_ID}, [("timestamp", ASCENDING)]),
+    ("resume_question_session", {"resume_id": SAMPLE_ID, "session_number": 1}, None),
+    ("resume_question_session", {"resume_id": SAMPLE_ID, "status": "passive"}, [("timestamp", DESCENDING)]),
+    ("github_question_session", {"github_id": SAMPLE_ID}, [("timestamp", ASCENDING)]),
+    ("github_question_session", {"github_id": SAMPLE_ID, "session_number": 1}, None),
+    ("github_question_session", {"github_id": SAMPLE_ID, "status": "passive"}, [("timestamp", DESCENDING)]),
+    ("coding_question_session", {"coding_id": SAMPLE_ID}, [("timestamp", ASCENDING)]),
+    ("coding_question_session", {"coding_id": SAMPLE_ID, "session_number": 1}, None),
+    ("coding_question_session", {"coding_id": SAMPLE_ID, "status": "passive"}, [("timestamp", DESCENDING)]),
+    ("concept_question_session", {"concept_id": SAMPLE_ID}, [("timestamp", ASCENDING)]),
+    ("concept_question_session", {"concept_id": SAMPLE_ID, "session_number": 1}, None),
+    ("concept_question_session", {"concept_id": SAMPLE_ID, "status": "passive"}, [("timestamp", DESCENDING)]),
+    ("combined_feedback", {"parent_id": SAMPLE_ID, "type": "different"}, [("timestamp", ASCENDING)]),
+    ("combined_feedback", {"parent_id": SAMPLE_ID, "type": "same", "session_number": 1}, [("timestamp", ASCENDING)]),
+
+    ("leetcode", {"question_id": {"$in": [1, 2]}}, None),
+    ("leetcode", {"companies": {"$in": ["google"]}, "difficulty": {"$in": ["Easy"]}}, None),
+    ("leetcode", {"tags": {"$in": ["array"]}}, None),
+
+    ("contest", {"role": {"$in": ["backend"]}, "skills": {"$in": ["python"]}}, [("created_on", DESCENDING)]),
+    ("contest", {"company": "acme", "role": "backend", "skills": ["python"]}, None),
+    ("candidate_response", {"contest_id": SAMPLE_ID, "candidate_id": SAMPLE_ID}, None),
+    ("candidate_response", {"contest_id": SAMPLE_ID, "coding": {"$exists": True}}, None),
+    ("contest_leaderboard", {"contest_id": SAMPLE_ID}, None),
+    ("round_scores", {"contest_id": SAMPLE_ID, "round": "coding"}, [("candidate_id", ASCENDING)]),
+    ("round_stats", {"contest_id": SAMPLE_ID}, None),
+    ("file_artifacts", {"blobs.resume": SAMPLE_ID}, None),
+    ("file_artifacts", {"blobs.contest_resume": SAMPLE_ID}, None),
+
+    ("scheduled_jobs", {"status": "pending", "run_at": {"$lte": SAMPLE_ID.generation_time}}, [("run_at", ASCENDING)])
+]
+
+
+
+
+def plan_stages(plan: dict) -> list:
+
+    stages = [plan.get("stage")]
+
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages += plan_stages(plan[key])
+
+    for child in plan.get("inputStages", []):
+        stages += plan_stages(child)
+
+    return stages
+
+
+
+
+def explain_shape(collection: str, query: dict, sort: list = None) -> list:
+
+    command = {"find": collection, "filter": query}
+
+    if sort:
+        command["sort"] = dict(sort)
+
+    explained = db.command("explain", command, verbosity="queryPlanner")
+
+    return plan_stages(explained["queryPlanner"]["winningPlan"])
+
+
+
+
+def audit_queries() -> list:
+
+    flagged = []
+
+    for collection, query, sort in QUERY_SHAPES:
+        stages = explain_shape(collection, query, sort)
+
+        # a sorted shape must also get its order from the index, not from
+        # an in-memory SORT stage
+        problem = "COLLSCAN" if "COLLSCAN" in stages else "SORT" if sort and "SORT" in stages else None
+
+        if problem:
+            flagged.append((collection, query, sort))
+
+        print(f"{problem or 'ok':8} {collection} {query} {sort or ''}")
+
+    return flagged
+
+
+
+
+# python -m utils.indexes ensure   create every declared index
+# python -m utils.indexes audit    explain every query shape, exit 1 on a COLLSCAN or in-memory sort
+if __name__ == "__main__":
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "audit"
+
+    if command == "ensure":
+        for name, result in ensure_indexes().items():
+            print(name, result)
+
+    elif command == "audit":
+        if audit_queries():
+            sys.exit(1)
+
+    else:
+        sys.exit("usage: python -m utils.indexes [ensure|audit]")
@@ -0,0 +1,140 @@
+import asyncio
+from bson import ObjectId
+from fastapi import HTTPException
+from database import resume_collection, resume_fs, scheduled_jobs_collection
+from prompt.resume import summarize_resume
+from utils.artifacts import extract_resume_text, get_artifact, text_field
+from utils.scheduler import schedule_job
+from utils.time import generate_timestamp
+from utils.reader import JOB_MAX_ATTEMPTS
+
+
+# store happens in the upload request; the job runs the rest in order
+INGEST_STAGES = ["extract", "summarize"]
+
+
+
+
+def schedule_resume_ingest(resume_id: ObjectId):
+    schedule_job("resume_ingest", str(resume_id), generate_timestamp(), {"resume_id": resume_id})
+
+
+
+
+def set_ingest_state(resume_id: ObjectId, **fields):
+    resume_collection.update_one(
+        {"_id": resume_id},
+        {
+            "$set": {
+                **{f"ingest.{k}": v for k, v in fields.items()},
+                "ingest.updated_at": generate_timestamp()
+            }
+        }
+    )
+
+
+
+
+def read_blob(file_id) -> bytes:
+    grid_out = resume_fs.get(file_id)
+
+    try:
+        return grid_out.read()
+    finally:
+        grid_out.close()
+
+
+
+
+def ingest_attempts(resume_id: ObjectId) -> int:
+    job = scheduled_jobs_collection.find_one({"_id": f"resume_ingest:{resume_id}"}, {"attempts": 1})
+    return (job or {}).get("attempts", 0)
+
+
+
+
+async def handle_resume_ingest(payload: dict):
+
+    resume_id = payload["resume_id"]
+
+    resume_doc = await asyncio.to_thread(
+        resume_collection.find_one,
+        {"_id": resume_id},
+        {"file_id": 1, "sha256": 1, "ingest": 1, "status": 1}
+    )
+
+    # deleted while queued, or already finished by an earlier attempt
+    if not resume_doc or resume_doc.get("status") != "processing":
+        return
+
+    sha256 = resume_doc["sha256"]
+    ocr_mode = resume_doc["ingest"]["ocr_mode"]
+
+    try:
+        await asyncio.to_thread(set_ingest_state, resume_id, stage="extract", error=None)
+
+        # a retried job finds the text of an earlier attempt (or of another
+        # upload of the same bytes) and skips reading the blob again
+        data = None
+        if await asyncio.to_thread(get_artifact, sha256, text_field(ocr_mode)) is None:
+            data = await asyncio.to_thread(read_blob, resume_doc["file_id"])
+
+        text = await extract_resume_text(data, ocr_mode, sha256)
+
+        await asyncio.to_thread(set_ingest_state, resume_id, stage="summarize")
+
+        summary = await summarize_resume(text, sha256, ocr_mode)
+
+    except Exception as e:
+
+        permanent = isinstance(e, HTTPException) and 400 <= e.status_code < 500
+        error = e.detail if isinstance(e, HTTPException) else repr(e)
+
+        if permanent or await asyncio.to_thread(ingest_attempts, resume_id) >= JOB_MAX_ATTEMPTS:
+            await asyncio.to_thread(
+                resume_collection.update_one,
+                {"_id": resume_id},
+                {"$set": {"status": "failed", "ingest.error": error, "ingest.updated_at": generate_timestamp()}}
+            )
+        else:
+            await asyncio.to_thread(set_ingest_state, resume_id, error=error)
+
+        raise
+
+    await asyncio.to_thread(
+        resume_collection.update_one,
+        {"_id": resume_id, "status": "processing"},
+        {
+            "$set": {
+                "summary": summary,
+                "status": "ready",
+                "ingest.stage": "done",
+                "ingest.error": None,
+                "ingest.updated_at": generate_timestamp()
+            }
+        }
+    )
+
+
+
+
+def resume_status(resume_doc: dict) -> dict:
+
+    # resumes uploaded before the pipeline have no status and are ready
+    ingest = resume_doc.get("ingest", {})
+    job = {}
+
+    if resume_doc.get("status") == "processing":
+        job = scheduled_jobs_collection.find_one(
+            {"_id": f"resume_ingest:{resume_doc['_id']}"},
+            {"status": 1, "attempts": 1, "run_at": 1}
+        ) or {}
+
+    return {
+        "resume_id": str(resume_doc["_id"]),
+        "status": resume_doc.get("status", "ready"),
+        "stage": ingest.get("stage", "done"),
+        "error": ingest.get("error"),
+        "attempts": job.get("attempts", 0),
+        "next_attempt_at": job.get("run_at") if job.get("status") == "pending" else None
+    }
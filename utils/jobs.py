@@ -0,0 +1,219 @@
+import asyncio
+from bson import ObjectId
+from datetime import datetime, timedelta
+from database import resume_question_collection, github_question_collection
+from database import coding_question_collection, concept_question_collection
+from database import contest_collection, contest_candidate_collection
+from utils.scheduler import schedule_job
+from utils.scoring import ROUND_SCORERS, get_round_questions
+from utils.round_stats import record_round_scores, penalty_seconds
+from utils.results import compute_resume_result, compute_coding_result, compute_concept_result
+from utils.results import compute_hr_result, compute_leaderboard
+from utils.ingest import handle_resume_ingest
+from utils.history import handle_session_digest
+from utils.reader import RESUME_INGEST_CONCURRENCY
+
+
+SESSION_COLLECTIONS = {
+    "resume": resume_question_collection,
+    "github": github_question_collection,
+    "coding": coding_question_collection,
+    "concept": concept_question_collection
+}
+
+# (stage, result function, contest field holding the stage's due time), in run order
+RESULT_STAGES = [
+    ("resume", compute_resume_result, ("resume_round", "result")),
+    ("coding", compute_coding_result, ("coding_round", "result")),
+    ("concept", compute_concept_result, ("concept_round", "result")),
+    ("hr", compute_hr_result, ("hr_round", "result")),
+    ("leaderboard", compute_leaderboard, ("leaderboard_declare_time",))
+]
+
+
+
+
+def schedule_session_timeout(module: str, session_id, start_time: datetime, duration: int):
+
+    run_at = start_time + timedelta(minutes=duration) + timedelta(minutes=1)
+
+    schedule_job(
+        "session_timeout",
+        f"{module}:{session_id}",
+        run_at,
+        {
+            "module": module,
+            "session_id": ObjectId(session_id),
+            "start_time": start_time,
+            "submitted_at": run_at
+        }
+    )
+
+
+
+
+def schedule_round_timeout(contest_id: ObjectId, candidate_id: ObjectId, round_name: str, end_time: datetime):
+
+    schedule_job(
+        "round_timeout",
+        f"{contest_id}:{candidate_id}:{round_name}",
+        end_time,
+        {
+            "contest_id": contest_id,
+            "candidate_id": candidate_id,
+            "round": round_name,
+            "end_time": end_time
+        }
+    )
+
+
+
+
+def get_stage_time(contest: dict, path: tuple):
+
+    value = contest
+    for field in path:
+        value = value[field]
+
+    return value
+
+
+
+
+def schedule_contest_result(contest: dict, stage_index: int = 0):
+
+    stage, _, path = RESULT_STAGES[stage_index]
+
+    schedule_job(
+        "contest_result",
+        f"{contest['_id']}:{stage}",
+        get_stage_time(contest, path),
+        {
+            "contest_id": contest["_id"],
+            "stage": stage_index
+        }
+    )
+
+
+
+
+async def handle_session_timeout(payload: dict):
+
+    collection = SESSION_COLLECTIONS[payload["module"]]
+
+    # only close the attempt this job was armed for; a reset session gets a
+    # new timestamp and a new job
+    await asyncio.to_thread(
+        collection.update_one,
+        {
+            "_id": payload["session_id"],
+            "status": "active",
+            "timestamp": payload["start_time"]
+        },
+        {
+            "$set": {
+                "status": "passive",
+                "submitted_at_frontend": payload["submitted_at"],
+                "submitted_at_backend": payload["submitted_at"]
+            }
+        }
+    )
+
+
+
+
+async def handle_round_timeout(payload: dict):
+
+    contest_id = payload["contest_id"]
+    candidate_id = payload["candidate_id"]
+    round_name = payload["round"]
+
+    projection = {"_id": 0, "candidate_id": 1, round_name: 1}
+
+    if round_name == "hr":
+        projection["resume.summary"] = 1
+
+    contest_candidate = await asyncio.to_thread(
+        contest_candidate_collection.find_one,
+        {"contest_id": contest_id, "candidate_id": candidate_id},
+        projection
+    )
+
+    round_data = (contest_candidate or {}).get(round_name)
+
+    if not round_data or round_data.get("submitted_at") or round_data.get("end_time") != payload["end_time"]:
+        return
+
+    contest = await asyncio.to_thread(
+        contest_collection.find_one,
+        {"_id": contest_id, f"fake_submit_{round_name}": candidate_id}
+    )
+
+    # candidates who never saved an answer are penalised at result time
+    if not contest:
+        return
+
+    questions = await asyncio.to_thread(get_round_questions, contest, round_name)
+    update = await ROUND_SCORERS[round_name](contest_candidate, questions)
+
+    written = await asyncio.to_thread(
+        contest_candidate_collection.update_one,
+        {
+            "contest_id": contest_id,
+            "candidate_id": candidate_id,
+            f"{round_name}.submitted_at": None
+        },
+        {"$set": {**update, f"{round_name}.submitted_at": payload["end_time"]}}
+    )
+
+    # a manual submit that landed first has already recorded its own scores
+    if written.modified_count:
+        await asyncio.to_thread(
+            record_round_scores,
+            contest_id,
+            round_name,
+            candidate_id,
+            {**round_data, "question_bank": update[f"{round_name}.question_bank"]},
+            penalty_seconds(contest, round_name)
+        )
+
+    await asyncio.to_thread(
+        contest_collection.update_one,
+        {"_id": contest_id},
+        {"$pull": {f"fake_submit_{round_name}": candidate_id}}
+    )
+
+
+
+
+async def handle_contest_result(payload: dict):
+
+    contest = await asyncio.to_thread(contest_collection.find_one, {"_id": payload["contest_id"]})
+
+    if not contest:
+        return
+
+    stage_index = payload["stage"]
+    _, compute, _ = RESULT_STAGES[stage_index]
+
+    await compute(contest, contest["_id"])
+
+    # stages are chained so a retried stage never lets a later one run first
+    if stage_index + 1 < len(RESULT_STAGES):
+        await asyncio.to_thread(schedule_contest_result, contest, stage_index + 1)
+
+
+
+
+JOB_HANDLERS = {
+    "session_timeout": handle_session_timeout,
+    "round_timeout": handle_round_timeout,
+    "contest_result": handle_contest_result,
+    "resume_ingest": handle_resume_ingest,
+    "session_digest": handle_session_digest
+}
+
+# kinds that may only take part of the worker's JOB_CONCURRENCY slots
+JOB_LIMITS = {
+    "resume_ingest": RESUME_INGEST_CONCURRENCY
+}
@@ -0,0 +1,152 @@
+from fastapi import HTTPException
+from bson import ObjectId
+import hashlib
+from database import contest_leaderboard, candidate_collection
+from utils.cache import TTLCache
+from utils.reader import LEADERBOARD_CACHE_TTL, LEADERBOARD_CACHE_SIZE
+
+
+# round -> (leaderboard field, selected candidates field)
+LEADERBOARD_FIELDS = {
+    "resume": ("resume_round", "selected_resume_candidates"),
+    "coding": ("coding_round", "selected_coding_candidates"),
+    "concept": ("concept_round", "selected_concept_candidates"),
+    "hr": ("hr_round", "selected_hr_candidates"),
+    "final": ("final_leaderboard", "selected_candidates")
+}
+
+SNAPSHOT_CACHE = TTLCache(LEADERBOARD_CACHE_SIZE, LEADERBOARD_CACHE_TTL)
+
+
+
+
+def candidate_names(candidate_ids: list) -> dict:
+
+    return {
+        c["_id"]: c.get("full_name")
+        for c in candidate_collection.find(
+            {"_id": {"$in": candidate_ids}},
+            {"_id": 1, "full_name": 1}
+        )
+    }
+
+
+
+
+def attach_names(leaderboard: list) -> list:
+
+    names = candidate_names([entry["candidate_id"] for entry in leaderboard])
+
+    for entry in leaderboard:
+        entry["name"] = names.get(entry["candidate_id"], "Unknown")
+
+    return leaderboard
+
+
+
+
+def invalidate_leaderboards(contest_id: ObjectId):
+    for round_name in LEADERBOARD_FIELDS:
+        SNAPSHOT_CACHE.pop((contest_id, round_name))
+
+
+
+
+def build_snapshot(contest_id: ObjectId, round_name: str) -> dict:
+
+    board_key, selected_key = LEADERBOARD_FIELDS[round_name]
+
+    leaderboard_doc = contest_leaderboard.find_one(
+        {"contest_id": contest_id},
+        {board_key: 1, selected_key: 1, f"versions.{board_key}": 1, "_id": 0}
+    )
+
+    if not leaderboard_doc or board_key not in leaderboard_doc:
+        raise HTTPException(status_code=404, detail="Leaderboard not generated")
+
+    leaderboard = leaderboard_doc[board_key]
+
+    # boards saved before names were stored on the entries
+    if any("name" not in entry for entry in leaderboard):
+        attach_names(leaderboard)
+
+    version = leaderboard_doc.get("versions", {}).get(board_key)
+
+    if version is None:
+        version = hashlib.sha256(repr(leaderboard).encode()).hexdigest()[:16]
+
+    rows = [
+        {
+            "candidate_id": None,
+            "name": entry["name"],
+            "rank": entry["rank"],
+            "percentile": entry["percentile"],
+            "score": entry["final_normalized_score"],
+            "latest_submission": entry["latest_submission"]
+        }
+        for entry in leaderboard
+    ]
+
+    return {
+        "version": version,
+        "rows": rows,
+        "position": {entry["candidate_id"]: i for i, entry in enumerate(leaderboard)},
+        "selected": set(leaderboard_doc.get(selected_key, []))
+    }
+
+
+
+
+def get_snapshot(contest_id: ObjectId, round_name: str) -> dict:
+
+    key = (contest_id, round_name)
+    snapshot = SNAPSHOT_CACHE.get(key)
+
+    if snapshot is None:
+        snapshot = build_snapshot(contest_id, round_name)
+        SNAPSHOT_CACHE.set(key, snapshot)
+
+    return snapshot
+
+
+
+
+def leaderboard_view(contest_id: ObjectId, round_name: str, candidate_id: ObjectId, page: int, page_size: int|None):
+
+    if page < 1 or (page_size is not None and page_size < 1):
+        raise HTTPException(status_code=400, detail="Invalid page")
+
+    snapshot = get_snapshot(contest_id, round_name)
+    rows = snapshot["rows"]
+
+    # no page_size keeps the old behaviour of returning the whole board
+    start = (page - 1) * page_size if page_size else 0
+    end = start + page_size if page_size else len(rows)
+
+    position = snapshot["position"].get(candidate_id)
+    my_row = None
+
+    if position is not None:
+        my_row = {**rows[position], "candidate_id": str(candidate_id)}
+
+    data = rows[start:end]
+
+    if position is not None and start <= position < end:
+        data = list(data)
+        data[position - start] = my_row
+
+    etag = 'W/"{}"'.format(
+        hashlib.sha256(f"{snapshot['version']}:{candidate_id}:{page}:{page_size}".encode()).hexdigest()[:32]
+    )
+
+    body = {
+        "success": True,
+        "data": data,
+        "selection": candidate_id in snapshot["selected"],
+        "my_rank": my_row,
+        "page": page,
+        "page_size": page_size,
+        "total": len(rows)
+    }
+
+    return etag, body
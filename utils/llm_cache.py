@@ -0,0 +1,151 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from pymongo.errors import PyMongoError
+from database import llm_cache_collection
+from utils.cache import TTLCache
+from utils.indexes import ensure_indexes
+from utils.reader import LLM_CACHE, LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_MAX_TEMPERATURE
+import asyncio
+import hashlib
+import json
+import threading
+
+
+MEMORY_CACHE = TTLCache(LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL)
+
+STATS = {
+    "memory_hits": 0,
+    "mongo_hits": 0,
+    "misses": 0,
+    "bypassed": 0,
+    "stores": 0,
+    "errors": 0,
+    "latency_saved_seconds": 0.0
+}
+STATS_LOCK = threading.Lock()
+
+TTL_INDEX_READY = False
+
+
+def record(name: str, amount=1):
+    with STATS_LOCK:
+        STATS[name] += amount
+
+
+def cache_key(model: str, prompt: str, content: str, temperature: float, response_format: dict) -> str:
+
+    payload = json.dumps(
+        [model, prompt, content, temperature, response_format],
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False
+    )
+
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def should_cache(temperature: float, cache: bool = None) -> bool:
+
+    if not LLM_CACHE or cache is False:
+        return False
+
+    # sampled generations are only cached when the caller opts in
+    return cache is True or temperature <= LLM_CACHE_MAX_TEMPERATURE
+
+
+def cached_response(content: str):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))]
+    )
+
+
+def ensure_ttl_index():
+    global TTL_INDEX_READY
+
+    if TTL_INDEX_READY:
+        return
+
+    ensure_indexes(["llm_cache"])
+    TTL_INDEX_READY = True
+
+
+def load_entry(key: str):
+    return llm_cache_collection.find_one({"_id": key}, {"content": 1, "latency": 1})
+
+
+def store_entry(key: str, content: str, latency: float):
+
+    ensure_ttl_index()
+
+    llm_cache_collection.update_one(
+        {"_id": key},
+        {"$set": {
+            "content": content,
+            "latency": latency,
+            "created_at": datetime.now(timezone.utc)
+        }},
+        upsert=True
+    )
+
+
+async def lookup(key: str):
+
+    entry = MEMORY_CACHE.get(key)
+
+    if entry is not None:
+        record("memory_hits")
+        record("latency_saved_seconds", entry["latency"])
+        return entry["content"]
+
+    try:
+        entry = await asyncio.to_thread(load_entry, key)
+    except PyMongoError:
+        record("errors")
+        entry = None
+
+    if entry is None:
+        record("misses")
+        return None
+
+    entry = {"content": entry["content"], "latency": entry.get("latency", 0.0)}
+    MEMORY_CACHE.set(key, entry)
+
+    record("mongo_hits")
+    record("latency_saved_seconds", entry["latency"])
+    return entry["content"]
+
+
+async def store(key: str, content: str, latency: float):
+
+    # never pin a malformed completion; the caller will retry it anyway
+    try:
+        json.loads(content)
+    except (TypeError, ValueError):
+        return
+
+    MEMORY_CACHE.set(key, {"content": content, "latency": latency})
+
+    try:
+        await asyncio.to_thread(store_entry, key, content, latency)
+    except PyMongoError:
+        record("errors")
+        return
+
+    record("stores")
+
+
+def cache_stats() -> dict:
+
+    with STATS_LOCK:
+        stats = dict(STATS)
+
+    hits = stats["memory_hits"] + stats["mongo_hits"]
+    lookups = hits + stats["misses"]
+
+    stats["hit_rate"] = round(hits / lookups, 4) if lookups else 0.0
+    stats["latency_saved_seconds"] = round(stats["latency_saved_seconds"], 3)
+    stats["memory_entries"] = len(MEMORY_CACHE)
+    stats["enabled"] = LLM_CACHE
+    stats["max_temperature"] = LLM_CACHE_MAX_TEMPERATURE
+
+    return stats
@@ -1,9 +1,223 @@
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from collections import defaultdict
 import math
+import numpy as np
+
+
+TIME_ORIGIN = datetime.min.replace(tzinfo=timezone.utc)
+ONE_MICROSECOND = timedelta(microseconds=1)
+TIE_TOLERANCE = 1e-9
+NO_TIME = np.iinfo(np.int64).min
+
+
+#####################################################################################################
+#
+# Matrix engine: one row per candidate, one column per question (or section).
+# scores  float64, NaN where the candidate has no entry for that column
+# offsets int64 microseconds since TIME_ORIGIN, ignored where scores is NaN
+#
+#####################################################################################################
+
+def z_score_totals(scores, present):
+
+    totals = np.zeros(scores.shape[0])
+
+    for j in range(scores.shape[1]):
+        mask = present[:, j]
+        column = scores[mask, j]
+        n = column.size
+
+        if n == 0:
+            continue
+
+        # cumsum adds left to right like sum(), so totals match the
+        # reference implementation bit for bit
+        mean = np.cumsum(column)[-1] / n
+        std_dev = math.sqrt(np.cumsum((column - mean) ** 2)[-1] / n)
+
+        if std_dev == 0:
+            continue
+
+        totals[mask] += (column - mean) / std_dev
+
+    return totals
+
+
+def column_totals(scores, present):
+
+    totals = np.zeros(scores.shape[0])
+
+    for j in range(scores.shape[1]):
+        mask = present[:, j]
+        totals[mask] += scores[mask, j]
+
+    return totals
+
+
+def rank_totals(totals, latest):
+
+    # higher total first, earlier latest submission breaks ties; lexsort is stable
+    order = np.lexsort((latest, -totals))
+    sorted_totals = totals[order]
+    sorted_latest = latest[order]
+
+    n = order.size
+    ranks = np.arange(1, n + 1)
+
+    if n > 1:
+        tied = np.zeros(n, dtype=bool)
+        tied[1:] = (
+            (np.abs(np.diff(sorted_totals)) < TIE_TOLERANCE)
+            & (sorted_latest[1:] == sorted_latest[:-1])
+        )
+        ranks = np.maximum.accumulate(np.where(tied, 0, ranks))
+
+    if n == 1:
+        percentiles = np.full(1, 100.0)
+    else:
+        percentiles = (n - ranks) / (n - 1) * 100
+
+    return order, ranks, percentiles
+
+
+def rank_matrix(scores, offsets, normalize=True):
+
+    scores = np.asarray(scores, dtype=np.float64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    present = ~np.isnan(scores)
+
+    if normalize:
+        totals = z_score_totals(scores, present)
+    else:
+        totals = column_totals(scores, present)
+
+    latest = np.where(present, offsets, NO_TIME).max(axis=1)
+    order, ranks, percentiles = rank_totals(totals, latest)
+
+    return order, totals, latest, ranks, percentiles
+
+
+def matrix_leaderboard(candidate_ids, scores, offsets, normalize=True):
+
+    if len(candidate_ids) == 0:
+        return []
+
+    order, totals, latest, ranks, percentiles = rank_matrix(scores, offsets, normalize)
+
+    return leaderboard_entries(candidate_ids, order, totals, latest, ranks, percentiles)
+
+
+def leaderboard_entries(candidate_ids, order, totals, latest, ranks, percentiles):
+
+    return [
+        {
+            "candidate_id": candidate_ids[i],
+            "final_normalized_score": total,
+            "latest_submission": TIME_ORIGIN + timedelta(microseconds=latest_us),
+            "rank": rank,
+            "percentile": percentile
+        }
+        for i, total, latest_us, rank, percentile in zip(
+            order.tolist(),
+            totals[order].tolist(),
+            latest[order].tolist(),
+            ranks.tolist(),
+            percentiles.tolist()
+        )
+    ]
+
+
+def time_keys(values):
+
+    if any(isinstance(v, str) for v in values):
+        values = [datetime.fromisoformat(v) if isinstance(v, str) else v for v in values]
+
+    if not values:
+        return np.zeros(0, dtype=np.int64), values
+
+    if isinstance(values[0], timedelta):
+        origin = timedelta(0)
+    elif values[0].tzinfo is None:
+        origin = datetime.min
+    else:
+        origin = TIME_ORIGIN
+
+    keys = np.fromiter(
+        ((v - origin) // ONE_MICROSECOND for v in values),
+        dtype=np.int64,
+        count=len(values)
+    )
+
+    return keys, values
+
+
+def entries_leaderboard(columns, score_field, time_field, normalize):
+
+    row_of = {}
+    parsed = []
+
+    for column in columns:
+        rows = [row_of.setdefault(entry["candidate_id"], len(row_of)) for entry in column]
+        values = [entry[score_field] for entry in column]
+        keys, times = time_keys([entry[time_field] for entry in column])
+        parsed.append((np.array(rows, dtype=np.int64), values, keys, times))
+
+    if not row_of:
+        return []
+
+    scores = np.full((len(row_of), len(columns)), np.nan)
+    offsets = np.zeros((len(row_of), len(columns)), dtype=np.int64)
+    time_index = np.zeros((len(row_of), len(columns)), dtype=np.int64)
+
+    for j, (rows, values, keys, _) in enumerate(parsed):
+        scores[rows, j] = values
+        offsets[rows, j] = keys
+        time_index[rows, j] = np.arange(rows.size)
+
+    order, totals, latest, ranks, percentiles = rank_matrix(scores, offsets, normalize)
+
+    # hand back the caller's own time objects; argmax picks the first
+    # column holding the maximum, as the reference loop does
+    present = ~np.isnan(scores)
+    latest_column = np.where(present, offsets, NO_TIME).argmax(axis=1)
+    latest_position = time_index[np.arange(len(row_of)), latest_column]
+    candidate_ids = list(row_of)
+
+    return [
+        {
+            "candidate_id": candidate_ids[i],
+            "final_normalized_score": total,
+            "latest_submission": parsed[column][3][position],
+            "rank": rank,
+            "percentile": percentile
+        }
+        for i, column, position, total, rank, percentile in zip(
+            order.tolist(),
+            latest_column[order].tolist(),
+            latest_position[order].tolist(),
+            totals[order].tolist(),
+            ranks.tolist(),
+            percentiles.tolist()
+        )
+    ]
 
 
 def normalize_and_rank(candidates_scores):
+    return entries_leaderboard(candidates_scores, "raw_score", "submitted_at", normalize=True)
+
+
+def finalize_leaderboard(section_outputs):
+    return entries_leaderboard(section_outputs, "final_normalized_score", "latest_submission", normalize=False)
+
+
+#####################################################################################################
+#
+# Reference implementations the matrix engine is checked against (python utils/normalizer.py)
+#
+#####################################################################################################
+
+
+def normalize_and_rank_reference(candidates_scores):
 
     # Step 1: Normalize all questions and accumulate final z-score
     results = defaultdict(lambda: {
@@ -103,7 +317,7 @@ candidates_scores = [
         {"candidate_id": "u2", "raw_score": 85, "submitted_at": "2026-02-26T10:18:00"},
     ]
 ]
-print(normalize_and_rank(candidates_scores))
+print(normalize_and_rank_reference(candidates_scores))
 
 [
     {
@@ -127,7 +341,7 @@ print(normalize_and_rank(candidates_scores))
 
 #####################################################################################################
 
-def finalize_leaderboard(section_outputs):
+def finalize_leaderboard_reference(section_outputs):
 
     cumulative = defaultdict(lambda: {
         "final_normalized_score": 0.0,
@@ -197,7 +411,7 @@ sections = [
     ]
 ]
 
-print(finalize_leaderboard(sections))
+print(finalize_leaderboard_reference(sections))
 
 [
     {
@@ -215,4 +429,88 @@ print(finalize_leaderboard(sections))
         "percentile": 0.0  
     }
 ]
-'''
\ No newline at end of file
+'''
+
+
+
+if __name__ == "__main__":
+
+    # Randomised equivalence check against the reference implementations,
+    # then a benchmark:  python -m utils.normalizer 100000
+    import random
+    import sys
+    import time
+
+    def same(expected, actual):
+        assert len(expected) == len(actual)
+        for e, a in zip(expected, actual):
+            assert e["candidate_id"] == a["candidate_id"], (e, a)
+            assert abs(e["final_normalized_score"] - a["final_normalized_score"]) < 1e-9, (e, a)
+            assert e["latest_submission"] == a["latest_submission"], (e, a)
+            assert e["rank"] == a["rank"], (e, a)
+            assert e["percentile"] == a["percentile"], (e, a)
+
+    def random_round(rng, n, q):
+        start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        columns = []
+        for _ in range(q):
+            constant = rng.random() < 0.1
+            columns.append([
+                {
+                    "candidate_id": f"c{i}",
+                    "raw_score": 5 if constant else rng.choice([0, 1, 2.5, 5, 7, 10]),
+                    "submitted_at": start + timedelta(minutes=rng.randint(0, 5))
+                }
+                for i in range(n)
+                if rng.random() > 0.1
+            ])
+        return columns
+
+    rng = random.Random(7)
+
+    for _ in range(500):
+        columns = random_round(rng, rng.randint(1, 40), rng.randint(1, 6))
+        same(normalize_and_rank_reference(columns), normalize_and_rank(columns))
+
+        sections = [
+            [
+                {
+                    "candidate_id": entry["candidate_id"],
+                    "final_normalized_score": entry["final_normalized_score"],
+                    "latest_submission": entry["latest_submission"] - TIME_ORIGIN
+                }
+                for entry in normalize_and_rank_reference(random_round(rng, 30, 3))
+            ]
+            for _ in range(rng.randint(1, 4))
+        ]
+        same(finalize_leaderboard_reference(sections), finalize_leaderboard(sections))
+
+    print("equivalence: 1000 random cases ok")
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    q = 10
+    columns = random_round(rng, n, q)
+
+    start = time.perf_counter()
+    expected = normalize_and_rank_reference(columns)
+    reference_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = normalize_and_rank(columns)
+    wrapper_time = time.perf_counter() - start
+
+    same(expected, actual)
+
+    np_rng = np.random.default_rng(7)
+    scores = np_rng.integers(0, 11, size=(n, q)).astype(np.float64)
+    offsets = np_rng.integers(0, 5 * 60 * 10**6, size=(n, q))
+
+    start = time.perf_counter()
+    rank_matrix(scores, offsets)
+    matrix_time = time.perf_counter() - start
+
+    print(f"{n} candidates x {q} questions")
+    print(f"reference          {reference_time:.3f}s")
+    print(f"normalize_and_rank {wrapper_time:.3f}s  (list-of-dicts in, same output)")
+    print(f"rank_matrix        {matrix_time:.3f}s  (dense matrix in)")
+
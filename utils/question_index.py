@@ -0,0 +1,296 @@
+import asyncio
+import random
+import threading
+import numpy as np
+from collections import defaultdict
+from fastapi import HTTPException
+from pymongo.errors import OperationFailure, PyMongoError
+from database import leetcode
+from utils.time import generate_timestamp
+from utils.reader import CODING_DIFFICULTY_RATIOS, QUESTION_INDEX_REFRESH
+
+
+NO_CHANGE_STREAMS = 40573
+
+QUESTION_INDEX = None
+INDEX_LOCK = threading.Lock()
+
+
+
+
+def parse_ratios(value: str) -> dict:
+
+    ratios = {}
+
+    for part in value.split(","):
+        name, _, weight = part.partition(":")
+        if name.strip():
+            ratios[name.strip()] = float(weight or 1)
+
+    return ratios
+
+
+DEFAULT_RATIOS = parse_ratios(CODING_DIFFICULTY_RATIOS)
+
+
+
+
+def build_question_index(docs: list = None) -> dict:
+
+    if docs is None:
+        docs = leetcode.find({}, {"_id": 0, "question_id": 1, "companies": 1, "difficulty": 1, "tags": 1})
+
+    docs = [q for q in docs if q.get("question_id") is not None]
+    docs.sort(key=lambda q: str(q["question_id"]))
+
+    by_company = defaultdict(int)
+    by_difficulty = defaultdict(int)
+    by_tag = defaultdict(int)
+
+    # every question gets a bit; each filter value is the set of its bits
+    for position, q in enumerate(docs):
+
+        bit = 1 << position
+        by_difficulty[q.get("difficulty")] |= bit
+
+        for company in q.get("companies") or []:
+            by_company[company] |= bit
+
+        for tag in q.get("tags") or []:
+            by_tag[tag] |= bit
+
+    question_ids = [q["question_id"] for q in docs]
+
+    return {
+        "question_ids": question_ids,
+        "position": {qid: position for position, qid in enumerate(question_ids)},
+        "all": (1 << len(question_ids)) - 1,
+        "by_company": dict(by_company),
+        "by_difficulty": dict(by_difficulty),
+        "by_tag": dict(by_tag),
+        "loaded_at": generate_timestamp()
+    }
+
+
+
+
+def load_question_index(docs: list = None) -> dict:
+    global QUESTION_INDEX
+
+    index = build_question_index(docs)
+
+    # readers keep whichever index they picked up; the swap is one assignment
+    QUESTION_INDEX = index
+
+    return index
+
+
+
+
+def get_question_index() -> dict:
+
+    if QUESTION_INDEX is None:
+        with INDEX_LOCK:
+            if QUESTION_INDEX is None:
+                load_question_index()
+
+    return QUESTION_INDEX
+
+
+
+
+def any_of(index: dict, field: str, values: list) -> int:
+
+    # no values selected means no restriction, like an absent $in
+    if not values:
+        return index["all"]
+
+    mask = 0
+    for value in values:
+        mask |= index[field].get(value, 0)
+
+    return mask
+
+
+
+
+def filter_mask(index: dict, companies: list = None, tags: list = None, difficulties: list = None) -> int:
+    return (
+        any_of(index, "by_company", companies)
+        & any_of(index, "by_tag", tags)
+        & any_of(index, "by_difficulty", difficulties)
+    )
+
+
+
+
+def ids_mask(index: dict, question_ids: list) -> int:
+
+    mask = 0
+    for qid in question_ids:
+        position = index["position"].get(qid)
+        if position is not None:
+            mask |= 1 << position
+
+    return mask
+
+
+
+
+def mask_positions(mask: int) -> np.ndarray:
+
+    if not mask:
+        return np.empty(0, dtype=np.int64)
+
+    raw = np.frombuffer(mask.to_bytes((mask.bit_length() + 7) // 8, "little"), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(raw, bitorder="little"))
+
+
+
+
+def sample_mask(index: dict, mask: int, count: int, rng: random.Random = None) -> list:
+
+    positions = mask_positions(mask).tolist()
+    chosen = (rng or random).sample(positions, min(count, len(positions)))
+
+    return [index["question_ids"][position] for position in chosen]
+
+
+
+
+def count_questions(companies: list = None, tags: list = None, difficulties: list = None) -> int:
+    return filter_mask(get_question_index(), companies, tags, difficulties).bit_count()
+
+
+
+
+def draw_questions(count: int, companies: list = None, tags: list = None, difficulties: list = None, exclude: list = None) -> list:
+
+    index = get_question_index()
+    mask = filter_mask(index, companies, tags, difficulties)
+
+    if exclude:
+        mask &= ~ids_mask(index, exclude)
+
+    return sample_mask(index, mask, count)
+
+
+
+
+def allocate(count: int, ratios: dict, available: dict) -> dict:
+
+    quotas = {name: 0 for name in ratios}
+    open_strata = {name: weight for name, weight in ratios.items() if weight > 0}
+    remaining = count
+
+    # strata too small for their share are taken whole and the rest is split
+    # again over the others
+    while open_strata:
+
+        total = sum(open_strata.values())
+        capped = [name for name, weight in open_strata.items() if available[name] <= remaining * weight / total]
+
+        if not capped:
+            break
+
+        for name in capped:
+            quotas[name] = available[name]
+            remaining -= available[name]
+            del open_strata[name]
+
+    if not open_strata or remaining <= 0:
+        return quotas
+
+    # largest-remainder rounding; no share reaches its stratum's size here
+    total = sum(open_strata.values())
+    shares = {name: remaining * weight / total for name, weight in open_strata.items()}
+
+    for name, share in shares.items():
+        quotas[name] = int(share)
+
+    leftover = remaining - sum(int(share) for share in shares.values())
+
+    for name in sorted(shares, key=lambda n: shares[n] - int(shares[n]), reverse=True)[:leftover]:
+        quotas[name] += 1
+
+    return quotas
+
+
+
+
+def sample_coding_ids(company: str, count: int, ratios: dict = None, rng: random.Random = None) -> list:
+
+    index = get_question_index()
+    ratios = ratios or DEFAULT_RATIOS
+
+    company_mask = index["by_company"].get(company, 0)
+
+    strata = {
+        name: company_mask & index["by_difficulty"].get(name, 0)
+        for name in ratios
+    }
+
+    total = sum(mask.bit_count() for name, mask in strata.items() if ratios[name] > 0)
+
+    if total < count:
+        raise HTTPException(status_code=400, detail=f"Not enough coding questions, only {total} available.")
+
+    quotas = allocate(count, ratios, {name: mask.bit_count() for name, mask in strata.items()})
+
+    chosen = []
+    for name, quota in quotas.items():
+        chosen += sample_mask(index, strata[name], quota, rng)
+
+    (rng or random).shuffle(chosen)
+
+    return [str(qid) for qid in chosen]
+
+
+
+
+def follow_leetcode_changes(stop: asyncio.Event):
+
+    with leetcode.watch(max_await_time_ms=1000) as stream:
+
+        load_question_index()
+        dirty = False
+
+        while stream.alive and not stop.is_set():
+
+            change = stream.try_next()
+
+            # a burst of edits (e.g. a re-seed) is applied once it goes quiet
+            if change is None:
+                if dirty:
+                    load_question_index()
+                    dirty = False
+                continue
+
+            dirty = True
+
+
+
+
+async def watch_question_index(stop: asyncio.Event):
+
+    change_streams = True
+
+    while not stop.is_set():
+
+        try:
+            if change_streams:
+                await asyncio.to_thread(follow_leetcode_changes, stop)
+            else:
+                await asyncio.to_thread(load_question_index)
+
+        except OperationFailure as e:
+            if e.code == NO_CHANGE_STREAMS:
+                change_streams = False
+
+        except PyMongoError:
+            pass
+
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=QUESTION_INDEX_REFRESH)
+        except asyncio.TimeoutError:
+            pass
@@ -8,4 +8,57 @@ JWT_SECRET = os.getenv("JWT_SECRET")
 JWT_ALGO = os.getenv("JWT_ALGO")
 Frontend = os.getenv("Frontend")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-GITHUB_API_KEY = os.getenv("GITHUB_API_KEY")
\ No newline at end of file
+GITHUB_API_KEY = os.getenv("GITHUB_API_KEY")
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai")
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+LLM_ROUTE_CONCURRENCY = int(os.getenv("LLM_ROUTE_CONCURRENCY", "16"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_FAKE_LATENCY = float(os.getenv("LLM_FAKE_LATENCY", "0.5"))
+LLM_FAKE_ERROR_RATE = float(os.getenv("LLM_FAKE_ERROR_RATE", "0"))
+LLM_CACHE = os.getenv("LLM_CACHE", "Y").upper() == "Y"
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+LLM_CACHE_MAX_TEMPERATURE = float(os.getenv("LLM_CACHE_MAX_TEMPERATURE", "0.3"))
+SCORING_CONCURRENCY = int(os.getenv("SCORING_CONCURRENCY", "16"))
+SCORING_BATCH_SIZE = int(os.getenv("SCORING_BATCH_SIZE", "50"))
+JOB_WORKER = os.getenv("JOB_WORKER", "Y").upper() == "Y"
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", "8"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+OCR_DPI = int(os.getenv("OCR_DPI", "400"))
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(min(4, os.cpu_count() or 1))))
+OCR_MAX_INFLIGHT = int(os.getenv("OCR_MAX_INFLIGHT", str(2 * OCR_WORKERS)))
+OCR_MIN_TEXT_CHARS = int(os.getenv("OCR_MIN_TEXT_CHARS", "16"))
+IDENTITY_CACHE_TTL = float(os.getenv("IDENTITY_CACHE_TTL", "30"))
+IDENTITY_CACHE_SIZE = int(os.getenv("IDENTITY_CACHE_SIZE", "10000"))
+CONTEST_CACHE_TTL = float(os.getenv("CONTEST_CACHE_TTL", "300"))
+CONTEST_CACHE_SIZE = int(os.getenv("CONTEST_CACHE_SIZE", "1000"))
+CONTEST_WATCH_POLL = float(os.getenv("CONTEST_WATCH_POLL", "10"))
+LEADERBOARD_CACHE_TTL = float(os.getenv("LEADERBOARD_CACHE_TTL", "60"))
+LEADERBOARD_CACHE_SIZE = int(os.getenv("LEADERBOARD_CACHE_SIZE", "256"))
+LEADERBOARD_PUSH_INTERVAL = float(os.getenv("LEADERBOARD_PUSH_INTERVAL", "2"))
+LEADERBOARD_PUSH_QUEUE = int(os.getenv("LEADERBOARD_PUSH_QUEUE", "8"))
+LEADERBOARD_PUSH_TOP = int(os.getenv("LEADERBOARD_PUSH_TOP", "100"))
+LEADERBOARD_PUSH_HEARTBEAT = float(os.getenv("LEADERBOARD_PUSH_HEARTBEAT", "15"))
+LEADERBOARD_PUSH_MAX_SUBSCRIBERS = int(os.getenv("LEADERBOARD_PUSH_MAX_SUBSCRIBERS", "20000"))
+FILE_STREAM_BUFFER = int(os.getenv("FILE_STREAM_BUFFER", "1048576"))
+FILE_CACHE_MAX_AGE = int(os.getenv("FILE_CACHE_MAX_AGE", "3600"))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", "261120"))
+RESUME_MAX_BYTES = int(os.getenv("RESUME_MAX_BYTES", str(10 * 1024 * 1024)))
+AUDIO_MAX_BYTES = int(os.getenv("AUDIO_MAX_BYTES", str(25 * 1024 * 1024)))
+RESUME_INGEST_CONCURRENCY = int(os.getenv("RESUME_INGEST_CONCURRENCY", "2"))
+CONTEST_BUILD_TIMEOUT = float(os.getenv("CONTEST_BUILD_TIMEOUT", "120"))
+CONTEST_STEP_RETRIES = int(os.getenv("CONTEST_STEP_RETRIES", "1"))
+CODING_DIFFICULTY_RATIOS = os.getenv("CODING_DIFFICULTY_RATIOS", "Easy:1,Medium:1,Hard:1")
+QUESTION_INDEX_REFRESH = float(os.getenv("QUESTION_INDEX_REFRESH", "300"))
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "6000"))
+HISTORY_ANSWER_CHARS = int(os.getenv("HISTORY_ANSWER_CHARS", "2000"))
+GITHUB_TIMEOUT = float(os.getenv("GITHUB_TIMEOUT", "15"))
+GITHUB_MAX_CONNECTIONS = int(os.getenv("GITHUB_MAX_CONNECTIONS", "20"))
+GITHUB_MAX_REPO_PAGES = int(os.getenv("GITHUB_MAX_REPO_PAGES", "50"))
+GITHUB_CACHE_TTL = int(os.getenv("GITHUB_CACHE_TTL", str(7 * 24 * 3600)))
+GITHUB_MODE = os.getenv("GITHUB_MODE", "live")
+GITHUB_FIXTURES = os.getenv("GITHUB_FIXTURES", "fixtures/github")
@@ -0,0 +1,87 @@
+from fastapi import HTTPException
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+from database import contest_collection, contest_candidate_collection
+from utils.contest_cache import invalidate_contest
+
+
+
+
+def register_candidate(contest: dict, candidate_id: ObjectId, timestamp):
+
+    contest_id = contest["_id"]
+
+    # take a seat first; the counter is the only thing guarding capacity
+    seat = contest_collection.update_one(
+        {
+            "_id": contest_id,
+            "candidate_count": {"$lt": contest["candidate_capacity"]}
+        },
+        {"$inc": {"candidate_count": 1}}
+    )
+
+    invalidate_contest(contest_id)
+
+    if seat.modified_count == 0:
+        raise HTTPException(
+            status_code=400,
+            detail="Contest capacity full"
+        )
+
+    try:
+        contest_candidate_collection.insert_one({
+            "contest_id": contest_id,
+            "candidate_id": candidate_id,
+            "created_on": timestamp
+        })
+
+    except Exception as e:
+        contest_collection.update_one(
+            {"_id": contest_id},
+            {"$inc": {"candidate_count": -1}}
+        )
+        invalidate_contest(contest_id)
+
+        if isinstance(e, DuplicateKeyError):
+            raise HTTPException(
+                status_code=400,
+                detail="Already registered"
+            )
+
+        raise
+
+
+
+
+def unregister_candidate(contest_id: ObjectId, candidate_id: ObjectId):
+
+    deleted = contest_candidate_collection.delete_one(
+        {
+            "contest_id": contest_id,
+            "candidate_id": candidate_id
+        }
+    )
+
+    # a concurrent unregister already gave the seat back
+    if deleted.deleted_count == 0:
+        return
+
+    contest_collection.update_one(
+        {"_id": contest_id},
+        {"$inc": {"candidate_count": -1}}
+    )
+
+    invalidate_contest(contest_id)
+
+
+
+
+def registered_candidate_ids(contest_id: ObjectId) -> list:
+
+    return [
+        doc["candidate_id"]
+        for doc in contest_candidate_collection.find(
+            {"contest_id": contest_id},
+            {"_id": 0, "candidate_id": 1}
+        )
+    ]
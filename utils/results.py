@@ -0,0 +1,192 @@
+import asyncio
+from fastapi import HTTPException
+from bson import ObjectId
+from datetime import timezone
+import numpy as np
+import uuid
+from database import contest_leaderboard
+from utils.registration import registered_candidate_ids
+from utils.leaderboard import attach_names, invalidate_leaderboards
+from utils.normalizer import matrix_leaderboard, TIME_ORIGIN, ONE_MICROSECOND
+from utils.round_stats import sync_round_scores, round_question_keys, load_round_matrix, store_exact_stats, penalty_seconds
+from utils.admin import fake_submit_candidate_coding, fake_submit_candidate_concept, fake_submit_candidate_hr
+
+
+SECONDS = 10 ** 6
+
+
+
+
+def round_leaderboard(candidate_ids: list, scores, offsets, registered_candidates: list, penalty_offset: int):
+
+    participated = set(candidate_ids)
+    missing_candidates = [cid for cid in registered_candidates if cid not in participated]
+
+    # registered candidates who never took the round sit one point below
+    # the lowest score of every question
+    if missing_candidates:
+        present = ~np.isnan(scores)
+        lowest = np.where(present, scores, np.inf).min(axis=0)
+        penalty = np.where(present.any(axis=0), lowest - 1, np.nan)
+
+        scores = np.vstack([scores, np.tile(penalty, (len(missing_candidates), 1))])
+        offsets = np.vstack([
+            offsets,
+            np.full((len(missing_candidates), offsets.shape[1]), penalty_offset, dtype=np.int64)
+        ])
+        candidate_ids = candidate_ids + missing_candidates
+
+    return matrix_leaderboard(candidate_ids, scores, offsets)
+
+
+
+
+def save_round_leaderboard(contest_obj_id: ObjectId, round_key: str, selected_key: str, leaderboard: list, x: int):
+
+    selected_candidates = [
+        entry["candidate_id"]
+        for entry in leaderboard[:x]
+    ]
+
+    # names are stored with the entries so serving a board needs no lookups
+    attach_names(leaderboard)
+
+    contest_leaderboard.update_one(
+        {"contest_id": contest_obj_id},
+        {
+            "$set": {
+                round_key: leaderboard,
+                selected_key: selected_candidates,
+                f"versions.{round_key}": uuid.uuid4().hex
+            }
+        },
+        upsert=True
+    )
+
+    invalidate_leaderboards(contest_obj_id)
+
+
+
+
+def compute_round_result(contest: dict, contest_obj_id: ObjectId, round_name: str, missing_detail: str):
+
+    sync_round_scores(contest, round_name)
+
+    keys = round_question_keys(contest, round_name)
+    candidate_ids, scores, offsets = load_round_matrix(contest_obj_id, round_name, keys)
+
+    if not candidate_ids:
+        raise HTTPException(status_code=404, detail=missing_detail)
+
+    store_exact_stats(contest_obj_id, round_name, keys, scores)
+
+    # resume answers are untimed, so absentees there get a flat ten minutes
+    penalty = 600 if round_name == "resume" else penalty_seconds(contest, round_name)
+
+    leaderboard = round_leaderboard(
+        candidate_ids,
+        scores,
+        offsets,
+        registered_candidate_ids(contest_obj_id),
+        penalty * SECONDS
+    )
+
+    save_round_leaderboard(
+        contest_obj_id,
+        f"{round_name}_round",
+        f"selected_{round_name}_candidates",
+        leaderboard,
+        contest.get(f"selected_{round_name}", 0)
+    )
+
+
+
+
+async def compute_resume_result(contest: dict, contest_obj_id: ObjectId):
+    await asyncio.to_thread(compute_round_result, contest, contest_obj_id, "resume", "No resumes submitted for this contest")
+
+
+
+
+async def compute_coding_result(contest: dict, contest_obj_id: ObjectId):
+    await fake_submit_candidate_coding(contest_obj_id, contest)
+    await asyncio.to_thread(compute_round_result, contest, contest_obj_id, "coding", "No codings submitted for this contest")
+
+
+
+
+async def compute_concept_result(contest: dict, contest_obj_id: ObjectId):
+    await fake_submit_candidate_concept(contest_obj_id, contest)
+    await asyncio.to_thread(compute_round_result, contest, contest_obj_id, "concept", "No concepts submitted for this contest")
+
+
+
+
+async def compute_hr_result(contest: dict, contest_obj_id: ObjectId):
+    await fake_submit_candidate_hr(contest_obj_id, contest)
+    await asyncio.to_thread(compute_round_result, contest, contest_obj_id, "hr", "No HR submissions found for this contest")
+
+
+
+
+def build_final_leaderboard(contest: dict, contest_obj_id: ObjectId):
+
+    leaderboard_doc = contest_leaderboard.find_one(
+        {"contest_id": contest_obj_id},
+        {
+            "_id": 0,
+            "resume_round": 1,
+            "coding_round": 1,
+            "concept_round": 1,
+            "hr_round": 1
+        }
+    )
+
+    if not leaderboard_doc:
+        raise HTTPException(status_code=404, detail="No round leaderboards found")
+
+    sections = [
+        leaderboard_doc[key]
+        for key in ["resume_round", "coding_round", "concept_round", "hr_round"]
+        if leaderboard_doc.get(key)
+    ]
+
+    if not sections:
+        raise HTTPException(status_code=404, detail="No section leaderboards available")
+
+
+    row_of = {}
+
+    for section in sections:
+        for entry in section:
+            row_of.setdefault(entry["candidate_id"], len(row_of))
+
+    scores = np.full((len(row_of), len(sections)), np.nan)
+    offsets = np.zeros((len(row_of), len(sections)), dtype=np.int64)
+
+    for col, section in enumerate(sections):
+        for entry in section:
+            row = row_of[entry["candidate_id"]]
+            scores[row, col] = entry["final_normalized_score"]
+            offsets[row, col] = (
+                entry["latest_submission"].replace(tzinfo=timezone.utc) - TIME_ORIGIN
+            ) // ONE_MICROSECOND
+
+    # a candidate's time is the running total of their section times
+    offsets = np.cumsum(offsets, axis=1)
+
+    final_leaderboard = matrix_leaderboard(list(row_of), scores, offsets, normalize=False)
+
+    save_round_leaderboard(
+        contest_obj_id,
+        "final_leaderboard",
+        "selected_candidates",
+        final_leaderboard,
+        contest.get("selected_hr", 0)
+    )
+
+
+
+
+async def compute_leaderboard(contest: dict, contest_obj_id: ObjectId):
+    await asyncio.to_thread(build_final_leaderboard, contest, contest_obj_id)
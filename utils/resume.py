@@ -1,145 +1,90 @@
 import fitz
 import pytesseract
-from pdf2image import convert_from_path
+from PIL import Image
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+import threading
 from bson import ObjectId
-from database import resume_question_collection
-from fastapi import HTTPException
-from datetime import datetime, timezone, timedelta
-from typing import Callable, Awaitable, Union
-import asyncio
-from fastapi.security import HTTPAuthorizationCredentials
-import inspect
-from utils.time import generate_timestamp
+from utils.history import build_history
+from utils.reader import OCR_DPI, OCR_WORKERS, OCR_MAX_INFLIGHT, OCR_MIN_TEXT_CHARS
 
 
-def extract_text_without_ocr(pdf_path):
-    text = ""
-    doc = fitz.open(pdf_path)
-    for page in doc:
-        text += page.get_text()
-        
-    return text
+OCR_POOL = None
+OCR_POOL_LOCK = threading.Lock()
 
 
-def extract_text_with_ocr(pdf_path):
-    text = ""
-    pages = convert_from_path(pdf_path, dpi=400)
+def get_ocr_pool():
+    global OCR_POOL
 
-    for page in pages:
-        text += pytesseract.image_to_string(page)
-        text += "\n"
+    with OCR_POOL_LOCK:
+        if OCR_POOL is None:
+            OCR_POOL = ProcessPoolExecutor(max_workers=OCR_WORKERS)
 
-    return text
+    return OCR_POOL
 
 
+def ocr_page(width, height, samples):
+    image = Image.frombytes("L", (width, height), samples)
+    return pytesseract.image_to_string(image)
 
 
-def previous_resume_session_questions(
-    resume_id: ObjectId,
-    x: int = None,
-    session_number: int = None,
-):
-    
-    session_dict = {}
-    sessions_used = {}
-    
-    search_query = {
-        "resume_id": resume_id,
-        "status": "passive"
-        }
-
-    if session_number:
-        search_query["session_number"] = session_number
-
-    all_sessions = list(
-        resume_question_collection.find(
-            search_query,
-            {
-                "_id": 1,
-                "session_number": 1,
-                "question_bank": 1,
-                "timestamp": 1
-            }
-        ).sort("timestamp", -1)
-    )
+def open_pdf(pdf):
 
+    # a path on disk, or the uploaded bytes kept in memory
+    if isinstance(pdf, bytes):
+        return fitz.open(stream=pdf, filetype="pdf")
 
-    if not session_number:
-        latest_sessions = {}
+    return fitz.open(pdf)
 
-        for session in all_sessions:
-            sn = session["session_number"]
-
-            if sn not in latest_sessions:
-                latest_sessions[sn] = session
-        
-        all_sessions = latest_sessions.values()
 
+def extract_text_without_ocr(pdf_path):
 
-    sorted_sessions = sorted(
-        all_sessions,
-        key=lambda s: s["timestamp"],
-        reverse=True
-    )
+    with open_pdf(pdf_path) as doc:
+        return "".join(page.get_text() for page in doc)
 
-    if x:
-        sorted_sessions = sorted_sessions[:x]
-        
-        if len(sorted_sessions) <= 1:
-            raise HTTPException(
-                status_code=400,
-                detail="Need at least 2 sessions for combined feedback."
-            )
 
-    for idx, s in enumerate(sorted_sessions):
-        sn = s["session_number"]
-        sid = str(s["_id"])
-        ts = s["timestamp"]
+def extract_text_with_ocr(pdf_path):
 
-        session_dict[f"session_{idx+1}"] = {
-            q.get("question", ""): q.get("answer", "")
-            for q in s.get("question_bank", [])
-            if q.get("answer")
-        }
+    pool = get_ocr_pool()
+    texts = []
+    pending = deque()
 
-        sessions_used[str(ts)] = {
-            "session_number": sn,
-            "session_id": sid
-        }
+    # pages are rendered one at a time and at most OCR_MAX_INFLIGHT rendered
+    # pages are alive at once, so memory does not grow with page count
+    with open_pdf(pdf_path) as doc:
 
-    return session_dict, sessions_used
+        for page in doc:
+            text = page.get_text()
 
+            if len(text.strip()) >= OCR_MIN_TEXT_CHARS:
+                texts.append(text)
+                continue
 
+            pixmap = page.get_pixmap(dpi=OCR_DPI, colorspace=fitz.csGRAY, alpha=False)
+            future = pool.submit(ocr_page, pixmap.width, pixmap.height, pixmap.samples)
+            del pixmap
 
-    
+            texts.append(future)
+            pending.append(future)
 
+            if len(pending) >= OCR_MAX_INFLIGHT:
+                pending.popleft().result()
 
-async def auto_submit(
-    resume_id: str,
-    question_session_id: str,
-    token: str,
-    start_time : datetime,
-    duration: int,
-    fun: Union[
-    Callable[[str, str, datetime, HTTPAuthorizationCredentials], None],
-    Callable[[str, str, datetime, HTTPAuthorizationCredentials], Awaitable[None]]
-    ]
-):
-    credentials = HTTPAuthorizationCredentials(
-        scheme="Bearer",
-        credentials=token
+    return "\n".join(
+        text.result() if not isinstance(text, str) else text
+        for text in texts
     )
 
-    end_time = start_time + timedelta(minutes=duration) + timedelta(minutes=1)
-    now = generate_timestamp()
-    wait_seconds = (end_time - now).total_seconds()
 
-    if wait_seconds > 0:
-        await asyncio.sleep(wait_seconds)
 
-    if inspect.iscoroutinefunction(fun):
-        await fun(resume_id, question_session_id, generate_timestamp(), credentials)
-    else:
-        fun(resume_id, question_session_id, generate_timestamp(), credentials)
+
+async def previous_resume_session_questions(
+    resume_id: ObjectId,
+    x: int = None,
+    session_number: int = None,
+    digests: bool = False,
+):
+    return await build_history("resume", resume_id, x, session_number, digests)
+
 
 
@@ -0,0 +1,293 @@
+from bson import ObjectId
+from pymongo import ReturnDocument
+import numpy as np
+from database import round_scores_collection, round_stats_collection, contest_candidate_collection
+from utils.normalizer import rank_totals, leaderboard_entries, ONE_MICROSECOND, NO_TIME
+from utils.time import generate_timestamp
+
+
+SECONDS = 10 ** 6
+
+# below this a question's spread is treated as zero, like an all-equal column
+MIN_STD_DEV = 1e-12
+
+
+
+
+def round_question_keys(contest: dict, round_name: str) -> list:
+
+    if round_name == "resume":
+        return [str(i + 1) for i in range(contest["resume_questions_count"])]
+
+    return [str(qid) for qid in contest[f"{round_name}_round"]["questions"]]
+
+
+
+
+def penalty_seconds(contest: dict, round_name: str) -> int:
+
+    # an unanswered timed question counts as answered at twice the round length
+    if round_name == "resume":
+        return 0
+
+    return contest[f"{round_name}_round"]["duration"] * 2
+
+
+
+
+def question_scores(round_name: str, round_data: dict, duration: int):
+
+    scores = {}
+    offsets = {}
+    start_time = round_data.get("start_time")
+
+    for q in round_data.get("question_bank", []):
+
+        qid = str(q["question_id"])
+
+        # resume answers are untimed and only count once scored
+        if round_name == "resume":
+            if q.get("score") is not None:
+                scores[qid] = float(q["score"])
+                offsets[qid] = 0
+            continue
+
+        scores[qid] = 0.0 if q.get("score") is None else float(q["score"])
+
+        if q.get("timestamp") is None or start_time is None:
+            offsets[qid] = duration * SECONDS
+        else:
+            offsets[qid] = (q["timestamp"] - start_time) // ONE_MICROSECOND
+
+    return scores, offsets
+
+
+
+
+def stats_delta(old: dict, new: dict) -> dict:
+
+    inc = {}
+
+    for qid in set(old) | set(new):
+
+        a = old.get(qid, 0.0)
+        b = new.get(qid, 0.0)
+
+        delta = {
+            "count": (qid in new) - (qid in old),
+            "sum": b - a,
+            "sumsq": b * b - a * a
+        }
+
+        for field, value in delta.items():
+            if value:
+                inc[f"questions.{qid}.{field}"] = value
+
+    return inc
+
+
+
+
+def record_round_scores(contest_id: ObjectId, round_name: str, candidate_id: ObjectId, round_data: dict, duration: int):
+
+    scores, offsets = question_scores(round_name, round_data, duration)
+    now = generate_timestamp()
+
+    # swapping the candidate's scores atomically means every delta is taken
+    # against exactly the value it replaces, even with concurrent rescoring
+    before = round_scores_collection.find_one_and_update(
+        {"_id": f"{contest_id}:{round_name}:{candidate_id}"},
+        {
+            "$set": {
+                "contest_id": contest_id,
+                "round": round_name,
+                "candidate_id": candidate_id,
+                "scores": scores,
+                "offsets": offsets,
+                "updated_at": now
+            }
+        },
+        projection={"scores": 1},
+        upsert=True,
+        return_document=ReturnDocument.BEFORE
+    )
+
+    inc = stats_delta((before or {}).get("scores", {}), scores)
+
+    if not inc:
+        return
+
+    round_stats_collection.update_one(
+        {"_id": f"{contest_id}:{round_name}"},
+        {
+            "$inc": inc,
+            "$set": {
+                "contest_id": contest_id,
+                "round": round_name,
+                "updated_at": now
+            }
+        },
+        upsert=True
+    )
+
+
+
+
+def get_round_stats(contest_id: ObjectId, round_name: str, keys: list) -> dict:
+
+    doc = round_stats_collection.find_one({"_id": f"{contest_id}:{round_name}"}) or {}
+    questions = doc.get("questions", {})
+
+    stats = {}
+
+    for key in keys:
+        q = questions.get(key, {})
+        n = q.get("count", 0)
+
+        if n <= 0:
+            stats[key] = {"count": 0, "mean": None, "std_dev": None}
+            continue
+
+        mean = q.get("sum", 0) / n
+        variance = max(q.get("sumsq", 0) / n - mean * mean, 0.0)
+
+        stats[key] = {"count": n, "mean": mean, "std_dev": variance ** 0.5}
+
+    return stats
+
+
+
+
+def load_round_matrix(contest_id: ObjectId, round_name: str, keys: list):
+
+    column = {key: j for j, key in enumerate(keys)}
+
+    docs = list(
+        round_scores_collection.find(
+            {"contest_id": contest_id, "round": round_name},
+            {"_id": 0, "candidate_id": 1, "scores": 1, "offsets": 1}
+        ).sort("candidate_id", 1)
+    )
+
+    candidate_ids = []
+    scores = np.full((len(docs), len(keys)), np.nan)
+    offsets = np.zeros((len(docs), len(keys)), dtype=np.int64)
+
+    for row, doc in enumerate(docs):
+
+        candidate_ids.append(doc["candidate_id"])
+
+        for key, score in doc.get("scores", {}).items():
+            j = column.get(key)
+
+            if j is None:
+                continue
+
+            scores[row, j] = score
+            offsets[row, j] = doc["offsets"].get(key, 0)
+
+    return candidate_ids, scores, offsets
+
+
+
+
+def sync_round_scores(contest: dict, round_name: str):
+
+    contest_id = contest["_id"]
+
+    recorded = {
+        doc["candidate_id"]
+        for doc in round_scores_collection.find(
+            {"contest_id": contest_id, "round": round_name},
+            {"_id": 0, "candidate_id": 1}
+        )
+    }
+
+    participants = [
+        doc["candidate_id"]
+        for doc in contest_candidate_collection.find(
+            {"contest_id": contest_id, round_name: {"$exists": True}},
+            {"_id": 0, "candidate_id": 1}
+        )
+    ]
+
+    # only candidates nobody recorded (rounds taken before round_scores
+    # existed) have their full responses read
+    missing = [cid for cid in participants if cid not in recorded]
+
+    if not missing:
+        return
+
+    duration = penalty_seconds(contest, round_name)
+
+    for candidate in contest_candidate_collection.find(
+        {"contest_id": contest_id, "candidate_id": {"$in": missing}},
+        {"_id": 0, "candidate_id": 1, round_name: 1}
+    ):
+        record_round_scores(contest_id, round_name, candidate["candidate_id"], candidate[round_name], duration)
+
+
+
+
+def store_exact_stats(contest_id: ObjectId, round_name: str, keys: list, scores):
+
+    # running $inc sums drift slightly; the final recompute writes them exactly
+    present = ~np.isnan(scores)
+    filled = np.where(present, scores, 0.0)
+
+    questions = {
+        key: {
+            "count": int(present[:, j].sum()),
+            "sum": float(filled[:, j].sum()),
+            "sumsq": float((filled[:, j] ** 2).sum())
+        }
+        for j, key in enumerate(keys)
+    }
+
+    round_stats_collection.update_one(
+        {"_id": f"{contest_id}:{round_name}"},
+        {
+            "$set": {
+                "contest_id": contest_id,
+                "round": round_name,
+                "questions": questions,
+                "updated_at": generate_timestamp()
+            }
+        },
+        upsert=True
+    )
+
+
+
+
+def provisional_leaderboard(contest: dict, round_name: str):
+
+    keys = round_question_keys(contest, round_name)
+    stats = get_round_stats(contest["_id"], round_name, keys)
+    candidate_ids, scores, offsets = load_round_matrix(contest["_id"], round_name, keys)
+
+    if not candidate_ids:
+        return [], stats
+
+    mean = np.array([stats[key]["mean"] or 0.0 for key in keys])
+    std_dev = np.array([stats[key]["std_dev"] or 0.0 for key in keys])
+
+    present = ~np.isnan(scores)
+    usable = present & (std_dev > MIN_STD_DEV)
+
+    z = (np.where(present, scores, 0.0) - mean) / np.where(std_dev > MIN_STD_DEV, std_dev, 1.0)
+    totals = np.where(usable, z, 0.0).sum(axis=1)
+
+    latest = np.where(present, offsets, NO_TIME).max(axis=1)
+    order, ranks, percentiles = rank_totals(totals, latest)
+
+    leaderboard = leaderboard_entries(candidate_ids, order, totals, latest, ranks, percentiles)
+
+    return leaderboard, stats
+
+
+
+
+def delete_round_data(contest_id: ObjectId):
+    round_scores_collection.delete_many({"contest_id": contest_id})
+    round_stats_collection.delete_many({"contest_id": contest_id})
@@ -0,0 +1,255 @@
+import asyncio
+import os
+import socket
+import uuid
+from collections import Counter
+from datetime import timedelta, timezone
+from fastapi import HTTPException
+from pymongo import ReturnDocument, ASCENDING
+from database import scheduled_jobs_collection
+from utils.time import generate_timestamp
+from utils.indexes import ensure_indexes
+from utils.reader import JOB_POLL_INTERVAL, JOB_LEASE_SECONDS, JOB_CONCURRENCY, JOB_MAX_ATTEMPTS
+
+
+RETRY_BASE_SECONDS = 5
+RETRY_MAX_SECONDS = 300
+
+
+
+
+def ensure_job_indexes():
+    ensure_indexes(["scheduled_jobs"])
+
+
+
+
+def schedule_job(kind: str, key: str, run_at, payload: dict):
+
+    now = generate_timestamp()
+
+    # one job per (kind, key): re-scheduling the same key moves the timer
+    # instead of piling up duplicates
+    scheduled_jobs_collection.update_one(
+        {"_id": f"{kind}:{key}"},
+        {
+            "$set": {
+                "kind": kind,
+                "payload": payload,
+                "run_at": run_at,
+                "status": "pending",
+                "attempts": 0,
+                "lease_owner": None,
+                "lease_until": None,
+                "last_error": None,
+                "updated_at": now
+            },
+            "$setOnInsert": {"created_at": now}
+        },
+        upsert=True
+    )
+
+
+
+
+def cancel_job(kind: str, key: str):
+    scheduled_jobs_collection.delete_one({"_id": f"{kind}:{key}", "status": "pending"})
+
+
+
+
+def claim_job(owner: str, busy_kinds: list = None):
+
+    now = generate_timestamp()
+
+    query = {
+        "$or": [
+            {"status": "pending", "run_at": {"$lte": now}},
+            {"status": "running", "lease_until": {"$lt": now}}
+        ]
+    }
+
+    # kinds already running at their limit are left for later or for
+    # another worker
+    if busy_kinds:
+        query["kind"] = {"$nin": busy_kinds}
+
+    return scheduled_jobs_collection.find_one_and_update(
+        query,
+        {
+            "$set": {
+                "status": "running",
+                "lease_owner": owner,
+                "lease_until": now + timedelta(seconds=JOB_LEASE_SECONDS),
+                "updated_at": now
+            },
+            "$inc": {"attempts": 1}
+        },
+        sort=[("run_at", ASCENDING)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+
+
+def next_due_in(default: float, busy_kinds: list = None) -> float:
+
+    query = {"status": "pending"}
+
+    if busy_kinds:
+        query["kind"] = {"$nin": busy_kinds}
+
+    job = scheduled_jobs_collection.find_one(
+        query,
+        {"run_at": 1},
+        sort=[("run_at", ASCENDING)]
+    )
+
+    if not job:
+        return default
+
+    run_at = job["run_at"].replace(tzinfo=timezone.utc)
+    return min(default, max(0.0, (run_at - generate_timestamp()).total_seconds()))
+
+
+
+
+def renew_lease(job_id: str, owner: str) -> bool:
+
+    result = scheduled_jobs_collection.update_one(
+        {"_id": job_id, "status": "running", "lease_owner": owner},
+        {"$set": {"lease_until": generate_timestamp() + timedelta(seconds=JOB_LEASE_SECONDS)}}
+    )
+
+    return result.modified_count == 1
+
+
+
+
+def complete_job(job: dict, owner: str):
+
+    scheduled_jobs_collection.update_one(
+        {"_id": job["_id"], "lease_owner": owner},
+        {
+            "$set": {
+                "status": "done",
+                "lease_until": None,
+                "updated_at": generate_timestamp()
+            }
+        }
+    )
+
+
+
+
+def fail_job(job: dict, owner: str, error: Exception):
+
+    now = generate_timestamp()
+
+    # client errors (not found, window closed, ...) will not fix themselves
+    permanent = (
+        isinstance(error, HTTPException)
+        and 400 <= error.status_code < 500
+        and error.status_code != 409
+    )
+
+    if permanent or job["attempts"] >= JOB_MAX_ATTEMPTS:
+        update = {"status": "failed"}
+    else:
+        delay = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (job["attempts"] - 1))
+        update = {"status": "pending", "run_at": now + timedelta(seconds=delay)}
+
+    scheduled_jobs_collection.update_one(
+        {"_id": job["_id"], "lease_owner": owner},
+        {
+            "$set": {
+                **update,
+                "lease_until": None,
+                "last_error": repr(error),
+                "updated_at": now
+            }
+        }
+    )
+
+
+
+
+async def keep_lease(job_id: str, owner: str):
+
+    while True:
+        await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+        await asyncio.to_thread(renew_lease, job_id, owner)
+
+
+
+
+async def run_job(job: dict, handlers: dict, owner: str):
+
+    heartbeat = asyncio.create_task(keep_lease(job["_id"], owner))
+
+    try:
+        handler = handlers[job["kind"]]
+        await handler(job["payload"])
+
+    except Exception as e:
+        await asyncio.to_thread(fail_job, job, owner, e)
+
+    else:
+        await asyncio.to_thread(complete_job, job, owner)
+
+    finally:
+        heartbeat.cancel()
+
+
+
+
+async def run_worker(handlers: dict, stop: asyncio.Event = None, limits: dict = None):
+
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    stop = stop or asyncio.Event()
+    slots = asyncio.Semaphore(JOB_CONCURRENCY)
+    running = set()
+    limits = limits or {}
+    active = Counter()
+
+    await asyncio.to_thread(ensure_job_indexes)
+
+    while not stop.is_set():
+
+        await slots.acquire()
+
+        busy_kinds = [kind for kind, limit in limits.items() if active[kind] >= limit]
+
+        try:
+            job = await asyncio.to_thread(claim_job, owner, busy_kinds)
+        except Exception:
+            job = None
+
+        if job is None:
+            slots.release()
+
+            try:
+                wait = await asyncio.to_thread(next_due_in, JOB_POLL_INTERVAL, busy_kinds)
+            except Exception:
+                wait = JOB_POLL_INTERVAL
+
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=max(wait, 0.05))
+            except asyncio.TimeoutError:
+                pass
+
+            continue
+
+        kind = job["kind"]
+        active[kind] += 1
+
+        task = asyncio.create_task(run_job(job, handlers, owner))
+        running.add(task)
+        task.add_done_callback(running.discard)
+        task.add_done_callback(lambda _, kind=kind: active.subtract([kind]))
+        task.add_done_callback(lambda _: slots.release())
+
+    # unfinished jobs keep their lease and are picked up by another
+    # worker once it expires
+    for task in running:
+        task.cancel()
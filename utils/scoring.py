@@ -0,0 +1,226 @@
+import asyncio
+from bson import ObjectId
+from datetime import timedelta
+from fastapi import HTTPException
+from pymongo import UpdateOne
+from database import contest_candidate_collection, contest_collection
+from utils.contest import score_coding, score_concept, score_hr, get_coding_question_map
+from utils.time import generate_timestamp
+from utils.round_stats import record_round_scores, penalty_seconds
+from utils.reader import SCORING_CONCURRENCY, SCORING_BATCH_SIZE
+
+
+ROUND_SCORERS = {
+    "coding": score_coding,
+    "concept": score_concept,
+    "hr": score_hr
+}
+
+# a run that has not flushed for this long is treated as dead and can be resumed
+SCORING_STALE_AFTER = timedelta(minutes=10)
+
+
+
+
+def get_round_questions(contest: dict, round_name: str):
+
+    if round_name == "coding":
+        return get_coding_question_map(contest["coding_round"]["questions"])
+
+    return contest[f"{round_name}_round"]["questions"]
+
+
+
+
+def claim_scoring_run(contest_id: ObjectId, round_name: str, pending: int):
+
+    now = generate_timestamp()
+    progress = f"scoring.{round_name}"
+
+    claimed = contest_collection.find_one_and_update(
+        {
+            "_id": contest_id,
+            "$or": [
+                {f"{progress}.status": {"$ne": "running"}},
+                {f"{progress}.updated_at": {"$lt": now - SCORING_STALE_AFTER}}
+            ]
+        },
+        {
+            "$set": {
+                progress: {
+                    "status": "running",
+                    "pending": pending,
+                    "scored": 0,
+                    "failed": 0,
+                    "started_at": now,
+                    "updated_at": now
+                }
+            }
+        },
+        projection={"_id": 1}
+    )
+
+    if not claimed:
+        raise HTTPException(
+            status_code=409,
+            detail=f"{round_name} scoring already in progress"
+        )
+
+
+
+
+def flush_scores(contest_id: ObjectId, round_name: str, scored: list, duration: int):
+
+    operations = [
+        UpdateOne(
+            {
+                "contest_id": contest_id,
+                "candidate_id": candidate["candidate_id"]
+            },
+            {
+                "$set": {
+                    **update,
+                    f"{round_name}.submitted_at": candidate[round_name]["end_time"]
+                }
+            }
+        )
+        for candidate, update in scored
+    ]
+
+    contest_candidate_collection.bulk_write(operations, ordered=False)
+
+    for candidate, update in scored:
+        record_round_scores(
+            contest_id,
+            round_name,
+            candidate["candidate_id"],
+            {**candidate[round_name], "question_bank": update[f"{round_name}.question_bank"]},
+            duration
+        )
+
+    # only drop candidates from the pending list once their scores are stored,
+    # so an interrupted run resumes with whoever is left
+    contest_collection.update_one(
+        {"_id": contest_id},
+        {
+            "$pullAll": {
+                f"fake_submit_{round_name}": [candidate["candidate_id"] for candidate, _ in scored]
+            },
+            "$inc": {f"scoring.{round_name}.scored": len(scored)},
+            "$set": {f"scoring.{round_name}.updated_at": generate_timestamp()}
+        }
+    )
+
+
+
+
+def finish_scoring_run(contest_id: ObjectId, round_name: str, status: str, failed: int, last_error: str):
+
+    progress = f"scoring.{round_name}"
+    now = generate_timestamp()
+
+    contest_collection.update_one(
+        {"_id": contest_id},
+        {
+            "$set": {
+                f"{progress}.status": status,
+                f"{progress}.failed": failed,
+                f"{progress}.last_error": last_error,
+                f"{progress}.updated_at": now,
+                f"{progress}.finished_at": now
+            }
+        }
+    )
+
+
+
+
+async def score_pending_candidates(contest_id: ObjectId, contest: dict, round_name: str):
+
+    pending_ids = contest.get(f"fake_submit_{round_name}", [])
+
+    if not pending_ids:
+        return
+
+    projection = {"_id": 0, "candidate_id": 1, round_name: 1}
+
+    if round_name == "hr":
+        projection["resume.summary"] = 1
+
+    candidates = await asyncio.to_thread(
+        lambda: list(
+            contest_candidate_collection.find(
+                {
+                    "contest_id": contest_id,
+                    "candidate_id": {"$in": pending_ids}
+                },
+                projection
+            )
+        )
+    )
+
+    await asyncio.to_thread(claim_scoring_run, contest_id, round_name, len(candidates))
+
+    found_ids = {candidate["candidate_id"] for candidate in candidates}
+    orphan_ids = [cid for cid in pending_ids if cid not in found_ids]
+
+    if orphan_ids:
+        await asyncio.to_thread(
+            contest_collection.update_one,
+            {"_id": contest_id},
+            {"$pullAll": {f"fake_submit_{round_name}": orphan_ids}}
+        )
+
+    questions = await asyncio.to_thread(get_round_questions, contest, round_name)
+    scorer = ROUND_SCORERS[round_name]
+    duration = penalty_seconds(contest, round_name)
+    semaphore = asyncio.Semaphore(SCORING_CONCURRENCY)
+
+
+    async def score(candidate):
+        async with semaphore:
+            try:
+                return candidate, await scorer(candidate, questions), None
+            except Exception as e:
+                return candidate, None, repr(e)
+
+
+    tasks = [asyncio.create_task(score(candidate)) for candidate in candidates]
+    scored = []
+    failed = 0
+    last_error = None
+
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            candidate, update, error = await next_done
+
+            if error:
+                failed += 1
+                last_error = error
+                continue
+
+            scored.append((candidate, update))
+
+            if len(scored) >= SCORING_BATCH_SIZE:
+                await asyncio.to_thread(flush_scores, contest_id, round_name, scored, duration)
+                scored = []
+
+        if scored:
+            await asyncio.to_thread(flush_scores, contest_id, round_name, scored, duration)
+
+    except Exception as e:
+        await asyncio.to_thread(finish_scoring_run, contest_id, round_name, "failed", failed, repr(e))
+        raise
+
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    status = "failed" if failed else "completed"
+    await asyncio.to_thread(finish_scoring_run, contest_id, round_name, status, failed, last_error)
+
+    if failed:
+        raise HTTPException(
+            status_code=502,
+            detail=f"{failed} candidates could not be scored, retry to resume"
+        )
@@ -0,0 +1,83 @@
+import asyncio
+import hashlib
+import io
+from fastapi import HTTPException, UploadFile
+from gridfs import GridFS
+from utils.reader import UPLOAD_CHUNK_SIZE
+from utils.artifacts import claim_blob, release_blob
+
+
+
+
+def tee_upload(source, fs: GridFS, filename: str, content_type: str, max_bytes: int) -> dict:
+
+    digest = hashlib.sha256()
+    buffer = io.BytesIO()
+    length = 0
+
+    grid_in = fs.new_file(filename=filename, content_type=content_type)
+
+    # one pass over the request body: each chunk goes to GridFS, the hash
+    # and the in-memory copy the parser reads, with no temp file in between
+    try:
+        while True:
+            chunk = source.read(UPLOAD_CHUNK_SIZE)
+
+            if not chunk:
+                break
+
+            length += len(chunk)
+
+            if length > max_bytes:
+                raise HTTPException(status_code=413, detail=f"File larger than {max_bytes} bytes")
+
+            digest.update(chunk)
+            buffer.write(chunk)
+            grid_in.write(chunk)
+
+        if length == 0:
+            raise HTTPException(status_code=400, detail="Empty file")
+
+        grid_in.sha256 = digest.hexdigest()
+        grid_in.close()
+
+    except BaseException:
+        grid_in.abort()
+        raise
+
+    return {
+        "file_id": grid_in._id,
+        "sha256": digest.hexdigest(),
+        "length": length,
+        "data": buffer.getvalue()
+    }
+
+
+
+
+def store_upload(source, fs: GridFS, filename: str, content_type: str, max_bytes: int, bucket: str = None) -> dict:
+
+    upload = tee_upload(source, fs, filename, content_type, max_bytes)
+    upload["bucket"] = bucket
+
+    # a bucket name turns on sharing of identical bytes across uploads
+    if bucket:
+        upload["file_id"] = claim_blob(bucket, upload["sha256"], upload["file_id"], upload["length"])
+
+    return upload
+
+
+
+
+async def receive_upload(file: UploadFile, fs: GridFS, content_type: str, max_bytes: int, bucket: str = None) -> dict:
+    return await asyncio.to_thread(store_upload, file.file, fs, file.filename, content_type, max_bytes, bucket)
+
+
+
+
+def discard_upload(fs: GridFS, upload: dict):
+
+    if upload["bucket"]:
+        release_blob(upload["bucket"], upload["file_id"])
+    else:
+        fs.delete(upload["file_id"])
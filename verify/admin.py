@@ -3,10 +3,23 @@ from database import admin_collection, contest_collection
 from bson import ObjectId
 from bson.errors import InvalidId
 from typing import Tuple
+from utils.cache import TTLCache
+from utils.reader import IDENTITY_CACHE_TTL, IDENTITY_CACHE_SIZE
+import copy
 from schemas.contest import ContestCreate
 from utils.time import generate_timestamp
 from datetime import timedelta
 
+
+ADMIN_CACHE = TTLCache(IDENTITY_CACHE_SIZE, IDENTITY_CACHE_TTL)
+
+
+def invalidate_admin(admin_id: ObjectId):
+    ADMIN_CACHE.pop(admin_id)
+
+
+
+
 def verify_admin_payload(payload: dict) -> Tuple[dict|None, ObjectId, str]:
 
     admin_id = payload.get("admin_id")
@@ -42,10 +55,21 @@ def verify_admin(admin_id: str, email: str, type:str) -> Tuple[dict|None, Object
             detail="Invalid admin id"
         )
 
-    admin = admin_collection.find_one({
-        "_id": admin_obj_id,
-        "email": email
-    })
+    admin = None
+
+    if type == "Y":
+        cached = ADMIN_CACHE.get(admin_obj_id)
+        if cached is not None and cached.get("email") == email:
+            admin = copy.deepcopy(cached)
+
+    if admin is None:
+        admin = admin_collection.find_one({
+            "_id": admin_obj_id,
+            "email": email
+        })
+
+        if admin and type == "Y":
+            ADMIN_CACHE.set(admin_obj_id, copy.deepcopy(admin))
 
     if type == "N":
         if admin:
@@ -313,3 +337,49 @@ def verify_contest_id(contest_id: str):
 
 
 
+
+
+
+def verify_export_round(round_name: str, final: bool = False) -> str:
+
+    rounds = ["resume", "coding", "concept", "hr"] + (["final"] if final else [])
+
+    if round_name not in rounds:
+        raise HTTPException(
+            status_code=400,
+            detail=f"round must be one of {', '.join(rounds)}"
+        )
+
+    return round_name
+
+
+
+def verify_export_format(export_format: str) -> str:
+
+    media_types = {
+        "ndjson": "application/x-ndjson",
+        "csv": "text/csv"
+    }
+
+    if export_format not in media_types:
+        raise HTTPException(
+            status_code=400,
+            detail="format must be ndjson or csv"
+        )
+
+    return media_types[export_format]
+
+
+
+def verify_candidate_cursor(cursor: str|None) -> ObjectId|None:
+
+    if cursor is None:
+        return None
+
+    try:
+        return ObjectId(cursor)
+    except InvalidId:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid cursor"
+        )
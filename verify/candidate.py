@@ -3,6 +3,16 @@ from database import candidate_collection
 from bson import ObjectId
 from bson.errors import InvalidId
 from typing import Tuple
+from utils.cache import TTLCache
+from utils.reader import IDENTITY_CACHE_TTL, IDENTITY_CACHE_SIZE
+import copy
+
+
+CANDIDATE_CACHE = TTLCache(IDENTITY_CACHE_SIZE, IDENTITY_CACHE_TTL)
+
+
+def invalidate_candidate(candidate_id: ObjectId):
+    CANDIDATE_CACHE.pop(candidate_id)
 
 def verify_candidate_payload(payload: dict) -> Tuple[dict|None, ObjectId, str]:
 
@@ -44,10 +54,21 @@ def verify_candidate(candidate_id: str, email: str, type:str) -> Tuple[dict|None
     print(candidate_id,email)
 
     
-    candidate = candidate_collection.find_one({
-        "_id": candidate_obj_id,
-        "email": email
-    })
+    candidate = None
+
+    if type == "Y":
+        cached = CANDIDATE_CACHE.get(candidate_obj_id)
+        if cached is not None and cached.get("email") == email:
+            candidate = copy.deepcopy(cached)
+
+    if candidate is None:
+        candidate = candidate_collection.find_one({
+            "_id": candidate_obj_id,
+            "email": email
+        })
+
+        if candidate and type == "Y":
+            CANDIDATE_CACHE.set(candidate_obj_id, copy.deepcopy(candidate))
 
     if type == "N":
         if candidate:
@@ -23,7 +23,7 @@ def verify_coding(
     coding_doc = coding_collection.find_one({
         "_id": coding_obj_id,
         "candidate_id": candidate_id
-    })
+    }, {"combined_feedback": 0})
 
     if not coding_doc:
         raise HTTPException(
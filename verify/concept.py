@@ -23,7 +23,7 @@ def verify_concept(
     concept_doc = concept_collection.find_one({
         "_id": concept_obj_id,
         "candidate_id": candidate_id
-    })
+    }, {"combined_feedback": 0})
 
     if not concept_doc:
         raise HTTPException(
@@ -1,9 +1,10 @@
-from database import contest_collection, contest_leaderboard, contest_candidate_collection
+from database import contest_leaderboard, contest_candidate_collection
 from fastapi import HTTPException
 from bson import ObjectId
 from bson.errors import InvalidId
 from utils.time import generate_timestamp
 from datetime import timezone, timedelta
+from utils.contest_cache import get_contest
 
 def verify_contest_id(contest_id: str):
 
@@ -15,7 +16,7 @@ def verify_contest_id(contest_id: str):
             detail="Invalid contest_id"
         )
 
-    contest = contest_collection.find_one({"_id": obj_id})
+    contest = get_contest(obj_id)
 
     if not contest:
         raise HTTPException(
@@ -65,8 +66,16 @@ def verify_candidate_eligibility(current_time, candidate, contest):
 
 def verify_contest_registry(candidate, contest, type):
 
+    # registrations live in candidate_response, unique on (contest_id, candidate_id)
+    contest_candidate = contest_candidate_collection.find_one(
+        {
+            "contest_id": contest["_id"],
+            "candidate_id": candidate["_id"]
+        }
+    )
+
     if type == "N":
-        if candidate["_id"] in contest["registered_candidates"]:
+        if contest_candidate:
             raise HTTPException(
                 status_code=400,
                 detail="Already registered"
@@ -76,18 +85,12 @@ def verify_contest_registry(candidate, contest, type):
         
     
     if type == "Y":
-        if candidate["_id"] not in contest["registered_candidates"]:
+        if not contest_candidate:
             raise HTTPException(
                 status_code=400,
                 detail="Candidate not registered for contest"
             )
         else:
-            contest_candidate = contest_candidate_collection.find_one(
-                {
-                    "contest_id": contest["_id"],
-                    "candidate_id": candidate["_id"]
-                }
-            )
             return contest_candidate
 
 
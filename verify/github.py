@@ -1,4 +1,3 @@
-from utils.reader import GITHUB_API_KEY
 from database import github_collection
 from fastapi import HTTPException, status
 from bson import ObjectId
@@ -7,16 +6,10 @@ from typing import Tuple
 from database import github_question_collection
 from datetime import datetime, timezone, timedelta
 from utils.time import generate_timestamp
-import requests
+from utils.github import github_get
 
-def get_headers():
-    return {
-        "Authorization": f"Bearer {GITHUB_API_KEY}",
-        "Accept": "application/vnd.github+json"
-    }
 
-
-def verify_github_link(github_link: str):
+async def verify_github_link(github_link: str):
 
     if not github_link:
         raise HTTPException(status_code=400, detail="GitHub link required")
@@ -33,16 +26,15 @@ def verify_github_link(github_link: str):
 
     username = parts[-1]
 
-    url = f"https://api.github.com/users/{username}"
-    response = requests.get(url, headers=get_headers())
+    response = await github_get(f"/users/{username}")
 
-    if response.status_code != 200:
+    if response["status"] != 200:
         raise HTTPException(status_code=404, detail="GitHub user not found")
 
 
 
 
-def verify_github_repo(repo_link: str):
+async def verify_github_repo(repo_link: str):
 
     if not repo_link:
         raise HTTPException(status_code=400, detail="Repository link required")
@@ -60,19 +52,18 @@ def verify_github_repo(repo_link: str):
     owner = parts[-2]
     repo_name = parts[-1]
 
-    url = f"https://api.github.com/repos/{owner}/{repo_name}"
-    response = requests.get(url, headers=get_headers())
+    response = await github_get(f"/repos/{owner}/{repo_name}")
 
-    if response.status_code != 200:
+    if response["status"] != 200:
         raise HTTPException(status_code=404, detail="Repository not found")
 
 
 
 
-def verify_github_link_repo(github_link: str, repo_link: str):
+async def verify_github_link_repo(github_link: str, repo_link: str):
 
-    verify_github_link(github_link)
-    verify_github_repo(repo_link)
+    await verify_github_link(github_link)
+    await verify_github_repo(repo_link)
     username = github_link.strip().rstrip("/").split("/")[-1]
     repo_owner = repo_link.strip().rstrip("/").split("/")[-2]
 
@@ -99,7 +90,7 @@ def verify_github(
     github_doc = github_collection.find_one({
         "_id": github_obj_id,
         "candidate_id": candidate_id
-    })
+    }, {"combined_feedback": 0})
 
     if not github_doc:
         raise HTTPException(
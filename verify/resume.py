@@ -20,10 +20,12 @@ def verify_resume(
             detail="Invalid resume_id"
         )
 
+    # combined feedback lives in its own collection; older docs may still
+    # carry the array until it is moved on first read
     resume_doc = resume_collection.find_one({
         "_id": resume_obj_id,
         "candidate_id": candidate_id
-    })
+    }, {"combined_feedback": 0})
 
     if not resume_doc:
         raise HTTPException(
@@ -33,6 +35,23 @@ def verify_resume(
 
     return (resume_doc, resume_obj_id)
 
+def verify_resume_ready(resume_doc: dict):
+
+    # status is absent on resumes uploaded before background ingestion
+    status_value = resume_doc.get("status", "ready")
+
+    if status_value == "processing":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Resume is still being processed"
+        )
+
+    if status_value == "failed":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Resume processing failed: {resume_doc.get('ingest', {}).get('error')}"
+        )
+
 def verify_question_session(
     question_session_id: str,
     resume_id: ObjectId
@@ -2,7 +2,12 @@ from fastapi import HTTPException, status
 from google.oauth2 import id_token
 from google.auth.transport import requests
 from jose import jwt, JWTError
-from utils.reader import GOOGLE_CLIENT_ID, JWT_SECRET, JWT_ALGO
+from utils.reader import GOOGLE_CLIENT_ID, JWT_SECRET, JWT_ALGO, IDENTITY_CACHE_TTL, IDENTITY_CACHE_SIZE
+from utils.cache import TTLCache
+import time
+
+
+TOKEN_CACHE = TTLCache(IDENTITY_CACHE_SIZE, IDENTITY_CACHE_TTL)
 
 
 
@@ -33,6 +38,12 @@ def verify_google_token(data: dict|None) -> dict:
 
 
 def verify_access_token(token: str) -> dict:
+
+    payload = TOKEN_CACHE.get(token)
+
+    if payload is not None:
+        return dict(payload)
+
     try:
         payload = jwt.decode(
             token,
@@ -43,7 +54,13 @@ def verify_access_token(token: str) -> dict:
         if payload.get("exp") is None:
             raise HTTPException(status_code=401, detail="Token has no expiry")
 
-        return payload
+        # never keep a token cached past its own expiry
+        ttl = min(IDENTITY_CACHE_TTL, payload["exp"] - time.time())
+
+        if ttl > 0:
+            TOKEN_CACHE.set(token, payload, ttl)
+
+        return dict(payload)
 
     except JWTError:
         raise HTTPException(
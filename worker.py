@@ -0,0 +1,10 @@
+import asyncio
+from utils.scheduler import run_worker
+from utils.jobs import JOB_HANDLERS, JOB_LIMITS
+
+
+# Standalone job worker. Run as many as needed next to (or instead of) the
+# in-process worker; set JOB_WORKER=N on the API to disable the latter.
+#   python worker.py
+if __name__ == "__main__":
+    asyncio.run(run_worker(JOB_HANDLERS, limits=JOB_LIMITS))